@@ -2,5 +2,8 @@
 
 set -eou pipefail
 
-celery -A "$PROJECT.celery.app" worker -D
+celery -A "$PROJECT.celery.app" worker -B -D
+# Refresh tasks are processed one at a time by separate workers
+celery -A "$PROJECT.celery.app" worker -Q refresh -c 1 -n refresh@%h -D
+celery -A "$PROJECT.celery.app" worker -Q rolling_refresh -c 1 -n rolling_refresh@%h -D
 gunicorn --bind :8000 --workers 3 "$PROJECT.wsgi:application" --timeout 120
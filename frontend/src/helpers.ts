@@ -1,3 +1,7 @@
+import axios from "axios";
+
+import type { MovieDataStatusResponseData } from "./types";
+
 import { router } from "./router";
 import { useAuthStore } from "./stores/auth";
 
@@ -21,3 +25,18 @@ export function requireAuthenticated(): void {
 export function getSrcSet(img1x: string, img2x: string): string {
     return `${img1x} 1x, ${img2x} 2x`;
 }
+
+const movieDataStatusPollInterval = 2000;
+const movieDataStatusPollAttempts = 15;
+
+/* Wait until the data of a just added movie is loaded in the background. */
+export async function waitForMovieData(tmdbId: number): Promise<void> {
+    for (let attempt = 0; attempt < movieDataStatusPollAttempts; attempt++) {
+        await new Promise((resolve) => setTimeout(resolve, movieDataStatusPollInterval));
+        const response = await axios.get(getUrl(`movie/${tmdbId}/data-status/`));
+        const data = response.data as MovieDataStatusResponseData;
+        if (data.status !== "loading") {
+            return;
+        }
+    }
+}
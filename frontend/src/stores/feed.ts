@@ -44,7 +44,6 @@ interface FeedResponse {
     results: FeedItem[];
     next: string | null;
     previous: string | null;
-    count: number;
 }
 
 interface FollowStatus {
@@ -70,9 +69,9 @@ export const useFeedStore = defineStore("feed", () => {
         feedError.value = null;
 
         try {
-            const url = reset
-                ? getUrl("feed/")
-                : nextPage.value || getUrl("feed/");
+            // Empty cursor requests the first page of count-free cursor pagination
+            const firstPageUrl = getUrl("feed/?cursor=");
+            const url = reset ? firstPageUrl : nextPage.value || firstPageUrl;
             const response = await axios.get(url);
             const data = response.data as FeedResponse;
 
@@ -19,7 +19,14 @@ export interface MoviePreview {
 }
 
 export interface AddToListFromDbResponseData {
-    status: string;
+    status?: string;
+    dataStatus?: MovieDataStatus;
+}
+
+export type MovieDataStatus = "loading" | "loaded" | "failed";
+
+export interface MovieDataStatusResponseData {
+    status: MovieDataStatus;
 }
 
 export interface Trailer {
@@ -9,7 +9,7 @@ import django_stubs_ext
 import sentry_sdk
 from sentry_sdk.integrations.django import DjangoIntegration
 
-from moviesapp.types import TemplatesSettings, TrailerSitesSettings
+from moviesapp.types import RollingRefreshSettings, TemplatesSettings, TrailerSitesSettings
 
 django_stubs_ext.monkeypatch()
 
@@ -279,14 +279,51 @@ else:
     CELERY_RESULT_BACKEND = f"{REDIS_URL}0"
 CELERY_BROKER_URL = REDIS_URL
 CELERY_TIMEZONE = TIME_ZONE
+# Refresh tasks are processed by separate workers so that they don't delay user-facing tasks.
+# Rolling refresh ticks have their own queue so that they don't wait for a distributed run.
+CELERY_TASK_ROUTES = {
+    **{
+        f"moviesapp.tasks.{task}": {"queue": "refresh"}
+        for task in (
+            "refresh_movies_task",
+            "finish_distributed_refresh_task",
+            "fail_distributed_refresh_task",
+        )
+    },
+    "moviesapp.tasks.rolling_refresh_task": {"queue": "rolling_refresh"},
+}
 
 # --== Project settings ==--
 
 REQUESTS_TIMEOUT = 5
+# Shared HTTP transport for external APIs.
+# Number of hosts to keep connection pools for
+HTTP_POOL_CONNECTIONS = int(getenv("HTTP_POOL_CONNECTIONS", "10"))
+# Max number of kept-alive connections per host in each worker process
+HTTP_POOL_MAXSIZE = int(getenv("HTTP_POOL_MAXSIZE", "10"))
+HTTP_MAX_RETRIES = 3
+HTTP_RETRY_BACKOFF_FACTOR = 0.5
+# TMDB allows around 50 requests per second
+TMDB_MAX_REQUESTS_PER_SECOND = 40
 
 # Search settings
 MAX_RESULTS = 50
 MIN_POPULARITY = 1.5
+# TMDB search cache timeouts (in seconds)
+TMDB_SEARCH_CACHE_TIMEOUT = 60 * 60
+TMDB_PERSON_CREDITS_CACHE_TIMEOUT = 60 * 60 * 24
+TMDB_IMDB_ID_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+# IMDb IDs which are not found on TMDB are not requested again for this time
+TMDB_IMDB_ID_NOT_FOUND_CACHE_TIMEOUT = 60 * 60
+# Trending movies are refreshed in the background (in seconds)
+TMDB_CATALOG_REFRESH_INTERVAL = 60 * 60 * 3
+TMDB_CATALOG_REFRESH_LOCK_TIMEOUT = 60 * 5
+CELERY_BEAT_SCHEDULE = {
+    "refresh-tmdb-catalogs": {
+        "task": "moviesapp.tasks.refresh_tmdb_catalogs_task",
+        "schedule": TMDB_CATALOG_REFRESH_INTERVAL,
+    },
+}
 
 # Posters
 NO_POSTER_SMALL_IMAGE_URL = "img/no_poster_small.png"
@@ -298,6 +335,8 @@ POSTER_SIZE_BIG = "w500"
 POSTER_BASE_URL = "https://image.tmdb.org/t/p/"
 
 PROVIDERS_IMG_DIR = join(PROJECT_DIR, "frontend", "public", "img", "providers")
+# Max width and height of a provider logo in the sprite image
+PROVIDER_LOGO_SPRITE_SIZE = 100
 TMDB_BASE_URL = "https://www.themoviedb.org/"
 TMDB_MOVIE_BASE_URL = urljoin(TMDB_BASE_URL, "movie/")
 TMDB_PROVIDER_BASE_URL = urljoin(TMDB_BASE_URL, "t/p/original/")
@@ -320,6 +359,57 @@ AVATAR_MAX_DIMENSION = 4096
 PROVIDERS_SUPPORTED_COUNTRIES = ("RU", "CA", "US")
 # Number of min days that need to pass before the next watch data update
 WATCH_DATA_UPDATE_MIN_DAYS = 3
+# Watch data is updated in the order of priority, which is a weighted sum of the demand and the age of the data.
+# Points per user from a supported country with the movie in "To Watch"
+WATCH_DATA_PRIORITY_SUPPORTED_USER_WEIGHT = 10
+# Points per "To Watch" record
+WATCH_DATA_PRIORITY_RECORD_WEIGHT = 2
+# Points per week since the last update, up to WATCH_DATA_PRIORITY_MAX_STALE_WEEKS (the max for movies never updated)
+WATCH_DATA_PRIORITY_STALE_WEEK_WEIGHT = 2
+WATCH_DATA_PRIORITY_MAX_STALE_WEEKS = 26
+# Points per month left until the release is WATCH_DATA_PRIORITY_RECENT_RELEASE_MONTHS months old
+WATCH_DATA_PRIORITY_RECENT_RELEASE_MONTH_WEIGHT = 2
+WATCH_DATA_PRIORITY_RECENT_RELEASE_MONTHS = 12
+
+# Number of movies updated with one query when IMDb ratings are updated
+IMDB_RATINGS_BATCH_SIZE = 1000
+
+# Number of movies saved with one query when movie data is updated
+MOVIE_DATA_UPDATE_BATCH_SIZE = 100
+
+# Number of TMDB IDs of changed movies looked up with one query in the incremental mode of update_movie_data
+TMDB_CHANGES_LOOKUP_CHUNK_SIZE = 1000
+
+# Number of unused movies removed in one transaction
+REMOVE_UNUSED_MOVIES_BATCH_SIZE = 1000
+
+# Number of movies in a chunk processed by a Celery worker in the distributed mode of refresh commands
+REFRESH_CHUNK_SIZE = 500
+# Soft time limit of a chunk or a rolling refresh tick (in seconds)
+REFRESH_TASK_SOFT_TIME_LIMIT = 60 * 30
+
+# Number of movies processed by refresh commands between checkpoints (see `--resume`)
+JOB_CHECKPOINT_INTERVAL = 100
+
+# Rolling refresh by Celery beat. Every `interval` seconds one of `shards` shards of movies (`pk % shards`)
+# is refreshed, so all movies are refreshed every `interval * shards` seconds. `max_movies` caps a tick.
+# Movie data is not refreshed in rolling shards because the daily incremental run updates all changed movies
+ROLLING_REFRESH: dict[str, RollingRefreshSettings] = {
+    # Every WATCH_DATA_UPDATE_MIN_DAYS days
+    "update_watch_data": {"interval": 60 * 15, "shards": 4 * 24 * WATCH_DATA_UPDATE_MIN_DAYS, "max_movies": 500},
+    # Every 7 days
+    "update_imdb_ratings": {"interval": 60 * 60, "shards": 24 * 7, "max_movies": 500},
+}
+CELERY_BEAT_SCHEDULE.update(
+    {
+        f"rolling-{command_name}": {
+            "task": "moviesapp.tasks.rolling_refresh_task",
+            "schedule": rolling_refresh["interval"],
+            "args": (command_name,),
+        }
+        for command_name, rolling_refresh in ROLLING_REFRESH.items()
+    }
+)
 
 # API Keys
 TMDB_KEY = getenv("TMDB_KEY")
@@ -332,6 +422,8 @@ AI_MIN_RECOMMENDATIONS = 1
 AI_MIN_RATING = 0
 AI_MAX_RATING = 5
 AI_MAX_MOVIE_TITLE_LENGTH = 100
+# Max number of concurrent TMDB requests used to resolve recommended IMDb IDs
+AI_TMDB_LOOKUP_WORKERS = 8
 
 OPENAI_MODEL = "gpt-5-mini"
 OPENAI_MAX_TOKENS = 10000
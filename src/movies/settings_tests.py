@@ -39,3 +39,6 @@ SESSION_COOKIE_SECURE = False
 SECRET_KEY = "key"  # nosec B105
 GOOGLE_ANALYTICS = "id"
 IS_TEST = True
+
+# Keep files uploaded by tests (e.g. avatars) out of MEDIA_ROOT
+STORAGES["default"] = {"BACKEND": "django.core.files.storage.InMemoryStorage"}  # noqa
@@ -24,7 +24,7 @@ from moviesapp.views.list import (
 )
 from moviesapp.views.movie import MovieDetailView
 from moviesapp.views.recommendations import RecommendationsView
-from moviesapp.views.search import AddToListFromDbView, SearchMovieView
+from moviesapp.views.search import AddToListFromDbView, MovieDataStatusView, SearchMovieView
 from moviesapp.views.stats import StatsView
 from moviesapp.views.trending import TrendingView
 from moviesapp.views.user import AvatarView, UserCheckEmailAvailabilityView, UserPreferencesView
@@ -73,6 +73,7 @@ urlpatterns: list[URL] = [
     path("users/<str:username>/following/", PublicUserFollowingView.as_view(), name="public_user_following"),
     path("users/<str:username>/followers/", PublicUserFollowersView.as_view(), name="public_user_followers"),
     path("movie/<int:tmdb_id>/", MovieDetailView.as_view(), name="movie_detail"),
+    path("movie/<int:tmdb_id>/data-status/", MovieDataStatusView.as_view(), name="movie_data_status"),
     path("search/", SearchMovieView.as_view()),
     path("trending/", TrendingView.as_view(), name="trending"),
     path("recommendations/", RecommendationsView.as_view(), name="recommendations"),
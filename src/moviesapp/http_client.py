@@ -0,0 +1,166 @@
+"""
+Shared HTTP transport.
+
+All requests to external APIs (TMDB, OMDb) go through one session per process, so connections are kept alive
+and reused instead of paying for a new TCP and TLS handshake on every call.
+"""
+
+import logging
+import os
+from threading import Lock
+from time import monotonic, sleep, time
+from typing import Optional
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.util.retry import Retry
+
+from .types import HttpPoolStats
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+
+
+def _get_adapter() -> HTTPAdapter:
+    """Get an HTTP adapter with connection pools and retries."""
+    retry = Retry(
+        total=settings.HTTP_MAX_RETRIES,
+        backoff_factor=settings.HTTP_RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=("GET", "HEAD"),
+        # Return the last response instead of raising an exception so callers handle it as before
+        raise_on_status=False,
+    )
+    return HTTPAdapter(
+        pool_connections=settings.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+
+
+def get_session() -> requests.Session:
+    """Get the shared HTTP session."""
+    global _session  # pylint: disable=global-statement
+    if _session is None:
+        session = requests.Session()
+        adapter = _get_adapter()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _session = session
+    return _session
+
+
+def _close_connections() -> None:
+    """
+    Close the connections of the shared session.
+
+    Connections must not be shared between processes, so forked processes (e.g. Celery workers) open their own.
+    The session object itself is kept because it is referenced by tmdbsimple.
+    """
+    if _session is not None:
+        _session.close()
+
+
+os.register_at_fork(after_in_child=_close_connections)
+
+
+def get_http_pool_stats() -> list[HttpPoolStats]:
+    """Get connection pool stats of the hosts used in the current process."""
+    stats: list[HttpPoolStats] = []
+    if _session is None:
+        return stats
+    adapters = {id(adapter): adapter for adapter in _session.adapters.values()}
+    for adapter in adapters.values():
+        if not isinstance(adapter, HTTPAdapter):
+            continue  # pragma: no cover
+        pools = adapter.poolmanager.pools
+        # The pools container does not support iteration, only `keys()`
+        for key in pools.keys():  # noqa: SIM118
+            pool = pools.get(key)
+            if not isinstance(pool, HTTPConnectionPool):
+                continue  # pragma: no cover
+            stats.append(
+                {
+                    "host": f"{pool.scheme}://{pool.host}",
+                    "connections": pool.num_connections,
+                    "requests": pool.num_requests,
+                    "reused": max(pool.num_requests - pool.num_connections, 0),
+                }
+            )
+    return stats
+
+
+def log_http_pool_stats() -> None:
+    """Log connection pool stats of the hosts used in the current process."""
+    for host_stats in get_http_pool_stats():
+        logger.info(
+            "%s: %d requests, %d connections, %d reused",
+            host_stats["host"],
+            host_stats["requests"],
+            host_stats["connections"],
+            host_stats["reused"],
+        )
+
+
+class RateLimiter:
+    """
+    Limit the rate of requests.
+
+    It is thread-safe so one limiter can be shared between the workers of a thread pool.
+    """
+
+    def __init__(self, requests_per_second: float):
+        """Init."""
+        self._interval = 1 / requests_per_second
+        self._next_request_time = 0.0
+        self._lock = Lock()
+
+    def wait(self) -> None:
+        """Wait until the next request is allowed."""
+        with self._lock:
+            now = monotonic()
+            request_time = max(self._next_request_time, now)
+            self._next_request_time = request_time + self._interval
+        if request_time > now:
+            sleep(request_time - now)
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    Limit the rate of requests of all processes.
+
+    Requests are counted in the cache in short windows, so the limit is shared between Celery workers and
+    management commands. Requests of a process are also spread evenly by the local limit.
+    """
+
+    # Length of a window (in seconds)
+    WINDOW = 0.1
+
+    def __init__(self, name: str, requests_per_second: float):
+        """Init."""
+        super().__init__(requests_per_second)
+        self._name = name
+        self._capacity = max(1, int(requests_per_second * self.WINDOW))
+        self._window = self._capacity / requests_per_second
+
+    def wait(self) -> None:
+        """Wait until the next request is allowed."""
+        super().wait()
+        while True:
+            window = int(time() / self._window)
+            key = f"rate-limiter:{self._name}:{window}"
+            cache.add(key, 0, timeout=2)
+            try:
+                count = cache.incr(key)
+            except ValueError:
+                # The counter expired or the cache doesn't store values, only the local limit is applied
+                return
+            if count <= self._capacity:
+                return
+            sleep(max((window + 1) * self._window - time(), 0))
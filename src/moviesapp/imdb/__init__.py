@@ -0,0 +1,5 @@
+"""IMDb datasets."""
+
+from .imdb import get_imdb_ratings, read_imdb_ratings
+
+__all__ = ["get_imdb_ratings", "read_imdb_ratings"]
@@ -0,0 +1,27 @@
+"""
+IMDb datasets.
+
+IMDb publishes daily dumps of its data at https://datasets.imdbws.com/.
+"""
+
+import gzip
+from collections.abc import Container, Iterator
+from decimal import Decimal
+
+
+def read_imdb_ratings(path: str) -> Iterator[tuple[str, Decimal]]:
+    """
+    Read IMDb ratings from a `title.ratings.tsv.gz` file.
+
+    The file is decompressed on the fly and yields (IMDb ID, rating) pairs.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        next(f, None)  # Skip the header
+        for line in f:
+            imdb_id, rating, _ = line.split("\t", 2)
+            yield imdb_id, Decimal(rating)
+
+
+def get_imdb_ratings(path: str, imdb_ids: Container[str]) -> dict[str, Decimal]:
+    """Get IMDb ratings from a `title.ratings.tsv.gz` file for the selected IMDb IDs only."""
+    return {imdb_id: rating for imdb_id, rating in read_imdb_ratings(path) if imdb_id in imdb_ids}
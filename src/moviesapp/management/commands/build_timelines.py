@@ -0,0 +1,47 @@
+"""Build timelines."""
+
+from typing import Any, Optional
+
+from django.core.management.base import CommandParser
+from django_tqdm import BaseCommand
+
+from moviesapp.models import TimelineEntry, User
+
+
+class Command(BaseCommand):
+    """Build timelines."""
+
+    help = """Build activity timelines of users from scratch.
+
+    If one argument is provided then only the timeline of the user with the selected user_id is built.
+    If no arguments are provided - timelines of all users are built.
+    """
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments."""
+        parser.add_argument("user_id", nargs="?", default=None, type=int)
+        parser.add_argument(
+            "-c",
+            action="store_true",
+            dest="cold_only",
+            default=False,
+            help="Build only timelines which are not built yet",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:  # pylint: disable=unused-argument
+        """Execute command."""
+        user_id: Optional[int] = options["user_id"]
+        cold_only: bool = options["cold_only"]
+        users = User.objects.order_by("pk")
+        if user_id is not None:
+            users = users.filter(pk=user_id)
+            if not users:
+                self.error(f"There is no user with ID {user_id}", fatal=True)
+        if cold_only:
+            users = users.filter(timeline_built=False)
+
+        tqdm = self.tqdm(total=users.count(), unit="user")
+        for user in users:
+            tqdm.set_description(str(user))
+            TimelineEntry.build(user)
+            tqdm.update()
@@ -0,0 +1,49 @@
+"""Check user stats."""
+
+from typing import Any
+
+from django.core.management.base import CommandParser
+from django_tqdm import BaseCommand
+
+from moviesapp.models import User, UserStats
+
+
+class Command(BaseCommand):
+    """Check user stats."""
+
+    help = """Check that user stats snapshots match a full recompute.
+
+    Mismatches are reported. Use "-r" to rebuild the snapshots of the users with mismatches.
+    """
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments."""
+        parser.add_argument(
+            "-r",
+            action="store_true",
+            dest="rebuild",
+            default=False,
+            help="Rebuild snapshots of the users with mismatches",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:  # pylint: disable=unused-argument
+        """Execute command."""
+        rebuild: bool = options["rebuild"]
+        users = User.objects.filter(stats__year=UserStats.ALL_TIME).order_by("pk")
+        tqdm = self.tqdm(total=users.count(), unit="user")
+        users_with_mismatches = 0
+        for user in users:
+            tqdm.set_description(str(user))
+            inconsistencies = UserStats.get_inconsistencies(user)
+            if inconsistencies:
+                users_with_mismatches += 1
+                for inconsistency in inconsistencies:
+                    tqdm.error(f"{user} - {inconsistency}")
+                if rebuild:
+                    UserStats.rebuild(user)
+                    tqdm.info(f"{user} - stats rebuilt")
+            tqdm.update()
+        if users_with_mismatches:
+            self.error(f"Stats of {users_with_mismatches} user(s) don't match")
+        else:
+            self.info("Stats of all users match")
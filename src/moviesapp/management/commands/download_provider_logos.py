@@ -1,41 +1,175 @@
 """Download provider logos."""
 
-from os.path import exists, join
-from typing import Any
+import json
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from math import ceil, sqrt
+from os import utime
+from os.path import exists, getmtime, join
+from typing import Any, Optional
 from urllib.parse import urljoin
 
-import wget
 from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import CommandParser
 from django_tqdm import BaseCommand
+from PIL import Image
 
+from moviesapp.http_client import get_session, log_http_pool_stats
 from moviesapp.tmdb import get_tmdb_providers
+from moviesapp.tmdb.types import TmdbProvider
+from moviesapp.types import ProviderLogoSpriteItem
+
+# ETags of the downloaded logos are kept in the cache because the logo directory is public
+ETAGS_CACHE_KEY = "provider-logo-etags"
+SPRITE_FILE_NAME = "sprite.jpg"
+# Positions of the logos in the sprite image
+SPRITE_MAP_FILE_NAME = "sprite.json"
 
 
 class Command(BaseCommand):
     """Download provider logos."""
 
-    help = "Download provider logos"
+    help = """Download provider logos.
+
+    Logos are downloaded concurrently. Existing logos are downloaded again only if they are changed on TMDB.
+    Optionally all logos are packed into one sprite image with a JSON map of the logo positions.
+    """
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments."""
+        parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            default=8,
+            dest="workers",
+            help="Number of threads used to download logos. It should not exceed HTTP_POOL_MAXSIZE",
+        )
+        parser.add_argument(
+            "-s",
+            "--sprite",
+            action="store_true",
+            dest="sprite",
+            default=False,
+            help=f"Build {SPRITE_FILE_NAME} and {SPRITE_MAP_FILE_NAME} from all logos",
+        )
 
     @staticmethod
     def _get_extension(logo_path: str) -> str:
         """Get extension."""
         return logo_path.split(".")[-1]
 
-    def _download_logo(self, logo_path: str, provider_id: int) -> None:
-        """Download logo."""
-        extension = self._get_extension(logo_path)
-        file_path = join(settings.PROVIDERS_IMG_DIR, f"{provider_id}.{extension}")
-        if not exists(file_path):
-            path = urljoin(settings.TMDB_PROVIDER_BASE_URL, logo_path[1:])
-            wget.download(path, file_path)
+    def _get_file_path(self, provider: TmdbProvider) -> str:
+        """Get the path of a logo file."""
+        extension = self._get_extension(provider["logo_path"])
+        return join(settings.PROVIDERS_IMG_DIR, f"{provider['provider_id']}.{extension}")
+
+    @staticmethod
+    def _load_etags() -> dict[str, str]:
+        """Load ETags of the downloaded logos."""
+        etags: dict[str, str] = cache.get(ETAGS_CACHE_KEY, {})
+        return etags
+
+    @staticmethod
+    def _save_etags(etags: dict[str, str]) -> None:
+        """Save ETags of the downloaded logos."""
+        cache.set(ETAGS_CACHE_KEY, etags, None)
+
+    @staticmethod
+    def _download_logo(logo_path: str, file_path: str, etag: Optional[str]) -> tuple[bool, Optional[str]]:
+        """
+        Download a logo if it is changed.
+
+        Return if the logo was downloaded and its ETag.
+        """
+        headers = {}
+        if exists(file_path):
+            headers["If-Modified-Since"] = formatdate(getmtime(file_path), usegmt=True)
+            if etag:
+                headers["If-None-Match"] = etag
+        path = urljoin(settings.TMDB_PROVIDER_BASE_URL, logo_path[1:])
+        response = get_session().get(path, headers=headers, timeout=settings.REQUESTS_TIMEOUT)
+        if response.status_code == 304:
+            return False, etag
+        response.raise_for_status()
+        with open(file_path, "wb") as f:
+            f.write(response.content)
+        last_modified = response.headers.get("Last-Modified")
+        if last_modified:
+            # The modification time of the file is used in the next conditional request
+            timestamp = parsedate_to_datetime(last_modified).timestamp()
+            utime(file_path, (timestamp, timestamp))
+        return True, response.headers.get("ETag")
+
+    def _download_logos(
+        self, providers: list[TmdbProvider], etags: dict[str, str], workers: int
+    ) -> Iterator[tuple[TmdbProvider, bool, Optional[str]]]:
+        """
+        Download logos in a thread pool.
+
+        Results are yielded in the order of `providers`.
+        """
+
+        def download(provider: TmdbProvider) -> tuple[TmdbProvider, bool, Optional[str]]:
+            file_path = self._get_file_path(provider)
+            etag = etags.get(str(provider["provider_id"]))
+            downloaded, new_etag = self._download_logo(provider["logo_path"], file_path, etag)
+            return provider, downloaded, new_etag
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            yield from executor.map(download, providers)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def _build_sprite(file_paths: dict[int, str]) -> None:
+        """Pack logos into one sprite image and save the positions of the logos to a JSON file."""
+        size = settings.PROVIDER_LOGO_SPRITE_SIZE
+        columns = ceil(sqrt(len(file_paths)))
+        rows = ceil(len(file_paths) / columns)
+        sprite_map: dict[str, ProviderLogoSpriteItem] = {}
+        with Image.new("RGB", (columns * size, rows * size), "white") as sprite:
+            for i, (provider_id, file_path) in enumerate(sorted(file_paths.items())):
+                x = i % columns * size
+                y = i // columns * size
+                with Image.open(file_path) as image:
+                    logo = image.convert("RGBA")
+                logo.thumbnail((size, size))
+                # Transparent logos are put on the white background
+                sprite.paste(logo, (x, y), logo)
+                sprite_map[str(provider_id)] = {"x": x, "y": y, "width": logo.width, "height": logo.height}
+            sprite.save(join(settings.PROVIDERS_IMG_DIR, SPRITE_FILE_NAME))
+        with open(join(settings.PROVIDERS_IMG_DIR, SPRITE_MAP_FILE_NAME), "w", encoding="utf-8") as f:
+            json.dump(sprite_map, f, indent=2)
 
     def handle(self, *args: Any, **options: Any) -> None:  # pylint: disable=unused-argument
         """Execute command."""
-        providers = get_tmdb_providers()
+        workers: int = options["workers"]
+        sprite: bool = options["sprite"]
+        if workers < 1:
+            self.error("Number of workers must be positive", fatal=True)
+        providers = [provider for provider in get_tmdb_providers() if provider.get("logo_path")]
+        etags = self._load_etags()
+        downloaded_number = 0
         tqdm = self.tqdm(total=len(providers), unit="provider")
-        for provider in providers:
-            logo_path = provider["logo_path"]
-            provider_id = provider["provider_id"]
-            self._download_logo(logo_path, provider_id)
-            tqdm.set_description(provider["provider_name"])
-            tqdm.update()
+        try:
+            for provider, downloaded, etag in self._download_logos(providers, etags, workers):
+                provider_id = str(provider["provider_id"])
+                if etag:
+                    etags[provider_id] = etag
+                else:
+                    etags.pop(provider_id, None)
+                downloaded_number += downloaded
+                tqdm.set_description(provider["provider_name"])
+                tqdm.update()
+        finally:
+            # Keep the ETags of the logos which were downloaded before a failure
+            self._save_etags(etags)
+        self.info(f"{downloaded_number} logos downloaded, {len(providers) - downloaded_number} logos are not changed")
+        if sprite and providers:
+            self._build_sprite({provider["provider_id"]: self._get_file_path(provider) for provider in providers})
+            self.info(f"Sprite with {len(providers)} logos is built")
+        log_http_pool_stats()
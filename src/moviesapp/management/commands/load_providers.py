@@ -2,23 +2,64 @@
 
 from typing import Any
 
+from django.core.management.base import CommandParser
+from django.db import connection
+from django.db.models import Exists, OuterRef
 from django_tqdm import BaseCommand
 
-from moviesapp.models import Provider
+from moviesapp.models import Provider, ProviderRecord
 from moviesapp.tmdb import get_tmdb_providers
 
 
 class Command(BaseCommand):
     """Load providers."""
 
-    help = "Load providers"
+    help = """Load providers.
+
+    Providers are added or renamed with a single query.
+    Providers which are no longer on TMDB are kept unless they are pruned.
+    """
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments."""
+        parser.add_argument(
+            "-p",
+            "--prune",
+            action="store_true",
+            dest="prune",
+            default=False,
+            help="Remove providers which are no longer on TMDB and are not used in watch data",
+        )
 
     def handle(self, *args: Any, **options: Any) -> None:  # pylint: disable=unused-argument
         """Execute command."""
-        providers = get_tmdb_providers()
-        tqdm = self.tqdm(total=len(providers), unit="provider")
-        for provider in providers:
-            provider_name = provider["provider_name"]
-            Provider(id=provider["provider_id"], name=provider_name).save()
-            tqdm.set_description(provider_name)
-            tqdm.update()
+        prune: bool = options["prune"]
+        # Duplicated providers can't be upserted with one query
+        provider_names = {provider["provider_id"]: provider["provider_name"] for provider in get_tmdb_providers()}
+        existing_provider_names = dict(Provider.objects.values_list("pk", "name"))
+        added = provider_names.keys() - existing_provider_names.keys()
+        renamed = [
+            provider_id
+            for provider_id, name in provider_names.items()
+            if provider_id in existing_provider_names and existing_provider_names[provider_id] != name
+        ]
+        removed = existing_provider_names.keys() - provider_names.keys()
+        # MySQL doesn't support a conflict target, SQLite and PostgreSQL require it
+        unique_fields = ["id"] if connection.features.supports_update_conflicts_with_target else None
+        Provider.objects.bulk_create(
+            [Provider(id=provider_id, name=name) for provider_id, name in provider_names.items()],
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=["name"],
+        )
+        self.info(
+            f"{len(added)} providers added, {len(renamed)} providers renamed, "
+            f"{len(removed)} providers are no longer on TMDB"
+        )
+        if prune and removed:
+            pruned, _ = (
+                Provider.objects.filter(pk__in=removed)
+                .exclude(Exists(ProviderRecord.objects.filter(provider=OuterRef("pk"))))
+                .delete()
+            )
+            self.info(f"{pruned} providers pruned")
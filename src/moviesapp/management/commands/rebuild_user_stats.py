@@ -0,0 +1,37 @@
+"""Rebuild user stats."""
+
+from typing import Any, Optional
+
+from django.core.management.base import CommandParser
+from django_tqdm import BaseCommand
+
+from moviesapp.models import User, UserStats
+
+
+class Command(BaseCommand):
+    """Rebuild user stats."""
+
+    help = """Rebuild user stats snapshots from scratch.
+
+    If one argument is provided then only the snapshots of the user with the selected user_id are rebuilt.
+    If no arguments are provided - snapshots of all users are rebuilt.
+    """
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments."""
+        parser.add_argument("user_id", nargs="?", default=None, type=int)
+
+    def handle(self, *args: Any, **options: Any) -> None:  # pylint: disable=unused-argument
+        """Execute command."""
+        user_id: Optional[int] = options["user_id"]
+        users = User.objects.order_by("pk")
+        if user_id is not None:
+            users = users.filter(pk=user_id)
+            if not users:
+                self.error(f"There is no user with ID {user_id}", fatal=True)
+
+        tqdm = self.tqdm(total=users.count(), unit="user")
+        for user in users:
+            tqdm.set_description(str(user))
+            UserStats.rebuild(user)
+            tqdm.update()
@@ -1,28 +1,74 @@
 """Remove unused movies."""
 
+from collections import Counter
 from typing import Any
 
+from django.conf import settings
+from django.core.management.base import CommandParser
+from django.db import transaction
+from django.db.models import Exists, OuterRef, QuerySet
 from django_tqdm import BaseCommand
 
-from moviesapp.models import Movie
+from moviesapp.models import Movie, Record
 
 
 class Command(BaseCommand):
     """Remove unused movies."""
 
-    help = "Remove unused movies"
+    help = """Remove unused movies.
+
+    Movies which are not in any list are removed in batches of REMOVE_UNUSED_MOVIES_BATCH_SIZE.
+    """
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments."""
+        parser.add_argument(
+            "-d",
+            "--dry-run",
+            action="store_true",
+            dest="dry_run",
+            default=False,
+            help="Only print the number of unused movies",
+        )
+
+    @staticmethod
+    def _get_unused_movies() -> QuerySet[Movie]:
+        """Get movies without records."""
+        return Movie.objects.filter(~Exists(Record.objects.filter(movie=OuterRef("pk"))))
+
+    def _remove_unused_movies(self, total: int) -> Counter[str]:
+        """
+        Remove unused movies in batches.
+
+        Return the number of removed objects by model.
+        """
+        removed: Counter[str] = Counter()
+        tqdm = self.tqdm(total=total, unit="movie")
+        last_movie_id = 0
+        while True:
+            with transaction.atomic():
+                movie_ids = list(
+                    self._get_unused_movies()
+                    .filter(pk__gt=last_movie_id)
+                    .values_list("pk", flat=True)[: settings.REMOVE_UNUSED_MOVIES_BATCH_SIZE]
+                )
+                if not movie_ids:
+                    break
+                # Movies are checked again in case they were added to a list in the meantime
+                _, removed_by_model = self._get_unused_movies().filter(pk__in=movie_ids).delete()
+            removed.update(removed_by_model)
+            last_movie_id = movie_ids[-1]
+            tqdm.update(len(movie_ids))
+        return removed
 
     def handle(self, *args: Any, **options: Any) -> None:  # pylint: disable=unused-argument
         """Execute command."""
-        movies = Movie.objects.all()  # pylint: disable=duplicate-code
-        tqdm = self.tqdm(total=movies.count(), unit="movie")  # pylint: disable=duplicate-code
-        last_movie = movies.last()  # pylint: disable=duplicate-code
-        if last_movie:
-            for movie in movies:
-                movie_info = movie.cli_string(last_movie.pk)
-                tqdm.set_description(movie_info)
-                if not movie.records.exists():
-                    movie.delete()
-                    message = f"{movie} removed"
-                    tqdm.info(message)
-                tqdm.update()
+        dry_run: bool = options["dry_run"]
+        total = self._get_unused_movies().count()
+        if dry_run:
+            self.info(f"{total} unused movies found")
+            return
+        removed = self._remove_unused_movies(total)
+        self.info(f"{removed.pop(Movie._meta.label, 0)} unused movies removed")  # pylint: disable=protected-access
+        for label, count in sorted(removed.items()):
+            self.info(f"{count} related objects removed ({label})")
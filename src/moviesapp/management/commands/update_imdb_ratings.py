@@ -1,34 +1,174 @@
 """Update the IMDb ratings."""
 
-from typing import Any
+from decimal import Decimal
+from time import monotonic
+from typing import Any, Optional
 
-from django_tqdm import BaseCommand
+from django.conf import settings
+from django.core.management.base import CommandParser
+from django.db.models import QuerySet
 
-from moviesapp.models import Movie
+from moviesapp.http_client import log_http_pool_stats
+from moviesapp.imdb import get_imdb_ratings
+from moviesapp.management.refresh import RefreshCommand
+from moviesapp.models import JobState, Movie
 from moviesapp.omdb import get_omdb_movie_data
 
 
-class Command(BaseCommand):
+class Command(RefreshCommand):
     """Update the IMDb ratings."""
 
-    help = "Update the IMDb ratings"
+    help = """Update the IMDb ratings.
 
-    def handle(self, *args: Any, **options: Any) -> None:  # pylint: disable=unused-argument
-        """Execute command."""
-        movies = Movie.objects.all()
+    Ratings are loaded from OMDb unless a path to the IMDb `title.ratings.tsv.gz` dataset is provided.
+    The progress is saved periodically, so an unfinished run can be resumed.
+    In the distributed mode ratings are loaded from OMDb in chunks by Celery workers.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Init."""
+        super().__init__(*args, **kwargs)
+        self._movies_to_update: list[Movie] = []
+        self._updated = 0
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add arguments."""
+        parser.add_argument(
+            "-f",
+            "--file",
+            dest="ratings_file",
+            default=None,
+            help="Path to the IMDb title.ratings.tsv.gz file (https://datasets.imdbws.com/)",
+        )
+        parser.add_argument(
+            "-r",
+            "--resume",
+            action="store_true",
+            dest="resume",
+            default=False,
+            help="Resume the last unfinished run from its checkpoint",
+        )
+        self.add_distributed_argument(parser)
+
+    def _update_rating(self, movie: Movie, new_rating: Decimal) -> None:
+        """Update the rating of a movie. Changes are saved in batches."""
+        movie.imdb_rating = new_rating
+        self._movies_to_update.append(movie)
+        if len(self._movies_to_update) >= settings.IMDB_RATINGS_BATCH_SIZE:
+            self._save_ratings()
+
+    def _save_ratings(self) -> None:
+        """Save pending rating changes."""
+        if self._movies_to_update:
+            self._updated += Movie.objects.bulk_update(self._movies_to_update, ["imdb_rating"])
+            self._movies_to_update = []
+
+    def _add_processed_movie(self, job_state: Optional[JobState], movie: Movie, updated: bool) -> None:
+        """Add a processed movie and save the checkpoint if it is due."""
+        self.add_processed_movie(job_state, movie.pk, updated)
+        if job_state is not None and job_state.is_checkpoint_due:
+            # Ratings of all processed movies have to be saved before the checkpoint
+            self._save_ratings()
+            job_state.save_checkpoint()
+
+    @staticmethod
+    def _get_movies(job_state: Optional[JobState], movie_ids: Optional[list[int]]) -> QuerySet[Movie]:
+        """Get movies which were not processed by the run yet or movies of a chunk of a distributed run."""
+        movies = Movie.objects.order_by("pk")
+        if movie_ids is not None:
+            return movies.filter(pk__in=movie_ids)
+        if job_state is not None and job_state.last_movie_id is not None:
+            movies = movies.filter(pk__gt=job_state.last_movie_id)
+        return movies
+
+    def get_movies_for_rolling_refresh(self, movies: QuerySet[Movie]) -> QuerySet[Movie]:
+        """Get movies of a shard which need to be refreshed. Movies without an IMDb ID are skipped."""
+        return movies.exclude(imdb_id="").order_by("pk")
+
+    def _update_ratings_from_file(self, path: str, movies: QuerySet[Movie], job_state: Optional[JobState]) -> int:
+        """
+        Update the IMDb ratings from the IMDb ratings dataset.
+
+        Return the number of processed movies.
+        """
+        movies = movies.exclude(imdb_id="")
+        ratings = get_imdb_ratings(path, set(movies.values_list("imdb_id", flat=True)))
+        processed = 0
+        movies = movies.only("pk", "imdb_id", "imdb_rating")
+        for movie in movies.iterator(chunk_size=settings.IMDB_RATINGS_BATCH_SIZE):
+            new_rating = ratings.get(movie.imdb_id)
+            updated = False
+            if new_rating is not None and movie.imdb_rating != new_rating:
+                self._update_rating(movie, new_rating)
+                updated = True
+            processed += 1
+            self._add_processed_movie(job_state, movie, updated)
+        return processed
+
+    def _update_ratings_from_omdb(self, movies: QuerySet[Movie], job_state: Optional[JobState]) -> tuple[int, int]:
+        """
+        Update the IMDb ratings from OMDb.
+
+        Return the number of processed movies and the number of API calls.
+        """
+        movies = movies.only("pk", "title", "imdb_id", "imdb_rating")
         tqdm = self.tqdm(total=movies.count(), unit="movie")
         last_movie = movies.last()
+        processed = 0
+        api_calls = 0
         if last_movie:
-            for movie in movies:
+            for movie in movies.iterator(chunk_size=settings.IMDB_RATINGS_BATCH_SIZE):
                 movie_info = movie.cli_string(last_movie.pk)
                 tqdm.set_description(movie_info)
+                api_calls += 1
                 movie_data = get_omdb_movie_data(movie.imdb_id)
                 new_rating = movie_data["imdb_rating"]
+                updated = False
                 if new_rating:
                     old_rating = str(movie.imdb_rating)
                     if old_rating != new_rating:
-                        movie.imdb_rating = new_rating
-                        movie.save()
+                        self._update_rating(movie, Decimal(new_rating))
+                        updated = True
                         message = f"{movie} - rating updated"
                         tqdm.info(message)
+                processed += 1
+                self._add_processed_movie(job_state, movie, updated)
                 tqdm.update()
+        log_http_pool_stats()
+        return processed, api_calls
+
+    def handle(self, *args: Any, **options: Any) -> None:  # pylint: disable=unused-argument
+        """Execute command."""
+        ratings_file: Optional[str] = options["ratings_file"]
+        resume: bool = options["resume"]
+        distributed: bool = options["distributed"]
+        movie_ids: Optional[list[int]] = options.get("movie_ids")
+        if distributed and (resume or ratings_file):
+            self.error("A distributed run can't be resumed or use a ratings file", fatal=True)
+        job_state = None
+        if movie_ids is None:
+            job_state = JobState.start_run(JobState.UPDATE_IMDB_RATINGS, resume)
+            if job_state.last_movie_id is not None:
+                self.info(f"Resuming run {job_state.run_id} after movie ID {job_state.last_movie_id}")
+        movies = self._get_movies(job_state, movie_ids)
+        if distributed and job_state is not None:
+            self.run_distributed(list(movies.values_list("pk", flat=True)), job_state)
+            return
+        start_time = monotonic()
+        api_calls = 0
+        try:
+            if ratings_file:
+                processed = self._update_ratings_from_file(ratings_file, movies, job_state)
+            else:
+                processed, api_calls = self._update_ratings_from_omdb(movies, job_state)
+        finally:
+            # Keep the ratings which were loaded before a failure
+            self._save_ratings()
+        if job_state is not None:
+            job_state.finish_run()
+        duration = monotonic() - start_time
+        rate = processed / duration if duration else 0
+        self.info(
+            f"{processed} movies processed in {duration:.1f}s ({rate:.1f} movies/s), "
+            f"{api_calls} API calls, {self._updated} ratings updated"
+        )
@@ -1,24 +1,41 @@
 """Update movie data."""
 
-from typing import Any, Optional
+from datetime import datetime
+from typing import Any, Optional, cast
 
+from django.conf import settings
 from django.core.management.base import CommandParser
-from django_tqdm import BaseCommand
+from django.db.models import QuerySet
+from django.utils.timezone import localdate, now
 
-from moviesapp.models import Movie
-from moviesapp.tmdb import TmdbNoImdbIdError
-from moviesapp.utils import load_movie_data
+from moviesapp.http_client import log_http_pool_stats
+from moviesapp.management.refresh import RefreshCommand
+from moviesapp.models import JobState, Movie, UserStats
+from moviesapp.tmdb import TmdbNoImdbIdError, get_changed_movie_ids
+from moviesapp.utils import get_movie_data_hash, load_movie_data
 
 
-class Command(BaseCommand):
+class Command(RefreshCommand):
     """Update movie data."""
 
     help = """Update all movie data except for IMDb ratings and watch data.
 
     If one argument is used then the movie with the selected movie_id is updated.
     If no arguments are used - all movies get updated.
+    In the incremental mode only movies changed on TMDB since the last successful run get updated.
+    When all movies get updated the progress is saved periodically, so an unfinished run can be resumed.
+    In the distributed mode movies are updated in chunks by Celery workers.
+    Movies are saved in batches and only if the loaded data is changed.
     """
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Init."""
+        super().__init__(*args, **kwargs)
+        self._movies_to_update: list[Movie] = []
+        self._fields_to_update: set[str] = set()
+        # Movies with changes in data which affects user stats
+        self._stats_movie_ids: list[int] = []
+
     def add_arguments(self, parser: CommandParser) -> None:
         """Add arguments."""
         parser.add_argument("movie_id", nargs="?", default=None, type=int)
@@ -29,23 +46,81 @@ class Command(BaseCommand):
             default=False,
             help="Start running the script from provided movie id",
         )
+        parser.add_argument(
+            "-i",
+            "--incremental",
+            action="store_true",
+            dest="incremental",
+            default=False,
+            help="Update only movies changed on TMDB since the last successful run",
+        )
+        parser.add_argument(
+            "-r",
+            "--resume",
+            action="store_true",
+            dest="resume",
+            default=False,
+            help="Resume the last unfinished run from its checkpoint",
+        )
+        self.add_distributed_argument(parser)
 
-    @staticmethod
-    def _update_movie_data(movie: Movie) -> bool:
-        """Return if the movie was updated or not."""
+    def _update_movie_data(self, movie: Movie) -> bool:
+        """
+        Update movie data. Changes are saved in batches.
+
+        Return if the movie was updated or not.
+        """
         movie_data = load_movie_data(movie.tmdb_id)
-        # We create a new dict here to avoid modifying the original dict which would result in an error
-        movie_data_to_update = dict(movie_data)
-        # Use filter here to be able to use "update" functionality.
-        # We will always have only one movie.
-        movies = Movie.objects.filter(pk=movie.pk)
-        movie_initial_data = movies.values()[0]
-        movie_data_to_update.pop("imdb_rating")
-        movies.update(**movie_data_to_update)
-        movie_updated_data = Movie.objects.filter(pk=movie.pk).values()[0]
-        updated: bool = movie_initial_data != movie_updated_data
+        # IMDb ratings are updated with the "update_imdb_ratings" command
+        movie_data_to_update: dict[str, Any] = {
+            field: value for field, value in movie_data.items() if field != "imdb_rating"
+        }
+        data_hash = get_movie_data_hash(movie_data_to_update)
+        if movie.data_hash == data_hash and movie.data_status == Movie.DATA_LOADED:
+            return False
+        updated = any(getattr(movie, field) != value for field, value in movie_data_to_update.items())
+        if any(
+            field in movie_data_to_update and getattr(movie, field) != movie_data_to_update[field]
+            for field in Movie.STATS_FIELDS
+        ):
+            self._stats_movie_ids.append(movie.pk)
+        for field, value in movie_data_to_update.items():
+            setattr(movie, field, value)
+        movie.data_status = Movie.DATA_LOADED
+        # The hash is saved even if the data is not changed to skip the movie next time
+        movie.data_hash = data_hash
+        self._movies_to_update.append(movie)
+        self._fields_to_update.update(movie_data_to_update)
+        if len(self._movies_to_update) >= settings.MOVIE_DATA_UPDATE_BATCH_SIZE:
+            self._save_movies()
         return updated
 
+    def _save_movies(self) -> None:
+        """Save pending movie data changes."""
+        if self._movies_to_update:
+            fields = [*sorted(self._fields_to_update), "data_status", "data_hash"]
+            Movie.objects.bulk_update(self._movies_to_update, fields)
+            self._movies_to_update = []
+            self._fields_to_update = set()
+        if self._stats_movie_ids:
+            UserStats.invalidate_for_movies(self._stats_movie_ids)
+            self._stats_movie_ids = []
+
+    @staticmethod
+    def _get_changed_movies(watermark: datetime, run_start_time: datetime) -> QuerySet[Movie]:
+        """
+        Get movies changed on TMDB between the last successful run and the current run.
+
+        The changes feed can contain many thousands of IDs, so they are looked up in chunks.
+        """
+        changed_tmdb_ids = list(get_changed_movie_ids(localdate(watermark), localdate(run_start_time)))
+        chunk_size = settings.TMDB_CHANGES_LOOKUP_CHUNK_SIZE
+        movie_ids: list[int] = []
+        for i in range(0, len(changed_tmdb_ids), chunk_size):
+            tmdb_ids = changed_tmdb_ids[i : i + chunk_size]
+            movie_ids += Movie.objects.filter(tmdb_id__in=tmdb_ids).values_list("pk", flat=True)
+        return Movie.objects.filter(pk__in=movie_ids)
+
     def handle(
         self,
         *args: Any,
@@ -54,29 +129,79 @@ class Command(BaseCommand):
         """Execute command."""
         movie_id: Optional[int] = options["movie_id"]
         start_from_id: bool = options["start_from_id"]
-        movies = Movie.filter(movie_id, start_from_id)
+        incremental: bool = options["incremental"]
+        resume: bool = options["resume"]
+        distributed: bool = options["distributed"]
+        movie_ids: Optional[list[int]] = options.get("movie_ids")
+        if movie_id is not None and (incremental or resume or distributed):
+            self.error("Movie ID can't be used in the incremental, resume or distributed mode", fatal=True)
+        if distributed and resume:
+            self.error("A distributed run can't be resumed", fatal=True)
+        job_state = None
+        if movie_ids is not None:
+            # A chunk of a distributed run
+            movies = Movie.objects.filter(pk__in=movie_ids)
+        else:
+            watermark = JobState.get_watermark(JobState.UPDATE_MOVIE_DATA)
+            if incremental and watermark is None:
+                self.error("There is no successful run yet. Run a full update first.", fatal=True)
+            run_start_time = now()
+            if movie_id is None:
+                job_name = JobState.UPDATE_MOVIE_DATA_INCREMENTAL if incremental else JobState.UPDATE_MOVIE_DATA
+                job_state = JobState.start_run(job_name, resume)
+                run_start_time = cast(datetime, job_state.run_start_time)
+            if incremental:
+                movies = self._get_changed_movies(cast(datetime, watermark), run_start_time)
+            else:
+                movies = Movie.filter(movie_id, start_from_id)
+            if job_state is not None and job_state.last_movie_id is not None:
+                self.info(f"Resuming run {job_state.run_id} after movie ID {job_state.last_movie_id}")
+                movies = movies.filter(pk__gt=job_state.last_movie_id)
+            if distributed and job_state is not None:
+                movie_ids = list(movies.values_list("pk", flat=True))
+                if incremental:
+                    self.info(f"{len(movie_ids)} movies changed on TMDB")
+                self.run_distributed(movie_ids, job_state, watermark_name=JobState.UPDATE_MOVIE_DATA)
+                return
         movies_total = movies.count()
         # We don't want a progress bar if we just have one movie to process
         disable = movies_total == 1
-        if not movies:  # In case movie_id is too high and we don't get any movies
+        if incremental:
+            self.info(f"{movies_total} movies changed on TMDB")
+        elif movie_id is not None and not movies:  # In case movie_id is too high and we don't get any movies
             if start_from_id:
                 self.error(f"There are no movies with IDs > {movie_id}", fatal=True)
             else:
-                # Assume we have at least one movie in the DB
                 self.error(f"There is no movie with ID {movie_id}", fatal=True)
 
         tqdm = self.tqdm(total=movies_total, unit="movies", disable=disable)
         last_movie = movies.last()  # pylint: disable=duplicate-code
-        if last_movie:
-            for movie in movies:
-                movie_info = movie.cli_string(last_movie.pk)
-                tqdm.set_description(movie_info)
-                try:
-                    result = self._update_movie_data(movie)
-                except TmdbNoImdbIdError:
-                    tqdm.error(f'"{movie.title_with_id}" is not found in IMDb')
-                else:
-                    updated = result
-                    if updated:
-                        tqdm.info(f'"{movie}" is updated')
-                tqdm.update()
+        try:
+            if last_movie:
+                for movie in movies:
+                    movie_info = movie.cli_string(last_movie.pk)
+                    tqdm.set_description(movie_info)
+                    updated = False
+                    error = False
+                    try:
+                        updated = self._update_movie_data(movie)
+                    except TmdbNoImdbIdError:
+                        tqdm.error(f'"{movie.title_with_id}" is not found in IMDb')
+                        error = True
+                    else:
+                        if updated:
+                            tqdm.info(f'"{movie}" is updated')
+                    self.add_processed_movie(job_state, movie.pk, updated, error)
+                    if job_state is not None and job_state.is_checkpoint_due:
+                        # Movies processed before the checkpoint have to be saved first
+                        self._save_movies()
+                        job_state.save_checkpoint()
+                    tqdm.update()
+        finally:
+            # Keep the movies which were loaded before a failure
+            self._save_movies()
+        if job_state is not None:
+            job_state.finish_run()
+            # Changes made on TMDB during the run are picked up by the next run
+            JobState.set_watermark(JobState.UPDATE_MOVIE_DATA, cast(datetime, job_state.run_start_time))
+        log_http_pool_stats()
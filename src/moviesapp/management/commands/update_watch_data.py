@@ -1,22 +1,26 @@
 """Update watch data."""
 
 import sys
-from collections.abc import Mapping
-from typing import Any, Optional, cast
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Optional, Union
 
 from django.conf import settings
 from django.core.management.base import CommandParser
-from django.db.models import QuerySet
-from django_tqdm import BaseCommand
+from django.db.models import Case, Count, F, Q, QuerySet, Value, When
+from django.utils.timezone import now
 from sentry_sdk import capture_exception
 
 from moviesapp.exceptions import ProviderNotFoundError
-from moviesapp.models import List, Movie, ProviderRecord, Record
+from moviesapp.http_client import SharedRateLimiter, log_http_pool_stats
+from moviesapp.management.refresh import RefreshCommand
+from moviesapp.models import JobState, List, Movie, Provider, ProviderRecord, Record
 from moviesapp.tmdb import get_watch_data
-from moviesapp.types import ProviderRecordType, WatchDataRecord
+from moviesapp.types import WatchDataRecord
 
 
-class Command(BaseCommand):
+class Command(RefreshCommand):
     """Update watch data."""
 
     help = """Update watch data.
@@ -25,8 +29,21 @@ class Command(BaseCommand):
     It is updated even if the movie does not need to be updated (was recently updated).
 
     If no arguments are provided - all movies get updated.
+
+    Movies are updated in the order of priority: a weighted sum of users from supported countries and records
+    in "To Watch" lists, weeks since the last update and the recency of the release.
+    Use the budget option to limit the number of TMDB requests per run.
+
+    When no movie_id is provided the progress is saved periodically, so an unfinished run can be resumed.
+    Movies updated by the unfinished run are skipped.
+    In the distributed mode movies are updated in chunks by Celery workers.
     """
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Init."""
+        super().__init__(*args, **kwargs)
+        self._provider_ids: set[int] = set()
+
     def add_arguments(self, parser: CommandParser) -> None:
         """Add arguments."""
         parser.add_argument("movie_id", nargs="?", default=None, type=int)
@@ -37,9 +54,38 @@ class Command(BaseCommand):
             default=False,
             help=(
                 'Update only minimal watch data. It updates only watch data for movies that are in "To Watch" '
-                "list, is released, and only if a movie is in a list of a user who's country is supported"
+                "list, is released, was not updated recently, and only if a movie is in a list of a user who's "
+                "country is supported"
             ),
         )
+        parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            default=1,
+            dest="workers",
+            help=(
+                "Number of threads used to load watch data from TMDB. "
+                "Requests are limited to TMDB_MAX_REQUESTS_PER_SECOND in total"
+            ),
+        )
+        parser.add_argument(
+            "-b",
+            "--budget",
+            type=int,
+            default=None,
+            dest="budget",
+            help="Max number of movies (TMDB requests) to update. Movies with the highest priority are updated first",
+        )
+        parser.add_argument(
+            "-r",
+            "--resume",
+            action="store_true",
+            dest="resume",
+            default=False,
+            help="Resume the last unfinished run from its checkpoint",
+        )
+        self.add_distributed_argument(parser)
 
     @staticmethod
     def _filter_out_movies_not_requiring_update(movies: list[Movie]) -> None:
@@ -53,116 +99,210 @@ class Command(BaseCommand):
                 movies.remove(movie)
 
     @staticmethod
-    def _get_provider_record_type(provider_record: Mapping[str, object]) -> ProviderRecordType:
-        """Convert a queryset row into a typed provider record."""
-        return {
-            "id": cast(int, provider_record["id"]),
-            "provider_id": cast(int, provider_record["provider_id"]),
-            "country": cast(str, provider_record["country"]),
-        }
+    def _get_movies_for_minimal_update() -> QuerySet[Movie]:
+        """
+        Get movies for the minimal update.
 
-    @staticmethod
-    def _get_watch_data_record(provider_record: ProviderRecordType) -> WatchDataRecord:
-        """Convert a provider record into its watch data shape."""
-        return {
-            "provider_id": provider_record["provider_id"],
-            "country": provider_record["country"],
-        }
+        These are released movies in "To Watch" lists of users whose country is supported,
+        which were not updated recently. They are selected with a single query.
+        """
+        movie_ids = Record.objects.filter(
+            list_id=List.TO_WATCH, user__country__in=settings.PROVIDERS_SUPPORTED_COUNTRIES
+        ).values("movie_id")
+        updated_recently_date = now() - timedelta(days=settings.WATCH_DATA_UPDATE_MIN_DAYS)
+        return (
+            Movie.objects.filter(pk__in=movie_ids, release_date__lte=date.today())
+            .exclude(watch_data_update_date__gte=updated_recently_date)
+            .only("pk", "title", "tmdb_id", "watch_data_update_date")
+        )
 
     @staticmethod
-    def _remove_no_longer_available_provider_records(
-        existing_provider_records: list[ProviderRecordType],
-        watch_data: list[WatchDataRecord],
-    ) -> bool:
-        """Remove provider records that are no longer available."""
-        removed = False
-        for provider_record in existing_provider_records:
-            provider_record_id = provider_record["id"]
-            watch_data_record = Command._get_watch_data_record(provider_record)
-            # Remove the record if it's no longer available.
-            if watch_data_record not in watch_data:
-                ProviderRecord.objects.get(pk=provider_record_id).delete()
-                removed = True
-        return removed
+    def _get_age(field: str, since: Union[date, datetime], period: timedelta, max_periods: int) -> Case:
+        """Get the number of whole periods passed since the date in `field`, up to `max_periods` (also if empty)."""
+        return Case(
+            *(When(**{f"{field}__gt": since - period * (i + 1)}, then=Value(i)) for i in range(max_periods)),
+            default=Value(max_periods),
+        )
+
+    def _order_by_priority(self, movies: QuerySet[Movie]) -> QuerySet[Movie]:
+        """
+        Order movies by priority, the movies with the highest priority go first.
+
+        The priority is a weighted sum of the demand (users and records in "To Watch" lists), weeks since the last
+        update and the recency of the release, so a popular movie with old watch data can go before a more popular
+        movie updated recently.
+        """
+        to_watch = Q(records__list_id=List.TO_WATCH)
+        recent_release_months = settings.WATCH_DATA_PRIORITY_RECENT_RELEASE_MONTHS
+        stale_weeks = self._get_age(
+            "watch_data_update_date", now(), timedelta(weeks=1), settings.WATCH_DATA_PRIORITY_MAX_STALE_WEEKS
+        )
+        release_age_months = self._get_age("release_date", date.today(), timedelta(days=30), recent_release_months)
+        return (
+            movies.annotate(
+                to_watch_users=Count(
+                    "records",
+                    filter=to_watch & Q(records__user__country__in=settings.PROVIDERS_SUPPORTED_COUNTRIES),
+                    distinct=True,
+                ),
+                to_watch_records=Count("records", filter=to_watch, distinct=True),
+            )
+            .alias(
+                priority=F("to_watch_users") * settings.WATCH_DATA_PRIORITY_SUPPORTED_USER_WEIGHT
+                + F("to_watch_records") * settings.WATCH_DATA_PRIORITY_RECORD_WEIGHT
+                + stale_weeks * settings.WATCH_DATA_PRIORITY_STALE_WEEK_WEIGHT
+                + (recent_release_months - release_age_months)
+                * settings.WATCH_DATA_PRIORITY_RECENT_RELEASE_MONTH_WEIGHT
+            )
+            .order_by(F("priority").desc(), "pk")
+        )
+
+    def get_movies_for_rolling_refresh(self, movies: QuerySet[Movie]) -> QuerySet[Movie]:
+        """Get released movies of a shard which were not updated recently, ordered by priority."""
+        updated_recently_date = now() - timedelta(days=settings.WATCH_DATA_UPDATE_MIN_DAYS)
+        return self._order_by_priority(
+            movies.filter(release_date__lte=date.today()).exclude(watch_data_update_date__gte=updated_recently_date)
+        )
 
     @staticmethod
-    def _filter_out_already_existing_provider_records(
-        existing_provider_records: list[WatchDataRecord],
-        watch_data: list[WatchDataRecord],
-    ) -> None:
+    def _load_watch_data(movies: list[Movie], workers: int) -> Iterator[tuple[Movie, list[WatchDataRecord]]]:
         """
-        Filter out already existing provider records.
+        Load watch data of movies from TMDB.
 
-        Remove already existing provider records from `watch_data`.
+        With several workers the data is loaded in a thread pool. Results are yielded in the order of `movies`
+        so that the database is only accessed from the main thread.
+        The rate of requests is limited for all runs together, including chunks processed by Celery workers.
         """
-        for provider_record in existing_provider_records:
-            if provider_record in watch_data:
-                # Don't create a record if it already exists.
-                watch_data.remove(provider_record)
+        rate_limiter = SharedRateLimiter("tmdb", settings.TMDB_MAX_REQUESTS_PER_SECOND)
+
+        def load(movie: Movie) -> tuple[Movie, list[WatchDataRecord]]:
+            rate_limiter.wait()
+            return movie, get_watch_data(movie.tmdb_id)
+
+        if workers == 1:
+            yield from map(load, movies)
+            return
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            yield from executor.map(load, movies)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def _update_watch_data(self, movie: Movie, watch_data: list[WatchDataRecord]) -> bool:
+        """
+        Update provider records of a movie.
+
+        Return True if provider records were changed.
+        """
+        existing_provider_records = {
+            (provider_id, country): provider_record_id
+            for provider_record_id, provider_id, country in movie.provider_records.values_list(
+                "id", "provider_id", "country"
+            )
+        }
+        available_provider_records = {(record["provider_id"], record["country"]) for record in watch_data}
+        no_longer_available_ids = [
+            provider_record_id
+            for key, provider_record_id in existing_provider_records.items()
+            if key not in available_provider_records
+        ]
+        if no_longer_available_ids:
+            ProviderRecord.objects.filter(pk__in=no_longer_available_ids).delete()
+        new_provider_records = [
+            WatchDataRecord(provider_id=provider_id, country=country)
+            for provider_id, country in available_provider_records - existing_provider_records.keys()
+        ]
+        try:  # pylint: disable=duplicate-code
+            movie.save_watch_data(new_provider_records, self._provider_ids)
+        except ProviderNotFoundError as e:
+            if settings.DEBUG:
+                raise
+            capture_exception(e)
+        return bool(new_provider_records or no_longer_available_ids)
 
     def handle(self, *args: Any, **options: Any) -> None:  # pylint: disable=unused-argument
         """Execute command."""
         movie_id: Optional[int] = options["movie_id"]
         minimal: bool = options["minimal"]
-        if minimal and not movie_id:
-            records: QuerySet[Record] = Record.objects.filter(
-                list_id=List.TO_WATCH, movie__release_date__isnull=False, user__country__isnull=False
-            )
-            movies = list(
-                set(
-                    record.movie for record in records if record.movie.is_released and record.user.is_country_supported
-                )
-            )
+        workers: int = options["workers"]
+        budget: Optional[int] = options["budget"]
+        resume: bool = options["resume"]
+        distributed: bool = options["distributed"]
+        movie_ids: Optional[list[int]] = options.get("movie_ids")
+        if workers < 1:
+            self.error("Number of workers must be positive", fatal=True)
+        if budget is not None and budget < 1:
+            self.error("Budget must be positive", fatal=True)
+        if movie_id is not None and (resume or distributed):
+            self.error("Movie ID can't be used in the resume or distributed mode", fatal=True)
+        if distributed and resume:
+            self.error("A distributed run can't be resumed", fatal=True)
+        job_state = None
+        if movie_ids is not None:
+            # A chunk of a distributed run
+            movies = list(Movie.objects.filter(pk__in=movie_ids))
+            if not movies:
+                return
         else:
-            if movie_id is not None:
-                try:
-                    Movie.objects.get(pk=movie_id)
-                except Movie.DoesNotExist:
-                    self.error(f"There is no movie with ID {movie_id}", fatal=True)
-            movies = list(Movie.filter(movie_id, release_date__isnull=False))
+            if movie_id is None:
+                job_name = JobState.UPDATE_WATCH_DATA_MINIMAL if minimal else JobState.UPDATE_WATCH_DATA
+                job_state = JobState.start_run(job_name, resume)
+            if minimal and not movie_id:
+                movies_to_update = self._get_movies_for_minimal_update()
+            else:
+                if movie_id is not None:
+                    try:
+                        Movie.objects.get(pk=movie_id)
+                    except Movie.DoesNotExist:
+                        self.error(f"There is no movie with ID {movie_id}", fatal=True)
+                movies_to_update = Movie.filter(movie_id, release_date__isnull=False)
+            if job_state is not None and job_state.processed:
+                self.info(f"Resuming run {job_state.run_id}, {job_state.processed} movies were processed")
+                # Movies are not processed in the order of IDs, so movies updated by the run are skipped
+                movies_to_update = movies_to_update.exclude(watch_data_update_date__gte=job_state.run_start_time)
+            movies = list(self._order_by_priority(movies_to_update))
             # If movie_id is provided, we force update the movie
             # (we ignore if the movie needs an update or not).
-            if movie_id is None:
+            if not minimal and movie_id is None:
                 self._filter_out_movies_not_requiring_update(movies)
 
+            if budget is not None and len(movies) > budget:
+                self.info(f"{len(movies) - budget} movies with the lowest priority are left for the next runs")
+                movies = movies[:budget]
+            if distributed and job_state is not None:
+                # Chunks are enqueued in the order of priority
+                self.run_distributed([movie.pk for movie in movies], job_state, {"workers": workers})
+                return
+            if not movies:
+                self.info("No movies to update")
+                if job_state is not None:
+                    job_state.finish_run()
+                sys.exit()
         movies_total = len(movies)
         # We don't want a progress bar if we just have one movie to process
         disable = movies_total == 1
-        if not movies:
-            self.info("No movies to update")
-            sys.exit()
 
+        # Providers are checked against the provider catalog in memory
+        self._provider_ids = set(Provider.objects.values_list("pk", flat=True))
         tqdm = self.tqdm(total=movies_total, unit="movie", disable=disable)
         last_movie = Movie.last()
         if last_movie:
-            for movie in movies:
+            for movie, watch_data in self._load_watch_data(movies, workers):
                 movie_info = movie.cli_string(last_movie.pk)
                 tqdm.set_description(movie_info)
-                watch_data = get_watch_data(movie.tmdb_id)
-                if not watch_data:
-                    tqdm.error(f"No watch data obtained for {movie}. Skipping.")
-                    tqdm.update()
-                    continue
-
-                existing_provider_records = [
-                    self._get_provider_record_type(provider_record)
-                    for provider_record in movie.provider_records.all().values("id", "provider_id", "country")
-                ]
-                removed = self._remove_no_longer_available_provider_records(
-                    existing_provider_records,
-                    watch_data,
-                )
-                self._filter_out_already_existing_provider_records(
-                    [self._get_watch_data_record(provider_record) for provider_record in existing_provider_records],
-                    watch_data,
-                )
-                try:  # pylint: disable=duplicate-code
-                    movie.save_watch_data(watch_data)
-                except ProviderNotFoundError as e:
-                    if settings.DEBUG:
-                        raise
-                    capture_exception(e)
-                if watch_data or removed:
-                    message = f"{movie} - watch data updated"
-                    tqdm.info(message)
+                updated = False
+                if watch_data:
+                    updated = self._update_watch_data(movie, watch_data)
+                    if updated:
+                        message = f"{movie} - watch data updated"
+                        tqdm.info(message)
+                else:
+                    # Movies without providers are normal, so they are not counted as errors
+                    tqdm.info(f"No watch data obtained for {movie}. Skipping.")
+                self.add_processed_movie(job_state, movie.pk, updated)
+                if job_state is not None and job_state.is_checkpoint_due:
+                    job_state.save_checkpoint()
                 tqdm.update()
+        if job_state is not None:
+            job_state.finish_run()
+        log_http_pool_stats()
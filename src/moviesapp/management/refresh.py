@@ -0,0 +1,93 @@
+"""Base command for the commands which refresh movie data."""
+
+from typing import Any, Optional
+
+from celery import chord
+from django.conf import settings
+from django.core.management.base import CommandParser
+from django.db.models import QuerySet
+from django_tqdm import BaseCommand
+
+from moviesapp.models import JobState, Movie
+from moviesapp.tasks import fail_distributed_refresh_task, finish_distributed_refresh_task, refresh_movies_task
+from moviesapp.types import RefreshResult, UntypedObject
+
+
+class RefreshCommand(BaseCommand):
+    """
+    Base class of the commands which refresh movie data.
+
+    In the distributed mode movies are split into chunks which are processed by Celery workers.
+    A chunk is processed by the same command with the `movie_ids` option.
+    The rolling refresh (see `ROLLING_REFRESH`) processes a shard of movies the same way.
+    """
+
+    # IDs of movies in a chunk. The option is passed by the Celery task only.
+    stealth_options = ("movie_ids",)
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Init."""
+        super().__init__(*args, **kwargs)
+        self.result: RefreshResult = {"processed": 0, "updated": 0, "errors": 0}
+
+    @property
+    def command_name(self) -> str:
+        """Get the name of the command."""
+        return self.__module__.rsplit(".", maxsplit=1)[-1]
+
+    @staticmethod
+    def add_distributed_argument(parser: CommandParser) -> None:
+        """Add the distributed mode argument."""
+        parser.add_argument(
+            "-d",
+            "--distributed",
+            action="store_true",
+            dest="distributed",
+            default=False,
+            help="Split movies into chunks of REFRESH_CHUNK_SIZE and process them on Celery workers",
+        )
+
+    def get_movies_for_rolling_refresh(self, movies: QuerySet[Movie]) -> QuerySet[Movie]:
+        """
+        Get movies of a shard which need to be refreshed.
+
+        Movies are ordered by priority, movies beyond the cap of a tick are left for the next cycle.
+        """
+        return movies.order_by("pk")
+
+    def add_processed_movie(
+        self, job_state: Optional[JobState], movie_id: int, updated: bool, error: bool = False
+    ) -> None:
+        """Add a processed movie to the result and to the job state if the run is tracked."""
+        self.result["processed"] += 1
+        self.result["updated"] += updated
+        self.result["errors"] += error
+        if job_state is not None:
+            job_state.add_processed_movie(movie_id, updated, error)
+
+    def run_distributed(
+        self,
+        movie_ids: list[int],
+        job_state: JobState,
+        options: Optional[UntypedObject] = None,
+        watermark_name: Optional[str] = None,
+    ) -> None:
+        """
+        Enqueue chunks of movies as a Celery group.
+
+        The job state is finished by the chord callback when all chunks are processed
+        or by its errback if any chunk fails.
+        If `watermark_name` is provided the watermark is set to the start time of the run.
+        """
+        chunk_size = settings.REFRESH_CHUNK_SIZE
+        chunks = [movie_ids[i : i + chunk_size] for i in range(0, len(movie_ids), chunk_size)]
+        if not chunks:
+            job_state.finish_run()
+            self.info("No movies to update")
+            return
+        run_id = str(job_state.run_id)
+        callback = finish_distributed_refresh_task.s(job_state.name, run_id, watermark_name)
+        # The callback is not called if any chunk fails
+        callback.link_error(fail_distributed_refresh_task.s(job_state.name, run_id))
+        chord(refresh_movies_task.s(self.command_name, chunk, options or {}) for chunk in chunks)(callback)
+        self.info(f"{len(movie_ids)} movies are split into {len(chunks)} chunks and enqueued")
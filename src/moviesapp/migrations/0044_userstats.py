@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("moviesapp", "0043_alter_user_options"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserStats",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("year", models.PositiveSmallIntegerField(default=0)),
+                ("movies_watched", models.PositiveIntegerField(default=0)),
+                ("movies_to_watch", models.PositiveIntegerField(default=0)),
+                ("runtime", models.PositiveIntegerField(default=0)),
+                ("ratings", models.JSONField(default=dict)),
+                ("months", models.JSONField(default=dict)),
+                ("release_years", models.JSONField(default=dict)),
+                ("quality", models.JSONField(default=dict)),
+                ("genres", models.JSONField(default=dict)),
+                ("directors", models.JSONField(default=dict)),
+                ("actors", models.JSONField(default=dict)),
+                ("update_date", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="stats", to=settings.AUTH_USER_MODEL
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "user stats",
+                "constraints": [models.UniqueConstraint(fields=("user", "year"), name="unique_user_year_stats")],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("moviesapp", "0044_userstats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="timeline_built",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name="TimelineEntry",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateTimeField()),
+                (
+                    "action_record",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline_entries",
+                        to="moviesapp.actionrecord",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "timeline entries",
+                "indexes": [
+                    models.Index(fields=["owner", "-date", "-action_record"], name="timeline_entry_owner_date")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("owner", "action_record"), name="unique_owner_action_record_timeline_entry"
+                    )
+                ],
+            },
+        ),
+    ]
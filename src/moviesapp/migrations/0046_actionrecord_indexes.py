@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("moviesapp", "0045_timelineentry"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="actionrecord",
+            index=models.Index(fields=["date", "id"], name="action_record_date_id"),
+        ),
+        migrations.AddIndex(
+            model_name="actionrecord",
+            index=models.Index(fields=["user", "date"], name="action_record_user_date"),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("moviesapp", "0046_actionrecord_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="movie",
+            name="data_status",
+            field=models.CharField(
+                choices=[("loading", "Loading"), ("loaded", "Loaded"), ("failed", "Failed")],
+                default="loaded",
+                max_length=7,
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("moviesapp", "0047_movie_data_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobState",
+            fields=[
+                ("name", models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ("watermark", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
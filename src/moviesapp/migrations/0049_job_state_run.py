@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("moviesapp", "0048_job_state"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobstate",
+            name="checkpoint_date",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="jobstate",
+            name="errors",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="jobstate",
+            name="last_movie_id",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="jobstate",
+            name="processed",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="jobstate",
+            name="run_finish_time",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="jobstate",
+            name="run_id",
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="jobstate",
+            name="run_start_time",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="jobstate",
+            name="updated",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("moviesapp", "0049_job_state_run"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="movie",
+            name="data_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("moviesapp", "0050_movie_data_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobstate",
+            name="run_error",
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("moviesapp", "0051_job_state_run_error"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobstate",
+            name="last_shard",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
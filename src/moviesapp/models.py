@@ -1,13 +1,16 @@
 """Models."""
 
 import json
-from datetime import datetime, time, timedelta
-from typing import Any, Optional
+import uuid
+from collections.abc import Container, Iterable
+from datetime import datetime, time, timedelta, tzinfo
+from typing import Any, Optional, cast
 from urllib.parse import urljoin
 
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser, AnonymousUser
+from django.db import transaction
 from django.db.models import (
     CASCADE,
     BooleanField,
@@ -15,18 +18,22 @@ from django.db.models import (
     DateField,
     DateTimeField,
     DecimalField,
+    F,
     ForeignKey,
     ImageField,
+    Index,
     JSONField,
     Manager,
     Model,
     PositiveIntegerField,
     PositiveSmallIntegerField,
+    Q,
     QuerySet,
     TextField,
     TimeField,
     UniqueConstraint,
     URLField,
+    UUIDField,
 )
 from django.http import HttpRequest
 from django.utils import formats
@@ -36,8 +43,17 @@ from django_countries.fields import CountryField
 from timezone_field import TimeZoneField
 
 from .exceptions import ProviderNotFoundError
+from .stats import QUALITY_FIELDS, add_counters, get_empty_counters, get_local_date, get_record_counters
 from .tmdb import get_poster_url, get_tmdb_url
-from .types import TmdbTrailer, Trailer, TrailerSite, WatchDataRecord
+from .types import (
+    MovieStatsField,
+    RecordStatsData,
+    TmdbTrailer,
+    Trailer,
+    TrailerSite,
+    UserStatsCounters,
+    WatchDataRecord,
+)
 from .utils import is_movie_released
 
 
@@ -74,6 +90,8 @@ class User(AbstractUser, UserBase):
     loaded_initial_data = BooleanField(default=False)
     country = CountryField(verbose_name=_("Country"), null=True, blank=True)
     timezone = TimeZoneField(default=settings.TIME_ZONE)
+    # Whether the timeline of the user is built (see `TimelineEntry`)
+    timeline_built = BooleanField(default=False)
 
     class Meta:
         """Meta options for User model."""
@@ -86,6 +104,39 @@ class User(AbstractUser, UserBase):
             return self.username
         return self.get_full_name()
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save."""
+        with transaction.atomic():
+            saved_values = self._get_saved_values(kwargs.get("update_fields"))
+            super().save(*args, **kwargs)
+            if saved_values is None:
+                return
+            was_visible_in_feed = not saved_values["hidden"] and not saved_values["only_for_friends"]
+            if was_visible_in_feed != self.is_visible_in_feed:
+                # Keep the activity of the user in the timelines of their followers in sync with privacy settings
+                if self.is_visible_in_feed:
+                    followers = self.followers.filter(follower__timeline_built=True)
+                    TimelineEntry.add_user_actions(self, followers.values_list("follower_id", flat=True))
+                else:
+                    TimelineEntry.remove_user_actions(self)
+            if str(saved_values["timezone"]) != str(self.timezone):
+                # Records are counted by year in the time zone of the user. Snapshots are rebuilt on first use.
+                UserStats.objects.filter(user=self).delete()
+
+    def _get_saved_values(self, update_fields: Optional[Any]) -> Optional[dict[str, Any]]:
+        """
+        Get the values of the fields which affect the feed and the stats stored in the database.
+
+        None is returned if the user is not saved yet or none of these fields are going to be updated.
+        """
+        fields = ("hidden", "only_for_friends", "timezone")
+        if self._state.adding:
+            return None
+        if update_fields is not None and not set(fields) & set(update_fields):
+            return None
+        saved_values: Optional[dict[str, Any]] = User.objects.filter(pk=self.pk).values(*fields).first()
+        return saved_values
+
     def _get_movies_number(self, list_id: int) -> int:
         """Get movies number."""
         return self.get_records().filter(list_id=list_id).count()
@@ -105,6 +156,11 @@ class User(AbstractUser, UserBase):
         """Return True if country is supported."""
         return self.country in settings.PROVIDERS_SUPPORTED_COUNTRIES
 
+    @property
+    def is_visible_in_feed(self) -> bool:
+        """Return True if the activity of the user is shown in the feed of other users."""
+        return not self.hidden and not self.only_for_friends
+
 
 class UserAnonymous(AnonymousUser, UserBase):
     """Anonymous user class."""
@@ -136,6 +192,17 @@ class List(Model):
 class Movie(Model):
     """Movie."""
 
+    # Fields which affect user stats
+    STATS_FIELDS: tuple[MovieStatsField, ...] = ("runtime", "release_date", "genre", "director", "actors")
+    # Data statuses. A movie added by a user is created with TMDB basics and enriched in the background.
+    DATA_LOADING = "loading"
+    DATA_LOADED = "loaded"
+    DATA_FAILED = "failed"
+    DATA_STATUSES = (
+        (DATA_LOADING, "Loading"),
+        (DATA_LOADED, "Loaded"),
+        (DATA_FAILED, "Failed"),
+    )
     title = CharField(max_length=255)
     title_original = CharField(max_length=255)
     country = CharField(max_length=255, null=True, blank=True)
@@ -153,6 +220,9 @@ class Movie(Model):
     homepage = URLField(null=True, blank=True)
     trailers = JSONField(null=True, blank=True)
     watch_data_update_date = DateTimeField(null=True, blank=True)
+    data_status = CharField(max_length=7, choices=DATA_STATUSES, default=DATA_LOADED)
+    # Hash of the movie data loaded from TMDB and OMDb. It is used to skip updates which don't change anything.
+    data_hash = CharField(max_length=64, blank=True, default="")
 
     class Meta:
         """Meta."""
@@ -256,17 +326,35 @@ class Movie(Model):
             trailers.append(trailer)
         return trailers
 
-    def save_watch_data(self, watch_data: list[WatchDataRecord]) -> None:
-        """Save watch data for a movie."""
-        for provider_record in watch_data:
-            provider_id = provider_record["provider_id"]
-            try:
-                provider = Provider.objects.get(pk=provider_id)
-            except Provider.DoesNotExist as e:
-                raise ProviderNotFoundError(f"Provider ID - {provider_id}") from e
-            ProviderRecord.objects.create(provider=provider, movie=self, country=provider_record["country"])
+    def save_watch_data(
+        self, watch_data: list[WatchDataRecord], provider_ids: Optional[Container[int]] = None
+    ) -> None:
+        """
+        Save watch data for a movie.
+
+        `provider_ids` are IDs of all existing providers. They are loaded from the database if not provided.
+        Records of existing providers are saved even if some providers are not found.
+        """
+        if provider_ids is None:
+            provider_ids = set(
+                Provider.objects.filter(pk__in={record["provider_id"] for record in watch_data}).values_list(
+                    "pk", flat=True
+                )
+            )
+        provider_records = []
+        missing_provider_ids = []
+        for record in watch_data:
+            if record["provider_id"] in provider_ids:
+                provider_records.append(
+                    ProviderRecord(provider_id=record["provider_id"], movie=self, country=record["country"])
+                )
+            else:
+                missing_provider_ids.append(record["provider_id"])
+        ProviderRecord.objects.bulk_create(provider_records, ignore_conflicts=True)
+        if missing_provider_ids:
+            raise ProviderNotFoundError(f"Provider ID - {', '.join(map(str, missing_provider_ids))}")
         self.watch_data_update_date = now()
-        self.save()
+        self.save(update_fields=["watch_data_update_date"])
 
     @classmethod
     def filter(cls, movie_id: Optional[int], start_from_id: bool = False, **kwargs: Any) -> QuerySet["Movie"]:
@@ -338,19 +426,24 @@ class RecordQuerySet(QuerySet["Record"]):
     """Record query set."""
 
     def update(self, **kwargs: Any) -> int:
-        """Update records."""
-        ids = self.values_list("pk", flat=True)
-        rows = super().update(**kwargs)
-        # This is not optimized - we are saving the object twice.
-        # This is needed because we need to use the custom save method of the model.
-        for id_ in ids:
-            Record.objects.get(pk=id_).save()
-        return rows
+        """
+        Update records.
+
+        Records are saved one by one because we need to use the custom save method of the model.
+        """
+        records = list(self)
+        for record in records:
+            for field, value in kwargs.items():
+                setattr(record, field, value)
+            record.save()
+        return len(records)
 
 
 class Record(Model):
     """Record."""
 
+    # Fields which affect user stats
+    STATS_FIELDS = ("movie_id", "list_id", "date", "rating", *QUALITY_FIELDS.values())
     user = ForeignKey(User, CASCADE, related_name="records")
     movie = ForeignKey(Movie, CASCADE, related_name="records")
     list = ForeignKey(List, CASCADE)
@@ -385,7 +478,253 @@ class Record(Model):
             self.watched_in_full_hd = True
         if self.watched_in_full_hd:
             self.watched_in_hd = True
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            saved_stats_fields = self._get_saved_stats_fields()
+            super().save(*args, **kwargs)
+            self._update_user_stats(saved_stats_fields, self._get_stats_fields())
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        """Delete."""
+        with transaction.atomic():
+            saved_stats_fields = self._get_saved_stats_fields()
+            result = super().delete(*args, **kwargs)
+            self._update_user_stats(saved_stats_fields, None)
+        return result
+
+    def _get_stats_fields(self) -> dict[str, Any]:
+        """Get values of the stats fields."""
+        return {field: getattr(self, field) for field in self.STATS_FIELDS}
+
+    def _get_saved_stats_fields(self) -> Optional[dict[str, Any]]:
+        """
+        Get values of the stats fields as they are stored in the database.
+
+        The record is locked until the end of the transaction so that concurrent changes are not counted twice.
+        """
+        if self._state.adding:
+            return None
+        saved_stats_fields = Record.objects.select_for_update().filter(pk=self.pk).values(*self.STATS_FIELDS).first()
+        return cast(Optional[dict[str, Any]], saved_stats_fields)
+
+    def _get_stats_data(self, stats_fields: dict[str, Any], timezone: tzinfo) -> RecordStatsData:
+        """Get record stats data for the values of the stats fields."""
+        if stats_fields["movie_id"] == self.movie_id:
+            movie = self.movie
+        else:
+            movie = Movie.objects.get(pk=stats_fields["movie_id"])
+        return {
+            "list_id": stats_fields["list_id"],
+            "date": get_local_date(stats_fields["date"], timezone),
+            "rating": stats_fields["rating"],
+            "watched_in_theatre": stats_fields["watched_in_theatre"],
+            "watched_in_hd": stats_fields["watched_in_hd"],
+            "watched_in_full_hd": stats_fields["watched_in_full_hd"],
+            "watched_in_4k": stats_fields["watched_in_4k"],
+            "watched_extended": stats_fields["watched_extended"],
+            "watched_original": stats_fields["watched_original"],
+            "runtime": movie.runtime,
+            "release_date": movie.release_date,
+            "genre": movie.genre,
+            "director": movie.director,
+            "actors": movie.actors,
+        }
+
+    def _update_user_stats(
+        self, saved_stats_fields: Optional[dict[str, Any]], stats_fields: Optional[dict[str, Any]]
+    ) -> None:
+        """
+        Update user stats snapshots with the difference between the saved and the new values of the stats fields.
+
+        Snapshots are not created here. If the user doesn't have them yet, they are built on first use.
+        """
+        if saved_stats_fields == stats_fields:
+            return
+        # Stats updates of a user are serialized by locking the user
+        user = User.objects.select_for_update().get(pk=self.user_id)
+        snapshots = UserStats.get_snapshots(user)
+        if UserStats.ALL_TIME not in snapshots:
+            return
+
+        updated_years = set()
+        for fields, sign in ((saved_stats_fields, -1), (stats_fields, 1)):
+            if fields is None:
+                continue
+            record_data = self._get_stats_data(fields, user.timezone)
+            counters = get_record_counters(record_data, record_data["list_id"] == List.WATCHED)
+            for year in (UserStats.ALL_TIME, record_data["date"].year):
+                if year not in snapshots:
+                    snapshots[year] = UserStats(user=user, year=year)
+                snapshots[year].add_counters(counters, sign)
+                updated_years.add(year)
+        for year in updated_years:
+            snapshots[year].save()
+
+
+class UserStats(Model):
+    """
+    User stats snapshot.
+
+    Every user has a snapshot for all time and a snapshot for every year with records.
+    Snapshots are updated incrementally when records are saved or deleted.
+    """
+
+    ALL_TIME = 0
+    user = ForeignKey(User, CASCADE, related_name="stats")
+    year = PositiveSmallIntegerField(default=ALL_TIME)
+    movies_watched = PositiveIntegerField(default=0)
+    movies_to_watch = PositiveIntegerField(default=0)
+    # Runtime in seconds
+    runtime = PositiveIntegerField(default=0)
+    ratings = JSONField(default=dict)
+    months = JSONField(default=dict)
+    release_years = JSONField(default=dict)
+    quality = JSONField(default=dict)
+    genres = JSONField(default=dict)
+    directors = JSONField(default=dict)
+    actors = JSONField(default=dict)
+    update_date = DateTimeField(auto_now=True)
+
+    class Meta:
+        """Meta."""
+
+        constraints = [
+            UniqueConstraint(fields=("user", "year"), name="unique_user_year_stats"),
+        ]
+        verbose_name_plural = "user stats"
+
+    def __str__(self) -> str:
+        """Return string representation."""
+        year = self.year or "all time"
+        return f"{self.user} - {year}"
+
+    @property
+    def counters(self) -> UserStatsCounters:
+        """Get counters."""
+        return {
+            "movies_watched": self.movies_watched,
+            "movies_to_watch": self.movies_to_watch,
+            "runtime": self.runtime,
+            "ratings": self.ratings,
+            "months": self.months,
+            "release_years": self.release_years,
+            "quality": self.quality,
+            "genres": self.genres,
+            "directors": self.directors,
+            "actors": self.actors,
+        }
+
+    def set_counters(self, counters: UserStatsCounters) -> None:
+        """Set counters."""
+        self.movies_watched = counters["movies_watched"]
+        self.movies_to_watch = counters["movies_to_watch"]
+        self.runtime = counters["runtime"]
+        self.ratings = counters["ratings"]
+        self.months = counters["months"]
+        self.release_years = counters["release_years"]
+        self.quality = counters["quality"]
+        self.genres = counters["genres"]
+        self.directors = counters["directors"]
+        self.actors = counters["actors"]
+
+    def add_counters(self, counters: UserStatsCounters, sign: int = 1) -> None:
+        """
+        Add counters of a record.
+
+        Use `sign=-1` to subtract them.
+        """
+        snapshot_counters = self.counters
+        add_counters(snapshot_counters, counters, sign)
+        self.set_counters(snapshot_counters)
+
+    @classmethod
+    def get_snapshots(cls, user: User) -> dict[int, "UserStats"]:
+        """Get user stats snapshots by year."""
+        return {snapshot.year: snapshot for snapshot in cls.objects.filter(user=user)}
+
+    @classmethod
+    def get_for_user(cls, user: User) -> dict[int, "UserStats"]:
+        """
+        Get user stats snapshots by year.
+
+        Snapshots are built if the user doesn't have them yet.
+        """
+        snapshots = cls.get_snapshots(user)
+        if cls.ALL_TIME not in snapshots:
+            snapshots = cls.rebuild(user)
+        return snapshots
+
+    @classmethod
+    def calculate(cls, user: User) -> dict[int, UserStatsCounters]:
+        """Calculate user stats counters by year from scratch."""
+        records = user.get_records().values(
+            "list_id",
+            "date",
+            "rating",
+            *QUALITY_FIELDS.values(),
+            runtime=F("movie__runtime"),
+            release_date=F("movie__release_date"),
+            genre=F("movie__genre"),
+            director=F("movie__director"),
+            actors=F("movie__actors"),
+        )
+        counters_by_year = {cls.ALL_TIME: get_empty_counters()}
+        for record in records:
+            record_data = cast(RecordStatsData, record)
+            record_data["date"] = get_local_date(record_data["date"], user.timezone)
+            counters = get_record_counters(record_data, record_data["list_id"] == List.WATCHED)
+            for year in (cls.ALL_TIME, record_data["date"].year):
+                if year not in counters_by_year:
+                    counters_by_year[year] = get_empty_counters()
+                add_counters(counters_by_year[year], counters)
+        return counters_by_year
+
+    @classmethod
+    def rebuild(cls, user: User) -> dict[int, "UserStats"]:
+        """Rebuild user stats snapshots from scratch."""
+        with transaction.atomic():
+            # Lock the user so that records are not changed while snapshots are rebuilt
+            User.objects.select_for_update().filter(pk=user.pk).first()
+            counters_by_year = cls.calculate(user)
+            snapshots = [cls(user=user, year=year) for year in counters_by_year]
+            for snapshot in snapshots:
+                snapshot.set_counters(counters_by_year[snapshot.year])
+            cls.objects.filter(user=user).delete()
+            cls.objects.bulk_create(snapshots)  # type: ignore[arg-type]
+        return {snapshot.year: snapshot for snapshot in snapshots}
+
+    @classmethod
+    def get_inconsistencies(cls, user: User) -> list[str]:
+        """Compare user stats snapshots with a full recompute and return the list of mismatches."""
+        expected = cls.calculate(user)
+        actual = {year: snapshot.counters for year, snapshot in cls.get_snapshots(user).items()}
+        if cls.ALL_TIME not in actual:
+            # Snapshots are built on first use
+            return []
+
+        inconsistencies = []
+        for year in sorted(expected.keys() | actual.keys()):
+            expected_counters = expected.get(year, get_empty_counters())
+            actual_counters = actual.get(year, get_empty_counters())
+            for field, expected_value in expected_counters.items():
+                actual_value = actual_counters[field]  # type: ignore
+                if actual_value != expected_value:
+                    year_name = year or "all time"
+                    inconsistencies.append(f"{year_name} - {field}: {actual_value} != {expected_value}")
+        return inconsistencies
+
+    @classmethod
+    def invalidate_for_movie(cls, movie_id: int) -> None:
+        """
+        Remove user stats snapshots of users who have the movie in their lists.
+
+        It is used when movie data which affects stats is changed. Snapshots are rebuilt on first use.
+        """
+        cls.objects.filter(user__records__movie_id=movie_id).delete()
+
+    @classmethod
+    def invalidate_for_movies(cls, movie_ids: Iterable[int]) -> None:
+        """Remove user stats snapshots of users who have any of the movies in their lists."""
+        cls.objects.filter(user__records__movie_id__in=movie_ids).delete()
 
 
 class Action(Model):
@@ -413,10 +752,27 @@ class ActionRecord(Model):
     rating = PositiveSmallIntegerField(blank=True, null=True)
     date = DateTimeField(auto_now_add=True)
 
+    class Meta:
+        """Meta."""
+
+        indexes = [
+            # Keyset pagination of the feed
+            Index(fields=("date", "id"), name="action_record_date_id"),
+            Index(fields=("user", "date"), name="action_record_user_date"),
+        ]
+
     def __str__(self) -> str:
         """Return string representation."""
         return f"{self.user} - {self.movie.title} - {self.action.name}"
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """Save."""
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                TimelineEntry.fan_out(self)
+
 
 class Provider(Model):
     """Provider."""
@@ -459,12 +815,24 @@ class ProviderRecord(Model):
         return f"{self.movie.tmdb_url}watch?locale={self.country}"
 
 
+class FollowQuerySet(QuerySet["Follow"]):
+    """Follow query set."""
+
+    def delete(self) -> tuple[int, dict[str, int]]:
+        """Delete follow relationships and remove the activity of followed users from the followers' timelines."""
+        with transaction.atomic():
+            for follow in self:
+                TimelineEntry.remove_follow(follow)
+            return super().delete()
+
+
 class Follow(Model):
     """Follow relationship between users."""
 
     follower = ForeignKey(User, CASCADE, related_name="following")
     followed = ForeignKey(User, CASCADE, related_name="followers")
     date = DateTimeField(auto_now_add=True)
+    objects: Manager["Follow"] = FollowQuerySet.as_manager()
 
     class Meta:
         """Meta."""
@@ -483,4 +851,238 @@ class Follow(Model):
         # Prevent users from following themselves
         if self.follower == self.followed:
             raise ValueError("Users cannot follow themselves")
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                TimelineEntry.add_follow(self)
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        """Delete."""
+        with transaction.atomic():
+            TimelineEntry.remove_follow(self)
+            return super().delete(*args, **kwargs)
+
+
+class TimelineEntry(Model):
+    """
+    Timeline entry.
+
+    A timeline contains the activity of the users a user follows.
+    Entries are added when action records are created (fan-out on write), so the feed of a user is read from their
+    timeline instead of the whole action log.
+    Timelines are built with `TimelineEntry.build` in the background when a user follows somebody for the first time
+    or with the `build_timelines` command. Until then the feed of the user is loaded from the action log.
+    """
+
+    BATCH_SIZE = 1000
+    owner = ForeignKey(User, CASCADE, related_name="timeline_entries")
+    action_record = ForeignKey(ActionRecord, CASCADE, related_name="timeline_entries")
+    # Date of the action record, it is used for ordering
+    date = DateTimeField()
+
+    class Meta:
+        """Meta."""
+
+        constraints = [
+            UniqueConstraint(fields=("owner", "action_record"), name="unique_owner_action_record_timeline_entry"),
+        ]
+        indexes = [
+            Index(fields=("owner", "-date", "-action_record"), name="timeline_entry_owner_date"),
+        ]
+        verbose_name_plural = "timeline entries"
+
+    def __str__(self) -> str:
+        """Return string representation."""
+        return f"{self.owner} - {self.action_record_id}"
+
+    @staticmethod
+    def get_visible_action_records() -> QuerySet[ActionRecord]:
+        """Get action records which are shown in the feed of other users."""
+        return ActionRecord.objects.exclude(Q(user__hidden=True) | Q(user__only_for_friends=True))
+
+    @classmethod
+    def _add(cls, owner_ids: Iterable[int], action_records: QuerySet[ActionRecord]) -> None:
+        """Add action records to the timelines of the owners."""
+        owner_ids = list(owner_ids)
+        if not owner_ids:
+            return
+        entries = [
+            cls(owner_id=owner_id, action_record_id=action_record_id, date=date)
+            for action_record_id, date in action_records.values_list("pk", "date")
+            for owner_id in owner_ids
+        ]
+        cls.objects.bulk_create(entries, batch_size=cls.BATCH_SIZE, ignore_conflicts=True)  # type: ignore[arg-type]
+
+    @classmethod
+    def fan_out(cls, action_record: ActionRecord) -> None:
+        """Add a new action record to the built timelines of the followers of its user."""
+        if not action_record.user.is_visible_in_feed:
+            return
+        owner_ids = Follow.objects.filter(
+            followed_id=action_record.user_id, follower__timeline_built=True
+        ).values_list("follower_id", flat=True)
+        cls._add(owner_ids, ActionRecord.objects.filter(pk=action_record.pk))
+
+    @classmethod
+    def add_user_actions(cls, user: User, owner_ids: Iterable[int]) -> None:
+        """Add all action records of a user to the timelines of the owners."""
+        cls._add(owner_ids, ActionRecord.objects.filter(user=user))
+
+    @classmethod
+    def remove_user_actions(cls, user: User) -> None:
+        """Remove all action records of a user from all timelines."""
+        cls.objects.filter(action_record__user=user).delete()
+
+    @classmethod
+    def add_follow(cls, follow: Follow) -> None:
+        """Update the timeline of the follower after a new follow relationship is created."""
+        follower = follow.follower
+        if not follower.timeline_built:
+            # Timelines are built in the background. Until then the feed of the follower is loaded from the action log.
+            from .tasks import build_timeline_task  # pylint: disable=import-outside-toplevel
+
+            transaction.on_commit(lambda: build_timeline_task.delay(follower.pk))
+        elif follow.followed.is_visible_in_feed:
+            cls.add_user_actions(follow.followed, [follower.pk])
+
+    @classmethod
+    def remove_follow(cls, follow: Follow) -> None:
+        """Update the timeline of the follower before a follow relationship is deleted."""
+        cls.objects.filter(owner_id=follow.follower_id, action_record__user_id=follow.followed_id).delete()
+
+    @classmethod
+    def build(cls, user: User) -> None:
+        """Build the timeline of a user from scratch."""
+        with transaction.atomic():
+            # The flag is set first so that action records created while the timeline is built are fanned out to it
+            User.objects.filter(pk=user.pk).update(timeline_built=True)
+            cls.objects.filter(owner=user).delete()
+            cls._add([user.pk], cls.get_visible_action_records().filter(user__followers__follower=user))
+        user.timeline_built = True
+
+
+class JobState(Model):
+    """
+    State of a periodic job.
+
+    It is used to continue a job from where the last successful run stopped
+    and to resume an unfinished run from the last checkpoint.
+    """
+
+    UPDATE_MOVIE_DATA = "update_movie_data"
+    UPDATE_MOVIE_DATA_INCREMENTAL = "update_movie_data_incremental"
+    UPDATE_WATCH_DATA = "update_watch_data"
+    UPDATE_WATCH_DATA_MINIMAL = "update_watch_data_minimal"
+    UPDATE_IMDB_RATINGS = "update_imdb_ratings"
+    name = CharField(max_length=255, primary_key=True)
+    # Start time of the last successful run
+    watermark = DateTimeField(null=True, blank=True)
+    run_id = UUIDField(null=True, blank=True)
+    run_start_time = DateTimeField(null=True, blank=True)
+    # It is empty while the run is not finished
+    run_finish_time = DateTimeField(null=True, blank=True)
+    # ID of the last processed movie
+    last_movie_id = PositiveIntegerField(null=True, blank=True)
+    processed = PositiveIntegerField(default=0)
+    updated = PositiveIntegerField(default=0)
+    errors = PositiveIntegerField(default=0)
+    checkpoint_date = DateTimeField(null=True, blank=True)
+    # Error of the last run if it failed
+    run_error = TextField(blank=True)
+    # Last shard processed by a rolling refresh
+    last_shard = PositiveIntegerField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        """Return string representation."""
+        return str(self.name)
+
+    @classmethod
+    def get_watermark(cls, name: str) -> Optional[datetime]:
+        """Get the start time of the last successful run of a job."""
+        return cls.objects.filter(name=name).values_list("watermark", flat=True).first()
+
+    @classmethod
+    def set_watermark(cls, name: str, watermark: datetime) -> None:
+        """Set the start time of the last successful run of a job."""
+        cls.objects.update_or_create(name=name, defaults={"watermark": watermark})
+
+    @classmethod
+    def get_next_shard(cls, name: str, shards: int) -> int:
+        """
+        Get the next shard of a rolling refresh and save it as the last processed shard.
+
+        The shard is claimed before it is processed, so a failing shard doesn't block the cycle.
+        """
+        with transaction.atomic():
+            job_state, _ = cls.objects.select_for_update().get_or_create(name=name)
+            shard = 0 if job_state.last_shard is None else (job_state.last_shard + 1) % shards
+            job_state.last_shard = shard
+            job_state.save(update_fields=["last_shard"])
+        return shard
+
+    @classmethod
+    def start_run(cls, name: str, resume: bool = False) -> "JobState":
+        """
+        Start a run of a job.
+
+        If `resume` is True and the last run is not finished, the last run is continued from its checkpoint.
+        """
+        job_state, _ = cls.objects.get_or_create(name=name)
+        if resume and job_state.is_run_unfinished:
+            return job_state
+        job_state.run_id = uuid.uuid4()
+        job_state.run_start_time = now()
+        job_state.run_finish_time = None
+        job_state.last_movie_id = None
+        job_state.processed = 0
+        job_state.updated = 0
+        job_state.errors = 0
+        job_state.run_error = ""
+        job_state.save_checkpoint()
+        return job_state
+
+    @property
+    def is_run_unfinished(self) -> bool:
+        """Return True if the last run was started but not finished."""
+        return self.run_id is not None and self.run_finish_time is None
+
+    @property
+    def is_checkpoint_due(self) -> bool:
+        """Return True if the checkpoint needs to be saved."""
+        return self.processed % settings.JOB_CHECKPOINT_INTERVAL == 0
+
+    def add_processed_movie(self, movie_id: int, updated: bool = False, error: bool = False) -> None:
+        """Add a processed movie to the run counters. Changes are saved with the next checkpoint."""
+        self.last_movie_id = movie_id
+        self.processed += 1
+        self.updated += updated
+        self.errors += error
+
+    def save_checkpoint(self) -> None:
+        """Save the checkpoint."""
+        self.checkpoint_date = now()
+        # The watermark is saved separately with `set_watermark`
+        self.save(
+            update_fields=[
+                "run_id",
+                "run_start_time",
+                "run_finish_time",
+                "last_movie_id",
+                "processed",
+                "updated",
+                "errors",
+                "checkpoint_date",
+                "run_error",
+            ]
+        )
+
+    def finish_run(self) -> None:
+        """Finish the run."""
+        self.run_finish_time = now()
+        self.save_checkpoint()
+
+    def fail_run(self, error: str) -> None:
+        """Finish the run with an error. The watermark is not changed."""
+        self.run_error = error
+        self.finish_run()
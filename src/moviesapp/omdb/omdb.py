@@ -3,11 +3,11 @@
 from collections.abc import Mapping
 from typing import cast
 
-import requests
 from django.conf import settings
 from requests.exceptions import RequestException
 from sentry_sdk import capture_exception
 
+from ..http_client import get_session
 from ..types import OmdbMovieProcessed
 from .exceptions import OmdbError, OmdbLimitReachedError, OmdbRequestError
 from .types import OmdbMovie, OmdbMoviePreprocessed, OmdbMoviePreprocessedKey
@@ -56,7 +56,7 @@ def get_omdb_movie_data(imdb_id: str) -> OmdbMovieProcessed:
     """Get movie data from OMDB."""
     try:
         params = {"apikey": settings.OMDB_KEY, "i": imdb_id}
-        response = requests.get(settings.OMDB_BASE_URL, params=params, timeout=settings.REQUESTS_TIMEOUT)
+        response = get_session().get(settings.OMDB_BASE_URL, params=params, timeout=settings.REQUESTS_TIMEOUT)
     except RequestException as e:
         if settings.DEBUG:
             raise
@@ -0,0 +1,133 @@
+"""User stats."""
+
+from datetime import datetime, time, tzinfo
+from typing import Dict, Optional
+
+from django.utils.timezone import get_default_timezone, is_naive, localtime, make_aware
+
+from .types import CommaSeparatedField, QualityField, RecordStatsData, UserStatsCounterField, UserStatsCounters
+
+QUALITY_FIELDS: Dict[str, QualityField] = {
+    "theatre": "watched_in_theatre",
+    "hd": "watched_in_hd",
+    "fullHd": "watched_in_full_hd",
+    "fourK": "watched_in_4k",
+    "extended": "watched_extended",
+    "original": "watched_original",
+}
+COMMA_SEPARATED_FIELDS: Dict[UserStatsCounterField, CommaSeparatedField] = {
+    "genres": "genre",
+    "directors": "director",
+    "actors": "actors",
+}
+COUNTER_FIELDS: tuple[UserStatsCounterField, ...] = (
+    "ratings",
+    "months",
+    "release_years",
+    "quality",
+    "genres",
+    "directors",
+    "actors",
+)
+
+
+def get_empty_counters() -> UserStatsCounters:
+    """Get empty user stats counters."""
+    return {
+        "movies_watched": 0,
+        "movies_to_watch": 0,
+        "runtime": 0,
+        "ratings": {},
+        "months": {},
+        "release_years": {},
+        "quality": {},
+        "genres": {},
+        "directors": {},
+        "actors": {},
+    }
+
+
+def get_runtime_seconds(runtime: Optional[time]) -> int:
+    """Get runtime in seconds."""
+    if runtime:
+        return runtime.hour * 3600 + runtime.minute * 60 + runtime.second
+    return 0
+
+
+def get_local_date(date: datetime, timezone: tzinfo) -> datetime:
+    """Get a record date in the time zone of the user."""
+    if is_naive(date):
+        # Naive dates are saved in the default time zone
+        date = make_aware(date, get_default_timezone())
+    return localtime(date, timezone)
+
+
+def split_comma_separated_value(value: Optional[str]) -> list[str]:
+    """Split a comma-separated value into items."""
+    if not value:
+        return []
+    items = [item.strip() for item in value.split(",")]
+    return [item for item in items if item]
+
+
+def _increment(counts: Dict[str, int], key: str, value: int = 1) -> None:
+    """
+    Increment a counter.
+
+    Keys with zero count are removed to keep the counters compact.
+    """
+    count = counts.get(key, 0) + value
+    if count > 0:
+        counts[key] = count
+    else:
+        counts.pop(key, None)
+
+
+def get_record_counters(record: RecordStatsData, watched: bool) -> UserStatsCounters:
+    """
+    Get the contribution of a record to user stats counters.
+
+    `record["date"]` is expected to be in the user's time zone.
+    """
+    counters = get_empty_counters()
+    if not watched:
+        counters["movies_to_watch"] = 1
+        return counters
+
+    counters["movies_watched"] = 1
+    counters["runtime"] = get_runtime_seconds(record["runtime"])
+    if record["rating"] > 0:
+        _increment(counters["ratings"], str(record["rating"]))
+    _increment(counters["months"], str(record["date"].month))
+    if record["release_date"] is not None:
+        _increment(counters["release_years"], str(record["release_date"].year))
+    for name, field in QUALITY_FIELDS.items():
+        if record[field]:
+            _increment(counters["quality"], name)
+    for counter_field, comma_separated_field in COMMA_SEPARATED_FIELDS.items():
+        for item in split_comma_separated_value(record[comma_separated_field]):
+            _increment(counters[counter_field], item)
+    return counters
+
+
+def add_counters(counters: UserStatsCounters, other: UserStatsCounters, sign: int = 1) -> None:
+    """
+    Add `other` counters to `counters`.
+
+    Use `sign=-1` to subtract them.
+    """
+    counters["movies_watched"] = max(counters["movies_watched"] + sign * other["movies_watched"], 0)
+    counters["movies_to_watch"] = max(counters["movies_to_watch"] + sign * other["movies_to_watch"], 0)
+    counters["runtime"] = max(counters["runtime"] + sign * other["runtime"], 0)
+    for field in COUNTER_FIELDS:
+        for key, value in other[field].items():
+            _increment(counters[field], key, sign * value)
+
+
+def get_top_items(counts: Dict[str, int], limit: int) -> list[tuple[str, int]]:
+    """
+    Get the most frequent items.
+
+    Items with the same count are sorted by name.
+    """
+    return sorted(counts.items(), key=lambda x: (-x[1], x[0]))[:limit]
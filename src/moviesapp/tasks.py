@@ -1,12 +1,28 @@
 """Tasks."""
 
+import logging
+from io import StringIO
+from typing import TYPE_CHECKING, Optional, cast
+
 from celery import shared_task
 from django.conf import settings
+from django.core.management import call_command, load_command_class
+from django.db import transaction
+from django.db.models.functions import Mod
 from sentry_sdk import capture_exception
 
 from .exceptions import ProviderNotFoundError
-from .models import Movie
-from .tmdb import get_watch_data
+from .models import JobState, Movie, TimelineEntry, User, UserStats
+from .omdb import get_omdb_movie_data
+from .tmdb import get_watch_data, refresh_catalog
+from .types import RefreshResult, TmdbCatalog, UntypedObject
+
+if TYPE_CHECKING:
+    from celery.app.task import Context
+
+    from .management.refresh import RefreshCommand
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task
@@ -20,3 +36,154 @@ def load_and_save_watch_data_task(movie_id: int) -> None:
         if settings.DEBUG:
             raise
         capture_exception(e)
+
+
+@shared_task
+def load_movie_extra_data_task(movie_id: int) -> None:
+    """
+    Load extra movie data task.
+
+    Movies added by users are created with TMDB data only. OMDb data is loaded here.
+    Only OMDb fields are saved, so fields saved after the task was enqueued (e.g. watch data) are not overwritten.
+    If anything fails, the movie is marked as failed, so the frontend stops waiting for the data.
+    """
+    try:
+        movie = Movie.objects.get(pk=movie_id)
+        omdb_data = get_omdb_movie_data(movie.imdb_id)
+        movie.writer = omdb_data["writer"]
+        movie.director = omdb_data["director"]
+        movie.actors = omdb_data["actors"]
+        movie.genre = omdb_data["genre"]
+        movie.country = omdb_data["country"]
+        movie.imdb_rating = omdb_data["imdb_rating"]
+        movie.data_status = Movie.DATA_LOADED
+        # A failed save must not break the transaction in which the movie is marked as failed
+        with transaction.atomic():
+            movie.save(
+                update_fields=["writer", "director", "actors", "genre", "country", "imdb_rating", "data_status"]
+            )
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        Movie.objects.filter(pk=movie_id).update(data_status=Movie.DATA_FAILED)
+        if settings.DEBUG:
+            raise
+        capture_exception(e)
+        return
+    # Records could have been added before the stats fields were loaded
+    UserStats.invalidate_for_movie(movie.pk)
+
+
+@shared_task
+def build_timeline_task(user_id: int) -> None:
+    """Build the timeline of a user task."""
+    user = User.objects.get(pk=user_id)
+    # The timeline could have been built by another task or by the `build_timelines` command
+    if not user.timeline_built:
+        TimelineEntry.build(user)
+
+
+@shared_task
+def refresh_tmdb_catalog_task(catalog: TmdbCatalog) -> None:
+    """Refresh TMDB catalog task."""
+    refresh_catalog(catalog)
+
+
+@shared_task
+def refresh_tmdb_catalogs_task() -> None:
+    """
+    Refresh TMDB catalogs task.
+
+    Only catalogs shown in views are refreshed, upcoming movies are not shown anywhere.
+    """
+    refresh_catalog("trending")
+
+
+@shared_task(soft_time_limit=settings.REFRESH_TASK_SOFT_TIME_LIMIT)
+def refresh_movies_task(command_name: str, movie_ids: list[int], options: UntypedObject) -> RefreshResult:
+    """Refresh a chunk of movies with a refresh command."""
+    command = cast("RefreshCommand", load_command_class("moviesapp", command_name))
+    call_command(command, movie_ids=movie_ids, stdout=StringIO(), stderr=StringIO(), **options)
+    return command.result
+
+
+@shared_task(soft_time_limit=settings.REFRESH_TASK_SOFT_TIME_LIMIT)
+def rolling_refresh_task(command_name: str) -> RefreshResult:
+    """
+    Refresh the next shard of movies with a refresh command.
+
+    The last processed shard is saved in the job state, so every shard is processed once per cycle
+    even if beat ticks drift or beat is restarted.
+    """
+    rolling_refresh = settings.ROLLING_REFRESH[command_name]
+    shards = rolling_refresh["shards"]
+    shard = JobState.get_next_shard(f"rolling_{command_name}", shards)
+    command = cast("RefreshCommand", load_command_class("moviesapp", command_name))
+    movies = command.get_movies_for_rolling_refresh(Movie.objects.alias(shard=Mod("pk", shards)).filter(shard=shard))
+    movie_ids = list(movies.values_list("pk", flat=True)[: rolling_refresh["max_movies"] + 1])
+    if len(movie_ids) > rolling_refresh["max_movies"]:
+        movie_ids = movie_ids[:-1]
+        logger.warning("%s: shard %s/%s is capped at %s movies", command_name, shard, shards, len(movie_ids))
+    if not movie_ids:
+        return {"processed": 0, "updated": 0, "errors": 0}
+    result = refresh_movies_task(command_name, movie_ids, {})
+    logger.info(
+        "%s: shard %s/%s, %s movies processed, %s updated, %s errors",
+        command_name,
+        shard,
+        shards,
+        result["processed"],
+        result["updated"],
+        result["errors"],
+    )
+    return result
+
+
+@shared_task
+def finish_distributed_refresh_task(
+    results: list[RefreshResult], job_name: str, run_id: str, watermark_name: Optional[str]
+) -> RefreshResult:
+    """
+    Finish a distributed refresh run when all chunks are processed.
+
+    Results of the chunks are saved to the job state unless a newer run was started.
+    """
+    result: RefreshResult = {
+        "processed": sum(r["processed"] for r in results),
+        "updated": sum(r["updated"] for r in results),
+        "errors": sum(r["errors"] for r in results),
+    }
+    logger.info(
+        "%s: %s movies processed, %s updated, %s errors",
+        job_name,
+        result["processed"],
+        result["updated"],
+        result["errors"],
+    )
+    job_state = JobState.objects.get(name=job_name)
+    if str(job_state.run_id) != run_id:
+        return result
+    job_state.processed = result["processed"]
+    job_state.updated = result["updated"]
+    job_state.errors = result["errors"]
+    job_state.finish_run()
+    if watermark_name is not None and job_state.run_start_time is not None:
+        JobState.set_watermark(watermark_name, job_state.run_start_time)
+    return result
+
+
+@shared_task
+def fail_distributed_refresh_task(
+    request: "Context",  # pylint: disable=unused-argument
+    exc: Exception,
+    traceback: str,  # pylint: disable=unused-argument
+    job_name: str,
+    run_id: str,
+) -> None:
+    """
+    Record a failed distributed refresh run.
+
+    It is called instead of the chord callback if any chunk fails, so the run doesn't stay unfinished.
+    """
+    logger.error("%s: distributed run %s failed: %r", job_name, run_id, exc)
+    job_state = JobState.objects.get(name=job_name)
+    if str(job_state.run_id) == run_id:
+        job_state.fail_run(repr(exc))
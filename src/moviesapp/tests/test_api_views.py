@@ -6,9 +6,11 @@ import json
 import random
 from http import HTTPStatus
 
+from django.test import override_settings
 from rest_framework.test import APITestCase
 
 from moviesapp.models import Action, ActionRecord, List, Movie, Record, User
+from moviesapp.views.utils import encode_cursor
 
 from .base import BaseClient
 
@@ -435,6 +437,66 @@ class RecordsViewTestCase(APITestCase):
         # The API might return empty list for non-existent users instead of 404
         self.assertIn(response.status_code, [HTTPStatus.NOT_FOUND, HTTPStatus.OK])
 
+    def _create_records(self, number):
+        """Create records for the authenticated user."""
+        records = []
+        for i in range(number):
+            movie = Movie.objects.create(
+                tmdb_id=100000 + i,
+                title=f"Movie {i}",
+                title_original=f"Movie {i}",
+                imdb_id=f"tt{100000 + i}",
+                trailers="[]",
+            )
+            records.append(Record.objects.create(user=self.user, movie=movie, list_id=self.watched_list.pk))
+        return records
+
+    @override_settings(RECORDS_ON_PAGE=2)
+    def test_get_records_paginated(self):
+        """Test getting records page by page with a cursor."""
+        records = self._create_records(5)
+        # Custom order goes first
+        Record.objects.filter(pk=records[0].pk).update(order=1)
+
+        ids = []
+        cursor = ""
+        pages = 0
+        while cursor is not None:
+            response = self.client.get(self.url, {"cursor": cursor})
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            data = response.json()
+            self.assertLessEqual(len(data["results"]), 2)
+            ids += [record["id"] for record in data["results"]]
+            cursor = data["next"]
+            pages += 1
+
+        self.assertEqual(pages, 3)
+        # Records without custom order go first, the most recently added first
+        expected_ids = [record.pk for record in reversed(records[1:])] + [records[0].pk]
+        self.assertEqual(ids, expected_ids)
+        self.assertEqual(ids, [record["id"] for record in self.client.get(self.url).json()])
+
+    @override_settings(RECORDS_ON_PAGE=2)
+    def test_get_records_paginated_last_page(self):
+        """Test that the last page has no next cursor."""
+        self._create_records(2)
+        response = self.client.get(self.url, {"cursor": ""})
+        data = response.json()
+        self.assertEqual(len(data["results"]), 2)
+        self.assertIsNone(data["next"])
+
+    def test_get_records_invalid_cursor(self):
+        """Test getting records with an invalid cursor."""
+        invalid_positions = ([[1], "2020-01-01T00:00:00+00:00", 1], [0, "2020-01-01T00:00:00+00:00", True])
+        for cursor in (
+            "invalid",
+            "WzFd",
+            "eyJhIjogMX0=",
+            *(encode_cursor(position) for position in invalid_positions),
+        ):
+            response = self.client.get(self.url, {"cursor": cursor})
+            self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
 
 class SaveRecordsOrderViewTestCase(APITestCase):
     """Test SaveRecordsOrderView."""
@@ -1,12 +1,16 @@
 """Test feed functionality."""
 
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from moviesapp.models import Action, ActionRecord, Follow, List, Movie
+from moviesapp.models import Action, ActionRecord, Follow, List, Movie, TimelineEntry
+from moviesapp.tasks import build_timeline_task
+from moviesapp.views.utils import encode_cursor
 
 User = get_user_model()
 
@@ -146,3 +150,172 @@ class FeedViewTestCase(TestCase):  # pylint: disable=too-many-instance-attribute
         self.assertEqual(activity["list"]["name"], "To Watch")
         self.assertEqual(activity["rating"], 9)
         self.assertEqual(activity["comment"], "Great movie!")
+
+
+class FeedCursorPaginationTestCase(TestCase):
+    """Test feed cursor pagination."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="user", password="testpass123")
+        action = Action.objects.create(id=Action.ADDED_MOVIE, name="Added Movie")
+        movie = Movie.objects.create(title="Test Movie", title_original="Test Movie", imdb_id="tt1234567", tmdb_id=1)
+        self.action_records = [
+            ActionRecord.objects.create(user=self.user, action=action, movie=movie) for _ in range(5)
+        ]
+        # Two action records with the same date to check the tie-breaker
+        ActionRecord.objects.filter(pk__in=[self.action_records[1].pk, self.action_records[2].pk]).update(
+            date=self.action_records[1].date
+        )
+        self.action_records.reverse()
+
+    def _get_all_pages(self, url):
+        """Follow `next` links and return IDs of all action records."""
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            ids.extend(activity["id"] for activity in response.data["results"])
+            url = response.data["next"]
+        return ids
+
+    def test_cursor_pagination(self):
+        """Test that all action records are returned exactly once in order."""
+        ids = self._get_all_pages(f"{reverse('feed')}?cursor=&page_size=2")
+
+        self.assertEqual(ids, [action_record.pk for action_record in self.action_records])
+
+    def test_cursor_pagination_timeline(self):
+        """Test cursor pagination of a timeline."""
+        follower = User.objects.create_user(username="follower", password="testpass123")
+        Follow.objects.create(follower=follower, followed=self.user)
+        self.client.force_authenticate(user=follower)
+
+        ids = self._get_all_pages(f"{reverse('feed')}?cursor=&page_size=2")
+
+        self.assertEqual(ids, [action_record.pk for action_record in self.action_records])
+
+    def test_cursor_pagination_last_page(self):
+        """Test that there is no next page on the last page."""
+        response = self.client.get(reverse("feed"), {"cursor": ""})
+
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertIsNone(response.data["next"])
+
+    def test_invalid_cursor(self):
+        """Test invalid cursor."""
+        invalid_positions = (
+            [[1], 1],
+            ["2020-01-01T00:00:00+00:00", "1"],
+            ["invalid", 1],
+            ["2020-01-01T00:00:00+00:00"],
+        )
+        for cursor in ("invalid", *(encode_cursor(position) for position in invalid_positions)):
+            response = self.client.get(reverse("feed"), {"cursor": cursor})
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TimelineTestCase(TestCase):
+    """Test feed timelines."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(username="user1", password="testpass123")
+        self.user2 = User.objects.create_user(username="user2", password="testpass123")
+        self.user3 = User.objects.create_user(username="user3", password="testpass123")
+        List.objects.create(id=List.WATCHED, name="Watched", key_name="watched")
+        self.action = Action.objects.create(id=Action.ADDED_MOVIE, name="Added Movie")
+        self.movie = Movie.objects.create(
+            title="Test Movie", title_original="Test Movie", imdb_id="tt1234567", tmdb_id=12345
+        )
+        self.old_action_record = self._create_action_record(self.user2)
+        Follow.objects.create(follower=self.user1, followed=self.user2)
+        build_timeline_task(self.user1.pk)
+        self.user1.refresh_from_db()
+        self.client.force_authenticate(user=self.user1)
+
+    def _create_action_record(self, user):
+        """Create an action record."""
+        return ActionRecord.objects.create(user=user, action=self.action, movie=self.movie, list_id=List.WATCHED)
+
+    def _get_feed_ids(self):
+        """Get IDs of the action records in the feed."""
+        response = self.client.get(reverse("feed"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [activity["id"] for activity in response.data["results"]]
+
+    def test_timeline_built_on_follow(self):
+        """Test that the timeline is built in the background when a user follows somebody."""
+        with (
+            patch("moviesapp.tasks.build_timeline_task.delay") as mock_delay,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            Follow.objects.create(follower=self.user3, followed=self.user2)
+
+        mock_delay.assert_called_once_with(self.user3.pk)
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.user3).exists())
+
+        build_timeline_task(self.user3.pk)
+
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(owner=self.user3).values_list("action_record_id", flat=True)),
+            [self.old_action_record.pk],
+        )
+
+    def test_fan_out(self):
+        """Test that new action records are added to the timelines of followers."""
+        action_record = self._create_action_record(self.user2)
+        self._create_action_record(self.user3)
+
+        self.assertEqual(self._get_feed_ids(), [action_record.pk, self.old_action_record.pk])
+
+    def test_follow(self):
+        """Test that activity of a followed user is added to the timeline."""
+        action_record = self._create_action_record(self.user3)
+
+        Follow.objects.create(follower=self.user1, followed=self.user3)
+
+        self.assertEqual(self._get_feed_ids(), [action_record.pk, self.old_action_record.pk])
+
+    def test_unfollow(self):
+        """Test that activity of an unfollowed user is removed from the timeline."""
+        Follow.objects.create(follower=self.user1, followed=self.user3)
+        self._create_action_record(self.user3)
+
+        Follow.objects.filter(follower=self.user1, followed=self.user3).delete()
+
+        self.assertEqual(self._get_feed_ids(), [self.old_action_record.pk])
+
+    def test_privacy_settings_change(self):
+        """Test that activity of a user is removed from timelines when the user becomes hidden."""
+        self.user2.hidden = True
+        self.user2.save()
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.user1).exists())
+
+        self.user2.hidden = False
+        self.user2.save()
+        self.assertEqual(self._get_feed_ids(), [self.old_action_record.pk])
+
+    def test_cold_timeline(self):
+        """Test that the feed is loaded from the action log if the timeline is not built."""
+        User.objects.filter(pk=self.user1.pk).update(timeline_built=False)
+        TimelineEntry.objects.all().delete()
+        self.user1.refresh_from_db()
+        action_record = self._create_action_record(self.user2)
+
+        self.assertEqual(self._get_feed_ids(), [action_record.pk, self.old_action_record.pk])
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_timeline_pagination(self):
+        """Test timeline pagination."""
+        action_record = self._create_action_record(self.user2)
+
+        response = self.client.get(reverse("feed"), {"page_size": 1})
+
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual([activity["id"] for activity in response.data["results"]], [action_record.pk])
+        self.assertIsNotNone(response.data["next"])
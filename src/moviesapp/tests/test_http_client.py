@@ -0,0 +1,116 @@
+"""Test the shared HTTP transport."""
+
+from unittest.mock import patch
+
+import tmdbsimple as tmdb
+from django.test import TestCase, override_settings
+
+from moviesapp import http_client
+from moviesapp.http_client import (
+    RateLimiter,
+    SharedRateLimiter,
+    _close_connections,
+    _get_adapter,
+    get_http_pool_stats,
+    get_session,
+)
+
+
+class HttpClientTestCase(TestCase):
+    """Test the shared HTTP transport."""
+
+    def test_get_session(self):
+        """Test that the same session is returned every time."""
+        session = get_session()
+
+        self.assertIs(get_session(), session)
+        self.assertIs(
+            session.get_adapter("https://api.themoviedb.org/3/"), session.get_adapter("http://www.omdbapi.com/")
+        )
+
+    def test_tmdbsimple_uses_session(self):
+        """Test that tmdbsimple uses the shared session."""
+        self.assertIs(tmdb.Movies(1).session, get_session())
+
+    @override_settings(HTTP_POOL_CONNECTIONS=3, HTTP_POOL_MAXSIZE=20, HTTP_MAX_RETRIES=2)
+    def test_get_adapter(self):
+        """Test adapter pool sizes and retries."""
+        adapter = _get_adapter()
+
+        self.assertEqual(adapter.poolmanager.connection_pool_kw["maxsize"], 20)
+        self.assertEqual(adapter.poolmanager.pools._maxsize, 3)  # pylint: disable=protected-access
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertIn(503, adapter.max_retries.status_forcelist)
+
+    def test_get_http_pool_stats(self):
+        """Test connection pool stats."""
+        session = get_session()
+        _close_connections()
+        adapter = session.get_adapter("https://api.themoviedb.org/3/")
+        pool = adapter.poolmanager.connection_from_url("https://api.themoviedb.org/3/")
+        pool.num_connections = 2
+        pool.num_requests = 10
+
+        stats = get_http_pool_stats()
+
+        self.assertEqual(
+            stats, [{"host": "https://api.themoviedb.org", "connections": 2, "requests": 10, "reused": 8}]
+        )
+        _close_connections()
+        self.assertEqual(get_http_pool_stats(), [])
+
+    def test_get_http_pool_stats_no_session(self):
+        """Test connection pool stats when the session is not created."""
+        session = http_client._session  # pylint: disable=protected-access
+        http_client._session = None  # pylint: disable=protected-access
+        try:
+            self.assertEqual(get_http_pool_stats(), [])
+        finally:
+            http_client._session = session  # pylint: disable=protected-access
+
+
+class RateLimiterTestCase(TestCase):
+    """Test the rate limiter."""
+
+    @patch("moviesapp.http_client.sleep")
+    @patch("moviesapp.http_client.monotonic", return_value=100.0)
+    def test_wait(self, mock_monotonic, mock_sleep):  # pylint: disable=unused-argument
+        """Test that requests are spread evenly."""
+        rate_limiter = RateLimiter(4)
+
+        rate_limiter.wait()
+        rate_limiter.wait()
+        rate_limiter.wait()
+
+        self.assertEqual([c.args[0] for c in mock_sleep.call_args_list], [0.25, 0.5])
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class SharedRateLimiterTestCase(TestCase):
+    """Test the shared rate limiter."""
+
+    @patch("moviesapp.http_client.sleep")
+    @patch("moviesapp.http_client.time")
+    def test_wait(self, mock_time, mock_sleep):
+        """Test that requests of all limiters are counted together."""
+        mock_time.side_effect = [100.0, 100.0, 100.0, 100.05, 100.15]
+        # Each limiter allows 2 requests per window of 0.1 seconds
+        rate_limiters = [SharedRateLimiter("test", 20) for _ in range(3)]
+
+        rate_limiters[0].wait()
+        rate_limiters[1].wait()
+        # The window is full, so the request waits for the next one
+        rate_limiters[2].wait()
+
+        self.assertEqual(len(mock_sleep.call_args_list), 1)
+        self.assertAlmostEqual(mock_sleep.call_args.args[0], 0.05)
+
+    @patch("moviesapp.http_client.sleep")
+    @patch("moviesapp.http_client.time", return_value=100.0)
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
+    def test_wait_without_cache(self, mock_time, mock_sleep):  # pylint: disable=unused-argument
+        """Test that only the local limit is applied if the cache doesn't store values."""
+        for _ in range(3):
+            SharedRateLimiter("test", 20).wait()
+
+        mock_sleep.assert_not_called()
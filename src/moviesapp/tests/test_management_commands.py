@@ -1,15 +1,45 @@
 # pylint: disable=duplicate-code
 
-from datetime import date, timedelta
+import gzip
+import json
+from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
-from io import StringIO
+from io import BytesIO, StringIO
+from os import listdir
+from os.path import exists, getmtime, join
+from tempfile import TemporaryDirectory
 from unittest.mock import PropertyMock, patch
 
+import requests_mock
+from django.conf import settings
+from django.core.cache import cache
 from django.core.management import call_command
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from PIL import Image
+from requests.exceptions import HTTPError
 
 from moviesapp.exceptions import ProviderNotFoundError
-from moviesapp.models import List, Movie, Provider, ProviderRecord, Record, User
+from moviesapp.management.commands.download_provider_logos import ETAGS_CACHE_KEY
+from moviesapp.management.commands.update_watch_data import Command as UpdateWatchDataCommand
+from moviesapp.models import (
+    Action,
+    ActionRecord,
+    Follow,
+    JobState,
+    List,
+    Movie,
+    Provider,
+    ProviderRecord,
+    Record,
+    TimelineEntry,
+    User,
+    UserStats,
+)
+from moviesapp.omdb.exceptions import OmdbRequestError
+from moviesapp.tasks import fail_distributed_refresh_task, finish_distributed_refresh_task, refresh_movies_task
 from moviesapp.tmdb import TmdbNoImdbIdError
 
 
@@ -70,6 +100,61 @@ class LoadProvidersCommandTestCase(TestCase):
         provider = Provider.objects.get(id=1)
         self.assertEqual(provider.name, "Netflix")
 
+    @patch("moviesapp.management.commands.load_providers.get_tmdb_providers")
+    def test_load_providers_report(self, mock_get_tmdb_providers):
+        """Test that providers are upserted with one query and changes are reported."""
+        Provider.objects.create(id=1, name="Old Netflix Name")
+        Provider.objects.create(id=2, name="Amazon Prime Video")
+        Provider.objects.create(id=4, name="Removed")
+        mock_get_tmdb_providers.return_value = [
+            {"provider_id": 1, "provider_name": "Netflix"},
+            {"provider_id": 2, "provider_name": "Amazon Prime Video"},
+            {"provider_id": 3, "provider_name": "Hulu"},
+            {"provider_id": 3, "provider_name": "Hulu"},
+        ]
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as context:
+            call_command("load_providers", stdout=out)
+
+        # Existing providers are loaded with one query and upserted with another one
+        self.assertEqual(len(context.captured_queries), 2)
+        self.assertEqual(
+            dict(Provider.objects.values_list("id", "name")),
+            {1: "Netflix", 2: "Amazon Prime Video", 3: "Hulu", 4: "Removed"},
+        )
+        self.assertIn("1 providers added, 1 providers renamed, 1 providers are no longer on TMDB", out.getvalue())
+
+    @patch.object(connection.features, "supports_update_conflicts_with_target", False)
+    @patch.object(Provider.objects, "bulk_create")
+    @patch("moviesapp.management.commands.load_providers.get_tmdb_providers")
+    def test_load_providers_without_conflict_target(self, mock_get_tmdb_providers, mock_bulk_create):
+        """Test that the conflict target is not passed if the database doesn't support it (MySQL)."""
+        mock_get_tmdb_providers.return_value = [{"provider_id": 1, "provider_name": "Netflix"}]
+
+        call_command("load_providers", stdout=StringIO())
+
+        mock_bulk_create.assert_called_once()
+        self.assertIsNone(mock_bulk_create.call_args.kwargs["unique_fields"])
+        self.assertTrue(mock_bulk_create.call_args.kwargs["update_conflicts"])
+        self.assertEqual(mock_bulk_create.call_args.kwargs["update_fields"], ["name"])
+
+    @patch("moviesapp.management.commands.load_providers.get_tmdb_providers")
+    def test_load_providers_prune(self, mock_get_tmdb_providers):
+        """Test that only unused providers which are no longer on TMDB are pruned."""
+        movie = Movie.objects.create(tmdb_id=603, title="The Matrix", imdb_id="tt0133093")
+        Provider.objects.create(id=1, name="Netflix")
+        used_provider = Provider.objects.create(id=2, name="Used")
+        Provider.objects.create(id=3, name="Unused")
+        ProviderRecord.objects.create(movie=movie, provider=used_provider, country="US")
+        mock_get_tmdb_providers.return_value = [{"provider_id": 1, "provider_name": "Netflix"}]
+
+        out = StringIO()
+        call_command("load_providers", "--prune", stdout=out)
+
+        self.assertEqual(set(Provider.objects.values_list("id", flat=True)), {1, 2})
+        self.assertIn("1 providers pruned", out.getvalue())
+
 
 class RemoveUnusedMoviesCommandTestCase(TestCase):
     def setUp(self):
@@ -112,6 +197,32 @@ class RemoveUnusedMoviesCommandTestCase(TestCase):
         self.assertEqual(Movie.objects.count(), 1)
         self.assertTrue(Movie.objects.filter(id=self.movie_with_record.id).exists())
 
+    @override_settings(REMOVE_UNUSED_MOVIES_BATCH_SIZE=1)
+    def test_remove_unused_movies_batches(self):
+        """Test that unused movies and their related objects are removed in batches."""
+        Provider.objects.create(id=8, name="Netflix")
+        ProviderRecord.objects.create(movie=self.movie_without_record, provider_id=8, country="US")
+        Movie.objects.create(tmdb_id=3, title="Another Unused Movie", imdb_id="tt0000003")
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as context:
+            call_command("remove_unused_movies", stdout=out)
+
+        movie_deletes = [q for q in context.captured_queries if q["sql"].startswith('DELETE FROM "moviesapp_movie"')]
+        self.assertEqual(len(movie_deletes), 2)
+        self.assertEqual(list(Movie.objects.all()), [self.movie_with_record])
+        self.assertFalse(ProviderRecord.objects.exists())
+        self.assertIn("2 unused movies removed", out.getvalue())
+        self.assertIn("1 related objects removed (moviesapp.ProviderRecord)", out.getvalue())
+
+    def test_remove_unused_movies_dry_run(self):
+        """Test that the dry run only prints the number of unused movies."""
+        out = StringIO()
+        call_command("remove_unused_movies", "--dry-run", stdout=out)
+
+        self.assertEqual(Movie.objects.count(), 2)
+        self.assertIn("1 unused movies found", out.getvalue())
+
 
 class UpdateImdbRatingsCommandTestCase(TestCase):
     def setUp(self):
@@ -167,6 +278,93 @@ class UpdateImdbRatingsCommandTestCase(TestCase):
         with self.assertRaises(Exception):
             call_command("update_imdb_ratings", stdout=out)
 
+    @patch("moviesapp.management.commands.update_imdb_ratings.get_omdb_movie_data")
+    @override_settings(IMDB_RATINGS_BATCH_SIZE=2)
+    def test_update_imdb_ratings_batches(self, mock_get_omdb_data):
+        """Test that changed ratings are saved in batches."""
+        Movie.objects.create(tmdb_id=604, title="The Matrix Reloaded", imdb_id="tt0234215")
+        Movie.objects.create(tmdb_id=605, title="The Matrix Revolutions", imdb_id="tt0242653")
+        mock_get_omdb_data.return_value = {"imdb_rating": "7.5"}
+
+        out = StringIO()
+        with patch.object(Movie.objects, "bulk_update", wraps=Movie.objects.bulk_update) as mock_bulk_update:
+            call_command("update_imdb_ratings", stdout=out)
+
+        self.assertEqual(mock_bulk_update.call_count, 2)
+        self.assertEqual(Movie.objects.filter(imdb_rating=Decimal("7.5")).count(), 3)
+        self.assertIn("3 movies processed", out.getvalue())
+        self.assertIn("3 API calls, 3 ratings updated", out.getvalue())
+
+    @staticmethod
+    def _write_ratings_file(path, rows):
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write("tconst\taverageRating\tnumVotes\n")
+            for row in rows:
+                f.write("\t".join(row) + "\n")
+
+    @patch("moviesapp.management.commands.update_imdb_ratings.get_omdb_movie_data")
+    @override_settings(IMDB_RATINGS_BATCH_SIZE=1)
+    def test_update_imdb_ratings_from_file(self, mock_get_omdb_data):
+        """Test updating IMDb ratings from the IMDb ratings dataset."""
+        movie_unchanged = Movie.objects.create(
+            tmdb_id=604, title="The Matrix Reloaded", imdb_id="tt0234215", imdb_rating=Decimal("7.2")
+        )
+        movie_not_in_file = Movie.objects.create(
+            tmdb_id=605, title="The Matrix Revolutions", imdb_id="tt0242653", imdb_rating=Decimal("6.7")
+        )
+        with TemporaryDirectory() as directory:
+            path = join(directory, "title.ratings.tsv.gz")
+            self._write_ratings_file(
+                path, [("tt0000001", "5.7", "2000"), ("tt0133093", "8.7", "2100000"), ("tt0234215", "7.2", "650000")]
+            )
+
+            out = StringIO()
+            call_command("update_imdb_ratings", "-f", path, stdout=out)
+
+        self.movie.refresh_from_db()
+        movie_unchanged.refresh_from_db()
+        movie_not_in_file.refresh_from_db()
+        self.assertEqual(self.movie.imdb_rating, Decimal("8.7"))
+        self.assertEqual(movie_unchanged.imdb_rating, Decimal("7.2"))
+        self.assertEqual(movie_not_in_file.imdb_rating, Decimal("6.7"))
+        self.assertIn("1 ratings updated", out.getvalue())
+        mock_get_omdb_data.assert_not_called()
+
+    @patch("moviesapp.management.commands.update_imdb_ratings.get_omdb_movie_data")
+    @override_settings(JOB_CHECKPOINT_INTERVAL=1)
+    def test_update_imdb_ratings_resume(self, mock_get_omdb_data):
+        """Test that an unfinished run is resumed from the checkpoint."""
+        movie = Movie.objects.create(tmdb_id=604, title="The Matrix Reloaded", imdb_id="tt0234215")
+        mock_get_omdb_data.side_effect = [{"imdb_rating": "8.7"}, OmdbRequestError]
+
+        with self.assertRaises(OmdbRequestError):
+            call_command("update_imdb_ratings", stdout=StringIO())
+
+        job_state = JobState.objects.get(name=JobState.UPDATE_IMDB_RATINGS)
+        self.assertTrue(job_state.is_run_unfinished)
+        self.assertEqual(job_state.last_movie_id, self.movie.pk)
+        # Ratings are saved before the checkpoint
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.imdb_rating, Decimal("8.7"))
+
+        mock_get_omdb_data.side_effect = None
+        mock_get_omdb_data.return_value = {"imdb_rating": "7.2"}
+        mock_get_omdb_data.reset_mock()
+        out = StringIO()
+        call_command("update_imdb_ratings", "--resume", stdout=out)
+
+        mock_get_omdb_data.assert_called_once_with(movie.imdb_id)
+        self.assertIn(f"Resuming run {job_state.run_id} after movie ID {self.movie.pk}", out.getvalue())
+        job_state.refresh_from_db()
+        self.assertFalse(job_state.is_run_unfinished)
+        self.assertEqual(job_state.processed, 2)
+        self.assertEqual(job_state.updated, 2)
+
+    def test_update_imdb_ratings_distributed_with_file(self):
+        """Test that ratings from a file can't be updated in the distributed mode."""
+        with self.assertRaises(SystemExit):
+            call_command("update_imdb_ratings", "-d", "-f", "ratings.tsv.gz", stdout=StringIO(), stderr=StringIO())
+
 
 class UpdateMovieDataCommandTestCase(TestCase):
     def setUp(self):
@@ -241,6 +439,37 @@ class UpdateMovieDataCommandTestCase(TestCase):
         # Movie should not be updated since data is the same
         mock_load_movie_data.assert_called_with(self.movie.tmdb_id)
 
+    @patch("moviesapp.management.commands.update_movie_data.load_movie_data")
+    def test_update_movie_data_unchanged_data_not_saved(self, mock_load_movie_data):
+        """Test that a movie is not saved if the loaded data has not changed since the last update."""
+        mock_load_movie_data.return_value = {"title": "The Matrix (Updated)", "imdb_rating": "8.7"}
+        call_command("update_movie_data", stdout=StringIO())
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.title, "The Matrix (Updated)")
+        self.assertNotEqual(self.movie.data_hash, "")
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as context:
+            call_command("update_movie_data", stdout=out)
+
+        movie_updates = [q for q in context.captured_queries if q["sql"].startswith('UPDATE "moviesapp_movie"')]
+        self.assertEqual(movie_updates, [])
+        self.assertNotIn("is updated", out.getvalue())
+
+    @patch("moviesapp.management.commands.update_movie_data.load_movie_data")
+    @override_settings(MOVIE_DATA_UPDATE_BATCH_SIZE=2)
+    def test_update_movie_data_batches(self, mock_load_movie_data):
+        """Test that changed movies are saved in batches."""
+        Movie.objects.create(tmdb_id=604, title="The Matrix Reloaded", imdb_id="tt0234215")
+        Movie.objects.create(tmdb_id=605, title="The Matrix Revolutions", imdb_id="tt0242653")
+        mock_load_movie_data.return_value = {"overview": "Updated overview", "imdb_rating": "8.7"}
+
+        with patch.object(Movie.objects, "bulk_update", wraps=Movie.objects.bulk_update) as mock_bulk_update:
+            call_command("update_movie_data", stdout=StringIO())
+
+        self.assertEqual(mock_bulk_update.call_count, 2)
+        self.assertEqual(Movie.objects.filter(overview="Updated overview").count(), 3)
+
     @patch("moviesapp.management.commands.update_movie_data.load_movie_data")
     def test_update_movie_data_with_specific_movie_id(self, mock_load_movie_data):
         """Test updating a specific movie by ID."""
@@ -262,6 +491,140 @@ class UpdateMovieDataCommandTestCase(TestCase):
         self.movie.refresh_from_db()
         self.assertEqual(self.movie.title, "The Matrix (Updated)")
 
+    @patch("moviesapp.management.commands.update_movie_data.load_movie_data")
+    def test_update_movie_data_sets_watermark(self, mock_load_movie_data):
+        """Test that a full update sets the watermark and an update of one movie does not."""
+        mock_load_movie_data.return_value = {"title": "The Matrix", "imdb_rating": "8.7"}
+
+        call_command("update_movie_data", str(self.movie.pk), stdout=StringIO())
+        self.assertIsNone(JobState.get_watermark(JobState.UPDATE_MOVIE_DATA))
+
+        call_command("update_movie_data", stdout=StringIO())
+        self.assertIsNotNone(JobState.get_watermark(JobState.UPDATE_MOVIE_DATA))
+
+    @patch("moviesapp.management.commands.update_movie_data.load_movie_data")
+    @patch("moviesapp.management.commands.update_movie_data.get_changed_movie_ids")
+    def test_update_movie_data_incremental(self, mock_get_changed_movie_ids, mock_load_movie_data):
+        """Test that only movies changed on TMDB since the last run are updated."""
+        Movie.objects.create(tmdb_id=604, title="The Matrix Reloaded", imdb_id="tt0234215")
+        watermark = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+        JobState.set_watermark(JobState.UPDATE_MOVIE_DATA, watermark)
+        mock_get_changed_movie_ids.return_value = {603, 1000}
+        mock_load_movie_data.return_value = {"title": "The Matrix", "imdb_rating": "8.7"}
+
+        out = StringIO()
+        call_command("update_movie_data", "-i", stdout=out)
+
+        mock_get_changed_movie_ids.assert_called_once()
+        self.assertEqual(mock_get_changed_movie_ids.call_args.args[0], date(2024, 1, 1))
+        mock_load_movie_data.assert_called_once_with(603)
+        self.assertIn("1 movies changed on TMDB", out.getvalue())
+        self.assertGreater(JobState.get_watermark(JobState.UPDATE_MOVIE_DATA), watermark)
+
+    @override_settings(TMDB_CHANGES_LOOKUP_CHUNK_SIZE=1)
+    @patch("moviesapp.management.commands.update_movie_data.load_movie_data")
+    @patch("moviesapp.management.commands.update_movie_data.get_changed_movie_ids")
+    def test_update_movie_data_incremental_chunks(self, mock_get_changed_movie_ids, mock_load_movie_data):
+        """Test that changed TMDB IDs are looked up in chunks."""
+        Movie.objects.create(tmdb_id=604, title="The Matrix Reloaded", imdb_id="tt0234215")
+        Movie.objects.create(tmdb_id=605, title="The Matrix Revolutions", imdb_id="tt0242653")
+        JobState.set_watermark(JobState.UPDATE_MOVIE_DATA, datetime(2024, 1, 1, 12, tzinfo=timezone.utc))
+        mock_get_changed_movie_ids.return_value = {603, 605, 1000}
+        mock_load_movie_data.return_value = {"title": "The Matrix", "imdb_rating": "8.7"}
+
+        out = StringIO()
+        call_command("update_movie_data", "-i", stdout=out)
+
+        self.assertEqual(sorted(c.args[0] for c in mock_load_movie_data.call_args_list), [603, 605])
+        self.assertIn("2 movies changed on TMDB", out.getvalue())
+
+    def test_update_movie_data_incremental_no_watermark(self):
+        """Test that the incremental mode requires a successful run."""
+        with self.assertRaises(SystemExit):
+            call_command("update_movie_data", "-i", stdout=StringIO(), stderr=StringIO())
+
+    @patch("moviesapp.management.commands.update_movie_data.load_movie_data")
+    @override_settings(JOB_CHECKPOINT_INTERVAL=1)
+    def test_update_movie_data_resume(self, mock_load_movie_data):
+        """Test that an unfinished run is resumed from the checkpoint."""
+        movie = Movie.objects.create(tmdb_id=604, title="The Matrix Reloaded", imdb_id="tt0234215")
+        mock_load_movie_data.side_effect = [{"title": "The Matrix", "imdb_rating": "8.7"}, HTTPError("API Error")]
+
+        with self.assertRaises(HTTPError):
+            call_command("update_movie_data", stdout=StringIO())
+
+        job_state = JobState.objects.get(name=JobState.UPDATE_MOVIE_DATA)
+        self.assertEqual(job_state.last_movie_id, self.movie.pk)
+        self.assertEqual(job_state.processed, 1)
+        self.assertIsNone(job_state.watermark)
+
+        mock_load_movie_data.side_effect = None
+        mock_load_movie_data.return_value = {"title": "The Matrix Reloaded", "imdb_rating": "7.2"}
+        mock_load_movie_data.reset_mock()
+        call_command("update_movie_data", "-r", stdout=StringIO())
+
+        mock_load_movie_data.assert_called_once_with(movie.tmdb_id)
+        finished_job_state = JobState.objects.get(name=JobState.UPDATE_MOVIE_DATA)
+        self.assertEqual(finished_job_state.run_id, job_state.run_id)
+        self.assertEqual(finished_job_state.processed, 2)
+        self.assertFalse(finished_job_state.is_run_unfinished)
+        # The watermark is the start time of the resumed run
+        self.assertEqual(finished_job_state.watermark, job_state.run_start_time)
+
+    @patch("moviesapp.management.commands.update_movie_data.load_movie_data")
+    def test_update_movie_data_resume_finished_run(self, mock_load_movie_data):
+        """Test that a new run is started if the last run is finished."""
+        mock_load_movie_data.return_value = {"title": "The Matrix", "imdb_rating": "8.7"}
+        call_command("update_movie_data", stdout=StringIO())
+        run_id = JobState.objects.get(name=JobState.UPDATE_MOVIE_DATA).run_id
+
+        call_command("update_movie_data", "-r", stdout=StringIO())
+
+        self.assertEqual(mock_load_movie_data.call_count, 2)
+        self.assertNotEqual(JobState.objects.get(name=JobState.UPDATE_MOVIE_DATA).run_id, run_id)
+
+    @patch("moviesapp.management.commands.update_movie_data.load_movie_data")
+    @override_settings(REFRESH_CHUNK_SIZE=2)
+    def test_update_movie_data_distributed(self, mock_load_movie_data):
+        """Test that movies are updated in chunks by Celery tasks."""
+        Movie.objects.create(tmdb_id=604, title="The Matrix Reloaded", imdb_id="tt0234215")
+        Movie.objects.create(tmdb_id=605, title="The Matrix Revolutions", imdb_id="tt0242653")
+        mock_load_movie_data.return_value = {"overview": "Updated overview", "imdb_rating": "8.7"}
+
+        out = StringIO()
+        with patch("moviesapp.management.refresh.chord") as mock_chord:
+            call_command("update_movie_data", "--distributed", stdout=out)
+        # Run the chord in the current process
+        results = [refresh_movies_task(*task.args) for task in mock_chord.call_args.args[0]]
+        finish_distributed_refresh_task(results, *mock_chord.return_value.call_args.args[0].args)
+
+        self.assertIn("3 movies are split into 2 chunks and enqueued", out.getvalue())
+        self.assertEqual(Movie.objects.filter(overview="Updated overview").count(), 3)
+        job_state = JobState.objects.get(name=JobState.UPDATE_MOVIE_DATA)
+        self.assertFalse(job_state.is_run_unfinished)
+        self.assertEqual(job_state.processed, 3)
+        self.assertEqual(job_state.updated, 3)
+        self.assertEqual(job_state.watermark, job_state.run_start_time)
+
+    def test_update_movie_data_distributed_chunk_failed(self):
+        """Test that a distributed run is finished with an error if a chunk fails."""
+        with patch("moviesapp.management.refresh.chord") as mock_chord:
+            call_command("update_movie_data", "--distributed", stdout=StringIO())
+        callback = mock_chord.return_value.call_args.args[0]
+        errback = callback.options["link_error"][0]
+        # Celery calls the errback of the chord callback with the request, the exception and the traceback
+        fail_distributed_refresh_task(None, HTTPError("Not Found"), "", *errback.args)
+
+        job_state = JobState.objects.get(name=JobState.UPDATE_MOVIE_DATA)
+        self.assertFalse(job_state.is_run_unfinished)
+        self.assertEqual(job_state.run_error, "HTTPError('Not Found')")
+        self.assertIsNone(job_state.watermark)
+
+    def test_update_movie_data_resume_with_movie_id(self):
+        """Test that a movie ID can't be used in the resume mode."""
+        with self.assertRaises(SystemExit):
+            call_command("update_movie_data", str(self.movie.pk), "-r", stdout=StringIO(), stderr=StringIO())
+
 
 class UpdateWatchDataCommandTestCase(TestCase):
     def setUp(self):
@@ -373,6 +736,164 @@ class UpdateWatchDataCommandTestCase(TestCase):
         # Should process the movie since it's in TO_WATCH, released, and user has supported country
         mock_get_watch_data.assert_called_with(self.movie.tmdb_id)
 
+    def test_update_watch_data_minimal_flag_candidates(self):
+        """Test that movies for the minimal update are selected with a single query."""
+        user = User.objects.create_user(username="testuser", country="US")
+        user_unsupported_country = User.objects.create_user(username="testuser2", country="FR")
+        List.objects.get_or_create(id=List.TO_WATCH, defaults={"name": "To Watch", "key_name": "to-watch"})
+        List.objects.get_or_create(id=List.WATCHED, defaults={"name": "Watched", "key_name": "watched"})
+        movie_updated_recently = Movie.objects.create(
+            tmdb_id=604, title="Updated", imdb_id="tt0000001", release_date="2000-01-01", watch_data_update_date=now()
+        )
+        movie_unreleased = Movie.objects.create(
+            tmdb_id=605, title="Unreleased", imdb_id="tt0000002", release_date=date.today() + timedelta(days=1)
+        )
+        movie_watched = Movie.objects.create(
+            tmdb_id=606, title="Watched", imdb_id="tt0000003", release_date="2000-01-01"
+        )
+        movie_unsupported_country = Movie.objects.create(
+            tmdb_id=607, title="Unsupported", imdb_id="tt0000004", release_date="2000-01-01"
+        )
+        for movie in (self.movie, movie_updated_recently, movie_unreleased):
+            Record.objects.create(user=user, movie=movie, list_id=List.TO_WATCH)
+        Record.objects.create(user=user_unsupported_country, movie=self.movie, list_id=List.TO_WATCH)
+        Record.objects.create(user=user, movie=movie_watched, list_id=List.WATCHED)
+        Record.objects.create(user=user_unsupported_country, movie=movie_unsupported_country, list_id=List.TO_WATCH)
+
+        with CaptureQueriesContext(connection) as context:
+            movies = list(UpdateWatchDataCommand._get_movies_for_minimal_update())  # pylint: disable=protected-access
+
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertEqual(movies, [self.movie])
+
+    @patch("moviesapp.management.commands.update_watch_data.get_watch_data")
+    def test_update_watch_data_budget(self, mock_get_watch_data):
+        """Test that movies with the highest demand are updated first within the budget."""
+        List.objects.get_or_create(id=List.TO_WATCH, defaults={"name": "To Watch", "key_name": "to-watch"})
+        users = [User.objects.create_user(username=f"user{i}", country="US") for i in range(2)]
+        users_unsupported_country = [User.objects.create_user(username=f"user_fr{i}", country="FR") for i in range(2)]
+        movie_most_wanted = Movie.objects.create(
+            tmdb_id=604, title="Most wanted", imdb_id="tt0000001", release_date="1990-01-01"
+        )
+        movie_wanted = Movie.objects.create(
+            tmdb_id=605, title="Wanted", imdb_id="tt0000002", release_date="1990-01-01"
+        )
+        movie_wanted_unsupported_country = Movie.objects.create(
+            tmdb_id=606, title="Wanted in FR", imdb_id="tt0000003", release_date="1990-01-01"
+        )
+        for user in users:
+            Record.objects.create(user=user, movie=movie_most_wanted, list_id=List.TO_WATCH)
+        Record.objects.create(user=users[0], movie=movie_wanted, list_id=List.TO_WATCH)
+        for user in (*users_unsupported_country, users[0]):
+            # The movie has the most records but fewer users from supported countries
+            Record.objects.create(user=user, movie=movie_wanted_unsupported_country, list_id=List.TO_WATCH)
+        mock_get_watch_data.return_value = []
+
+        out = StringIO()
+        call_command("update_watch_data", "--budget", "3", stdout=out)
+
+        self.assertEqual(
+            [c.args[0] for c in mock_get_watch_data.call_args_list],
+            [movie_most_wanted.tmdb_id, movie_wanted_unsupported_country.tmdb_id, movie_wanted.tmdb_id],
+        )
+        self.assertIn("1 movies with the lowest priority are left for the next runs", out.getvalue())
+
+    @patch("moviesapp.management.commands.update_watch_data.get_watch_data")
+    def test_update_watch_data_priority(self, mock_get_watch_data):
+        """Test that the age of watch data and the recency of the release are weighed against the demand."""
+        List.objects.get_or_create(id=List.TO_WATCH, defaults={"name": "To Watch", "key_name": "to-watch"})
+        users = [User.objects.create_user(username=f"user{i}", country="US") for i in range(3)]
+        movie_updated_recently = Movie.objects.create(
+            tmdb_id=604,
+            title="Updated recently",
+            imdb_id="tt0000001",
+            release_date="1990-01-01",
+            watch_data_update_date=now() - timedelta(days=10),
+        )
+        movie_outdated = Movie.objects.create(
+            tmdb_id=605,
+            title="Outdated",
+            imdb_id="tt0000002",
+            release_date="1990-01-01",
+            watch_data_update_date=now() - timedelta(days=180),
+        )
+        movie_new = Movie.objects.create(
+            tmdb_id=606,
+            title="New",
+            imdb_id="tt0000003",
+            release_date=date.today() - timedelta(days=100),
+            watch_data_update_date=now() - timedelta(days=10),
+        )
+        for user in users:
+            Record.objects.create(user=user, movie=movie_updated_recently, list_id=List.TO_WATCH)
+        Record.objects.create(user=users[0], movie=movie_outdated, list_id=List.TO_WATCH)
+        Record.objects.create(user=users[0], movie=movie_new, list_id=List.TO_WATCH)
+        self.movie.delete()
+        mock_get_watch_data.return_value = []
+
+        call_command("update_watch_data", stdout=StringIO())
+
+        # Outdated: 10 + 2 + 25 weeks * 2 = 62, updated recently: 3 * 10 + 3 * 2 + 1 week * 2 = 38,
+        # new: 10 + 2 + 1 week * 2 + (12 - 3) months * 2 = 32
+        self.assertEqual(
+            [c.args[0] for c in mock_get_watch_data.call_args_list],
+            [movie_outdated.tmdb_id, movie_updated_recently.tmdb_id, movie_new.tmdb_id],
+        )
+
+    @patch("moviesapp.management.refresh.chord")
+    @override_settings(REFRESH_CHUNK_SIZE=1)
+    def test_update_watch_data_distributed(self, mock_chord):
+        """Test that chunks of movies are enqueued in the order of priority."""
+        List.objects.get_or_create(id=List.TO_WATCH, defaults={"name": "To Watch", "key_name": "to-watch"})
+        user = User.objects.create_user(username="user", country="US")
+        movie_wanted = Movie.objects.create(
+            tmdb_id=604, title="Wanted", imdb_id="tt0000001", release_date="1990-01-01"
+        )
+        Record.objects.create(user=user, movie=movie_wanted, list_id=List.TO_WATCH)
+
+        out = StringIO()
+        call_command("update_watch_data", "-d", "-w", "2", stdout=out)
+
+        chunks = [task.args for task in mock_chord.call_args.args[0]]
+        self.assertEqual(
+            chunks,
+            [
+                ("update_watch_data", [movie_wanted.pk], {"workers": 2}),
+                ("update_watch_data", [self.movie.pk], {"workers": 2}),
+            ],
+        )
+        self.assertIn("2 movies are split into 2 chunks and enqueued", out.getvalue())
+        self.assertTrue(JobState.objects.get(name=JobState.UPDATE_WATCH_DATA).is_run_unfinished)
+
+    @patch("moviesapp.management.commands.update_watch_data.get_watch_data")
+    @override_settings(JOB_CHECKPOINT_INTERVAL=1)
+    def test_update_watch_data_resume(self, mock_get_watch_data):
+        """Test that movies updated by an unfinished run are skipped when the run is resumed."""
+        Provider.objects.create(id=8, name="Netflix")
+        movie_older = Movie.objects.create(
+            tmdb_id=604, title="Older movie", imdb_id="tt0000001", release_date="1990-01-01"
+        )
+        mock_get_watch_data.side_effect = [[{"provider_id": 8, "country": "US"}], HTTPError("API Error")]
+
+        with self.assertRaises(HTTPError):
+            call_command("update_watch_data", stdout=StringIO())
+
+        job_state = JobState.objects.get(name=JobState.UPDATE_WATCH_DATA)
+        self.assertEqual(job_state.last_movie_id, self.movie.pk)
+        self.assertEqual(job_state.updated, 1)
+
+        mock_get_watch_data.side_effect = None
+        mock_get_watch_data.return_value = [{"provider_id": 8, "country": "US"}]
+        mock_get_watch_data.reset_mock()
+        out = StringIO()
+        call_command("update_watch_data", "--resume", stdout=out)
+
+        mock_get_watch_data.assert_called_once_with(movie_older.tmdb_id)
+        self.assertIn(f"Resuming run {job_state.run_id}, 1 movies were processed", out.getvalue())
+        job_state.refresh_from_db()
+        self.assertFalse(job_state.is_run_unfinished)
+        self.assertEqual(job_state.processed, 2)
+
     @patch("moviesapp.management.commands.update_watch_data.get_watch_data")
     def test_update_watch_data_no_watch_data_obtained(self, mock_get_watch_data):
         """Test when no watch data is obtained from API."""
@@ -383,6 +904,9 @@ class UpdateWatchDataCommandTestCase(TestCase):
 
         # Should skip the movie and continue
         mock_get_watch_data.assert_called_with(self.movie.tmdb_id)
+        # A movie without providers is not an error
+        job_state = JobState.objects.get(name=JobState.UPDATE_WATCH_DATA)
+        self.assertEqual((job_state.processed, job_state.updated, job_state.errors), (1, 0, 0))
 
     @patch("moviesapp.management.commands.update_watch_data.get_watch_data")
     def test_update_watch_data_remove_no_longer_available_providers(self, mock_get_watch_data):
@@ -419,13 +943,26 @@ class UpdateWatchDataCommandTestCase(TestCase):
         mock_get_watch_data.assert_called_with(self.movie.tmdb_id)
 
     @patch("moviesapp.management.commands.update_watch_data.get_watch_data")
-    @patch("moviesapp.management.commands.update_watch_data.settings")
+    def test_update_watch_data_query_count(self, mock_get_watch_data):
+        """Test that the number of queries does not depend on the number of provider records."""
+        for provider_id in range(1, 11):
+            Provider.objects.create(id=provider_id, name=f"Provider {provider_id}")
+        for provider_id in range(1, 6):
+            ProviderRecord.objects.create(movie=self.movie, provider_id=provider_id, country="US")
+        mock_get_watch_data.return_value = [{"provider_id": i, "country": "US"} for i in range(4, 11)]
+
+        with CaptureQueriesContext(connection) as context:
+            call_command("update_watch_data", self.movie.pk, stdout=StringIO())
+
+        # Movie check, movies, providers, last movie, provider records, delete, insert, movie update
+        self.assertEqual(len(context.captured_queries), 8)
+        self.assertEqual(sorted(self.movie.provider_records.values_list("provider_id", flat=True)), list(range(4, 11)))
+
+    @patch("moviesapp.management.commands.update_watch_data.get_watch_data")
+    @override_settings(DEBUG=False)
     @patch("moviesapp.management.commands.update_watch_data.capture_exception")
-    def test_update_watch_data_provider_not_found_error_production(
-        self, mock_capture, mock_settings, mock_get_watch_data
-    ):
+    def test_update_watch_data_provider_not_found_error_production(self, mock_capture, mock_get_watch_data):
         """Test handling ProviderNotFoundError in production mode."""
-        mock_settings.DEBUG = False
         mock_get_watch_data.return_value = [{"provider_id": 999, "country": "US"}]
 
         # Mock save_watch_data to raise ProviderNotFoundError
@@ -439,10 +976,9 @@ class UpdateWatchDataCommandTestCase(TestCase):
             mock_capture.assert_called_once()
 
     @patch("moviesapp.management.commands.update_watch_data.get_watch_data")
-    @patch("moviesapp.management.commands.update_watch_data.settings")
-    def test_update_watch_data_provider_not_found_error_debug(self, mock_settings, mock_get_watch_data):
+    @override_settings(DEBUG=True)
+    def test_update_watch_data_provider_not_found_error_debug(self, mock_get_watch_data):
         """Test handling ProviderNotFoundError in debug mode."""
-        mock_settings.DEBUG = True
         mock_get_watch_data.return_value = [{"provider_id": 999, "country": "US"}]
 
         # Mock save_watch_data to raise ProviderNotFoundError
@@ -467,62 +1003,278 @@ class UpdateWatchDataCommandTestCase(TestCase):
             # get_watch_data should not be called
             mock_get_watch_data.assert_not_called()
 
+    @patch("moviesapp.management.commands.update_watch_data.get_watch_data")
+    def test_update_watch_data_workers(self, mock_get_watch_data):
+        """Test loading watch data in a thread pool."""
+        Provider.objects.create(id=8, name="Netflix")
+        movies = [self.movie] + [
+            Movie.objects.create(
+                tmdb_id=604 + i,
+                title=f"Movie {i}",
+                title_original=f"Movie {i}",
+                imdb_id=f"tt000000{i}",
+                release_date="2000-01-01",
+            )
+            for i in range(3)
+        ]
+        mock_get_watch_data.return_value = [{"provider_id": 8, "country": "US"}]
 
+        out = StringIO()
+        call_command("update_watch_data", "--workers", "3", stdout=out)
+
+        self.assertEqual(mock_get_watch_data.call_count, 4)
+        for movie in movies:
+            self.assertTrue(ProviderRecord.objects.filter(movie=movie, provider_id=8, country="US").exists())
+
+    def test_update_watch_data_invalid_workers(self):
+        """Test that the number of workers must be positive."""
+        with self.assertRaises(SystemExit):
+            call_command("update_watch_data", "--workers", "0", stdout=StringIO(), stderr=StringIO())
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
 class DownloadProviderLogosCommandTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.img_dir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.img_dir.cleanup)
+        self.settings_override = override_settings(PROVIDERS_IMG_DIR=self.img_dir.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    @requests_mock.Mocker(kw="req_mock")
     @patch("moviesapp.management.commands.download_provider_logos.get_tmdb_providers")
-    @patch("moviesapp.management.commands.download_provider_logos.wget.download")
-    @patch("moviesapp.management.commands.download_provider_logos.exists")
-    def test_download_provider_logos_success(self, mock_exists, mock_wget_download, mock_get_tmdb_providers):
+    def test_download_provider_logos_success(self, mock_get_tmdb_providers, req_mock):
         """Test successful provider logos download."""
         mock_get_tmdb_providers.return_value = [
             {
                 "provider_id": 8,
                 "provider_name": "Netflix",
-                "logo_path": "/t/p/original/t2yyOv40HZeVlLjYsCsPHnWLk4W.jpg",
+                "logo_path": "/t2yyOv40HZeVlLjYsCsPHnWLk4W.jpg",
             },
             {
                 "provider_id": 9,
                 "provider_name": "Amazon Prime Video",
-                "logo_path": "/t/p/original/68MNrwlkpF7WnmNPXLah69CR5cb.jpg",
+                "logo_path": "/68MNrwlkpF7WnmNPXLah69CR5cb.jpg",
             },
         ]
-        mock_exists.return_value = False  # Simulate files don't exist, so download should happen
+        req_mock.get(settings.TMDB_PROVIDER_BASE_URL + "t2yyOv40HZeVlLjYsCsPHnWLk4W.jpg", content=b"netflix")
+        req_mock.get(settings.TMDB_PROVIDER_BASE_URL + "68MNrwlkpF7WnmNPXLah69CR5cb.jpg", content=b"amazon")
 
         out = StringIO()
         call_command("download_provider_logos", stdout=out)
 
-        # Check that wget.download was called for each provider
-        self.assertEqual(mock_wget_download.call_count, 2)
+        self.assertEqual(req_mock.call_count, 2)
+        with open(join(self.img_dir.name, "8.jpg"), "rb") as f:
+            self.assertEqual(f.read(), b"netflix")
+        with open(join(self.img_dir.name, "9.jpg"), "rb") as f:
+            self.assertEqual(f.read(), b"amazon")
 
+    @requests_mock.Mocker(kw="req_mock")
     @patch("moviesapp.management.commands.download_provider_logos.get_tmdb_providers")
-    @patch("moviesapp.management.commands.download_provider_logos.wget.download")
-    def test_download_provider_logos_no_providers(self, mock_wget_download, mock_get_tmdb_providers):
+    def test_download_provider_logos_existing_logo(self, mock_get_tmdb_providers, req_mock):
+        """Test that existing logos are not downloaded again if they are not changed."""
+        mock_get_tmdb_providers.return_value = [
+            {"provider_id": 8, "provider_name": "Netflix", "logo_path": "/t2yyOv40HZeVlLjYsCsPHnWLk4W.jpg"}
+        ]
+        with open(join(self.img_dir.name, "8.jpg"), "wb") as f:
+            f.write(b"netflix")
+        cache.set(ETAGS_CACHE_KEY, {"8": '"netflix-etag"'})
+        req_mock.get(settings.TMDB_PROVIDER_BASE_URL + "t2yyOv40HZeVlLjYsCsPHnWLk4W.jpg", status_code=304)
+
+        out = StringIO()
+        call_command("download_provider_logos", stdout=out)
+
+        headers = req_mock.last_request.headers
+        self.assertEqual(headers["If-None-Match"], '"netflix-etag"')
+        self.assertIn("If-Modified-Since", headers)
+        with open(join(self.img_dir.name, "8.jpg"), "rb") as f:
+            self.assertEqual(f.read(), b"netflix")
+        self.assertIn("0 logos downloaded, 1 logos are not changed", out.getvalue())
+
+    @requests_mock.Mocker(kw="req_mock")
+    @patch("moviesapp.management.commands.download_provider_logos.get_tmdb_providers")
+    def test_download_provider_logos_changed_logo(self, mock_get_tmdb_providers, req_mock):
+        """Test that changed logos are downloaded again and their ETags are saved."""
+        mock_get_tmdb_providers.return_value = [
+            {"provider_id": 8, "provider_name": "Netflix", "logo_path": "/t2yyOv40HZeVlLjYsCsPHnWLk4W.jpg"}
+        ]
+        with open(join(self.img_dir.name, "8.jpg"), "wb") as f:
+            f.write(b"old netflix")
+        req_mock.get(
+            settings.TMDB_PROVIDER_BASE_URL + "t2yyOv40HZeVlLjYsCsPHnWLk4W.jpg",
+            content=b"netflix",
+            headers={"ETag": '"netflix-etag"', "Last-Modified": "Wed, 01 May 2024 10:00:00 GMT"},
+        )
+
+        call_command("download_provider_logos", stdout=StringIO())
+
+        file_path = join(self.img_dir.name, "8.jpg")
+        with open(file_path, "rb") as f:
+            self.assertEqual(f.read(), b"netflix")
+        self.assertEqual(getmtime(file_path), datetime(2024, 5, 1, 10, tzinfo=timezone.utc).timestamp())
+        self.assertEqual(cache.get(ETAGS_CACHE_KEY), {"8": '"netflix-etag"'})
+        # Nothing but logos is saved to the public directory
+        self.assertEqual(listdir(self.img_dir.name), ["8.jpg"])
+
+    @requests_mock.Mocker(kw="req_mock")
+    @patch("moviesapp.management.commands.download_provider_logos.get_tmdb_providers")
+    @override_settings(PROVIDER_LOGO_SPRITE_SIZE=10)
+    def test_download_provider_logos_sprite(self, mock_get_tmdb_providers, req_mock):
+        """Test building the sprite image with all logos."""
+        mock_get_tmdb_providers.return_value = [
+            {
+                "provider_id": provider_id,
+                "provider_name": f"Provider {provider_id}",
+                "logo_path": f"/{provider_id}.png",
+            }
+            for provider_id in (8, 9, 10)
+        ]
+        for provider_id, size in ((8, (20, 20)), (9, (20, 10)), (10, (10, 10))):
+            logo = BytesIO()
+            Image.new("RGBA", size, "red").save(logo, "PNG")
+            req_mock.get(f"{settings.TMDB_PROVIDER_BASE_URL}{provider_id}.png", content=logo.getvalue())
+
+        call_command("download_provider_logos", "--sprite", stdout=StringIO())
+
+        with Image.open(join(self.img_dir.name, "sprite.jpg")) as sprite:
+            self.assertEqual(sprite.size, (20, 20))
+        with open(join(self.img_dir.name, "sprite.json"), encoding="utf-8") as f:
+            self.assertEqual(
+                json.load(f),
+                {
+                    "8": {"x": 0, "y": 0, "width": 10, "height": 10},
+                    "9": {"x": 10, "y": 0, "width": 10, "height": 5},
+                    "10": {"x": 0, "y": 10, "width": 10, "height": 10},
+                },
+            )
+
+    @requests_mock.Mocker(kw="req_mock")
+    @patch("moviesapp.management.commands.download_provider_logos.get_tmdb_providers")
+    def test_download_provider_logos_no_providers(self, mock_get_tmdb_providers, req_mock):
         """Test download command with no providers."""
         mock_get_tmdb_providers.return_value = []
 
         out = StringIO()
         call_command("download_provider_logos", stdout=out)
 
-        # Should not call wget.download if no providers exist
-        self.assertFalse(mock_wget_download.called)
-        mock_wget_download.assert_not_called()
+        # Should not download anything if no providers exist
+        self.assertFalse(req_mock.called)
 
+    @requests_mock.Mocker(kw="req_mock")
     @patch("moviesapp.management.commands.download_provider_logos.get_tmdb_providers")
-    @patch("moviesapp.management.commands.download_provider_logos.wget.download")
-    @patch("moviesapp.management.commands.download_provider_logos.exists")
-    def test_download_provider_logos_download_error(self, mock_exists, mock_wget_download, mock_get_tmdb_providers):
+    def test_download_provider_logos_download_error(self, mock_get_tmdb_providers, req_mock):
         """Test handling download errors."""
         mock_get_tmdb_providers.return_value = [
             {
                 "provider_id": 8,
                 "provider_name": "Netflix",
-                "logo_path": "/t/p/original/t2yyOv40HZeVlLjYsCsPHnWLk4W.jpg",
+                "logo_path": "/t2yyOv40HZeVlLjYsCsPHnWLk4W.jpg",
             }
         ]
-        mock_exists.return_value = False
-        mock_wget_download.side_effect = Exception("Download failed")
+        req_mock.get(settings.TMDB_PROVIDER_BASE_URL + "t2yyOv40HZeVlLjYsCsPHnWLk4W.jpg", status_code=404)
 
         out = StringIO()
         # The command will raise the exception - it doesn't handle errors gracefully
-        with self.assertRaises(Exception):
+        with self.assertRaises(HTTPError):
             call_command("download_provider_logos", stdout=out)
+        self.assertFalse(exists(join(self.img_dir.name, "8.jpg")))
+
+
+class UserStatsCommandsTestCase(TestCase):
+    def setUp(self):
+        List.objects.get_or_create(id=List.WATCHED, defaults={"name": "Watched", "key_name": "watched"})
+        self.user = User.objects.create_user(username="testuser", email="test@example.com", password="password")
+        self.movie = Movie.objects.create(
+            tmdb_id=603, title="The Matrix", title_original="The Matrix", imdb_id="tt0133093", genre="Action"
+        )
+        Record.objects.create(movie=self.movie, user=self.user, list_id=List.WATCHED)
+
+    def test_rebuild_user_stats(self):
+        """Test rebuilding user stats."""
+        call_command("rebuild_user_stats", stdout=StringIO(), stderr=StringIO())
+
+        stats = UserStats.objects.get(user=self.user, year=UserStats.ALL_TIME)
+        self.assertEqual(stats.movies_watched, 1)
+        self.assertEqual(stats.genres, {"Action": 1})
+
+    def test_rebuild_user_stats_nonexistent_user_id(self):
+        """Test rebuilding user stats with non-existent user ID."""
+        with self.assertRaises(SystemExit):
+            call_command("rebuild_user_stats", "999999", stdout=StringIO(), stderr=StringIO())
+
+    def test_check_user_stats(self):
+        """Test checking user stats which match a full recompute."""
+        UserStats.rebuild(self.user)
+
+        out = StringIO()
+        call_command("check_user_stats", stdout=out, stderr=StringIO())
+
+        self.assertIn("Stats of all users match", out.getvalue())
+
+    def test_check_user_stats_mismatch(self):
+        """Test checking user stats which don't match a full recompute."""
+        UserStats.rebuild(self.user)
+        UserStats.objects.filter(user=self.user).update(movies_watched=5)
+
+        err = StringIO()
+        call_command("check_user_stats", stdout=StringIO(), stderr=err)
+
+        self.assertIn("all time - movies_watched: 5 != 1", err.getvalue())
+        self.assertEqual(UserStats.objects.get(user=self.user, year=UserStats.ALL_TIME).movies_watched, 5)
+
+    def test_check_user_stats_rebuild(self):
+        """Test rebuilding user stats which don't match a full recompute."""
+        UserStats.rebuild(self.user)
+        UserStats.objects.filter(user=self.user).update(movies_watched=5)
+
+        call_command("check_user_stats", "-r", stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual(UserStats.objects.get(user=self.user, year=UserStats.ALL_TIME).movies_watched, 1)
+
+    @patch("moviesapp.management.commands.update_movie_data.load_movie_data")
+    def test_update_movie_data_invalidates_user_stats(self, mock_load_movie_data):
+        """Test that user stats are invalidated when movie data which affects them is changed."""
+        UserStats.rebuild(self.user)
+        mock_load_movie_data.return_value = {"genre": "Action, Sci-Fi", "imdb_rating": "8.7"}
+
+        call_command("update_movie_data", stdout=StringIO(), stderr=StringIO())
+
+        self.assertFalse(UserStats.objects.filter(user=self.user).exists())
+
+
+class BuildTimelinesCommandTestCase(TestCase):
+    def setUp(self):
+        self.follower = User.objects.create_user(username="follower", password="password")
+        self.followed = User.objects.create_user(username="followed", password="password")
+        Follow.objects.create(follower=self.follower, followed=self.followed)
+        action = Action.objects.create(id=Action.ADDED_MOVIE, name="Added Movie")
+        movie = Movie.objects.create(tmdb_id=603, title="The Matrix", title_original="The Matrix", imdb_id="tt0133093")
+        self.action_record = ActionRecord.objects.create(user=self.followed, action=action, movie=movie)
+        # Make the timeline cold
+        User.objects.update(timeline_built=False)
+        TimelineEntry.objects.all().delete()
+
+    def test_build_timelines(self):
+        """Test building timelines."""
+        call_command("build_timelines", stdout=StringIO(), stderr=StringIO())
+
+        self.assertTrue(User.objects.get(pk=self.follower.pk).timeline_built)
+        self.assertEqual(
+            list(TimelineEntry.objects.filter(owner=self.follower).values_list("action_record_id", flat=True)),
+            [self.action_record.pk],
+        )
+
+    def test_build_timelines_cold_only(self):
+        """Test building only timelines which are not built yet."""
+        User.objects.filter(pk=self.follower.pk).update(timeline_built=True)
+
+        call_command("build_timelines", "-c", stdout=StringIO(), stderr=StringIO())
+
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertTrue(User.objects.get(pk=self.followed.pk).timeline_built)
+
+    def test_build_timelines_nonexistent_user_id(self):
+        """Test building timelines with non-existent user ID."""
+        with self.assertRaises(SystemExit):
+            call_command("build_timelines", "999999", stdout=StringIO(), stderr=StringIO())
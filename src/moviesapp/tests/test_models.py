@@ -4,13 +4,25 @@
 
 import json
 import random
-from datetime import date, time, timedelta
+from datetime import date, datetime, time, timedelta, timezone
 from unittest.mock import Mock
 
 from django.test import TestCase
 from django.utils.timezone import now
 
-from moviesapp.models import Action, ActionRecord, List, Movie, Provider, ProviderRecord, Record, User, UserAnonymous
+from moviesapp.exceptions import ProviderNotFoundError
+from moviesapp.models import (
+    Action,
+    ActionRecord,
+    List,
+    Movie,
+    Provider,
+    ProviderRecord,
+    Record,
+    User,
+    UserAnonymous,
+    UserStats,
+)
 from moviesapp.types import WatchDataRecord
 
 from .base import BaseTestCase
@@ -157,6 +169,21 @@ class MovieModelTestCase(BaseTestCase):
 
         self.movie.save_watch_data([watch_data])
 
+    def test_save_watch_data_provider_not_found(self):
+        """Test that records of existing providers are saved when a provider is not found."""
+        Provider.objects.create(id=9998, name="Provider")
+        watch_data = [
+            WatchDataRecord(provider_id=9998, country="US"),
+            WatchDataRecord(provider_id=9999, country="US"),
+        ]
+
+        with self.assertRaises(ProviderNotFoundError):
+            self.movie.save_watch_data(watch_data)
+
+        self.assertEqual(list(self.movie.provider_records.values_list("provider_id", flat=True)), [9998])
+        self.movie.refresh_from_db()
+        self.assertIsNone(self.movie.watch_data_update_date)
+
     def test_tmdb_url_property(self):
         """Test tmdb_url property."""
         url = self.movie.tmdb_url
@@ -274,6 +301,154 @@ class RecordModelTestCase(BaseTestCase):
             duplicate_record.save()
 
 
+class UserStatsModelTestCase(TestCase):
+    """Test UserStats model."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.user = User.objects.create_user(username="stats_user", password="testpass123")
+        List.objects.create(id=List.WATCHED, name="Watched", key_name="watched")
+        List.objects.create(id=List.TO_WATCH, name="To Watch", key_name="to_watch")
+        self.matrix = Movie.objects.create(
+            title="The Matrix",
+            title_original="The Matrix",
+            imdb_id="tt0133093",
+            tmdb_id=603,
+            runtime=time(2, 16),
+            release_date=date(1999, 3, 30),
+            genre="Action, Sci-Fi",
+            director="Lana Wachowski, Lilly Wachowski",
+        )
+        self.dogma = Movie.objects.create(
+            title="Dogma",
+            title_original="Dogma",
+            imdb_id="tt0120655",
+            tmdb_id=1832,
+            runtime=time(2, 10),
+            release_date=date(1999, 11, 12),
+            genre="Comedy",
+            director="Kevin Smith",
+        )
+        self.record = Record.objects.create(user=self.user, movie=self.matrix, list_id=List.WATCHED, rating=5)
+        Record.objects.filter(pk=self.record.pk).update(date=datetime(2023, 5, 10, 12, tzinfo=timezone.utc))
+        self.record.refresh_from_db()
+
+    def _assert_consistent(self):
+        """Assert that user stats snapshots match a full recompute."""
+        self.assertEqual(UserStats.get_inconsistencies(self.user), [])
+
+    def test_rebuild(self):
+        """Test rebuilding user stats snapshots."""
+        snapshots = UserStats.rebuild(self.user)
+
+        self.assertEqual(set(snapshots), {UserStats.ALL_TIME, 2023})
+        stats = UserStats.objects.get(user=self.user, year=UserStats.ALL_TIME)
+        self.assertEqual(stats.movies_watched, 1)
+        self.assertEqual(stats.movies_to_watch, 0)
+        self.assertEqual(stats.runtime, 2 * 3600 + 16 * 60)
+        self.assertEqual(stats.ratings, {"5": 1})
+        self.assertEqual(stats.months, {"5": 1})
+        self.assertEqual(stats.release_years, {"1999": 1})
+        self.assertEqual(stats.genres, {"Action": 1, "Sci-Fi": 1})
+        self.assertEqual(stats.directors, {"Lana Wachowski": 1, "Lilly Wachowski": 1})
+        self._assert_consistent()
+
+    def test_snapshots_are_not_created_on_record_change(self):
+        """Test that snapshots are only built on first use."""
+        Record.objects.create(user=self.user, movie=self.dogma, list_id=List.TO_WATCH)
+
+        self.assertFalse(UserStats.objects.filter(user=self.user).exists())
+
+    def test_record_created(self):
+        """Test that snapshots are updated when a record is created."""
+        UserStats.rebuild(self.user)
+
+        Record.objects.create(user=self.user, movie=self.dogma, list_id=List.TO_WATCH)
+
+        stats = UserStats.objects.get(user=self.user, year=UserStats.ALL_TIME)
+        self.assertEqual(stats.movies_watched, 1)
+        self.assertEqual(stats.movies_to_watch, 1)
+        self._assert_consistent()
+
+    def test_record_changed(self):
+        """Test that snapshots are updated when a record is changed."""
+        UserStats.rebuild(self.user)
+        record = Record.objects.create(user=self.user, movie=self.dogma, list_id=List.TO_WATCH)
+
+        record.list_id = List.WATCHED
+        record.rating = 3
+        record.save()
+        Record.objects.filter(pk=self.record.pk).update(watched_in_4k=True, rating=4)
+
+        stats = UserStats.objects.get(user=self.user, year=UserStats.ALL_TIME)
+        self.assertEqual(stats.movies_watched, 2)
+        self.assertEqual(stats.movies_to_watch, 0)
+        self.assertEqual(stats.ratings, {"3": 1, "4": 1})
+        self.assertEqual(stats.quality, {"hd": 1, "fullHd": 1, "fourK": 1})
+        self.assertEqual(stats.genres, {"Action": 1, "Sci-Fi": 1, "Comedy": 1})
+        self._assert_consistent()
+
+    def test_record_date_changed(self):
+        """Test that snapshots are updated when a record is moved to another year."""
+        UserStats.rebuild(self.user)
+
+        Record.objects.filter(pk=self.record.pk).update(date=datetime(2022, 2, 3, 12, tzinfo=timezone.utc))
+
+        self.assertEqual(UserStats.objects.get(user=self.user, year=2023).movies_watched, 0)
+        self.assertEqual(UserStats.objects.get(user=self.user, year=2022).movies_watched, 1)
+        self._assert_consistent()
+
+    def test_record_deleted(self):
+        """Test that snapshots are updated when a record is deleted."""
+        UserStats.rebuild(self.user)
+
+        self.record.delete()
+
+        stats = UserStats.objects.get(user=self.user, year=UserStats.ALL_TIME)
+        self.assertEqual(stats.movies_watched, 0)
+        self.assertEqual(stats.runtime, 0)
+        self.assertEqual(stats.genres, {})
+        self._assert_consistent()
+
+    def test_record_order_changed(self):
+        """Test that changes of fields which don't affect stats don't touch snapshots."""
+        UserStats.rebuild(self.user)
+
+        with self.assertNumQueries(4):
+            # Savepoint, select of the saved record, update and savepoint release
+            self.record.order = 5
+            self.record.save()
+
+    def test_get_inconsistencies(self):
+        """Test finding inconsistencies between snapshots and a full recompute."""
+        UserStats.rebuild(self.user)
+        UserStats.objects.filter(user=self.user, year=UserStats.ALL_TIME).update(movies_watched=10)
+
+        self.assertEqual(UserStats.get_inconsistencies(self.user), ["all time - movies_watched: 10 != 1"])
+
+    def test_invalidate_for_movie(self):
+        """Test invalidating snapshots of users with a movie."""
+        UserStats.rebuild(self.user)
+
+        UserStats.invalidate_for_movie(self.dogma.pk)
+        self.assertTrue(UserStats.objects.filter(user=self.user).exists())
+
+        UserStats.invalidate_for_movie(self.matrix.pk)
+        self.assertFalse(UserStats.objects.filter(user=self.user).exists())
+
+    def test_timezone_changed(self):
+        """Test that snapshots are removed when the time zone of the user is changed."""
+        UserStats.rebuild(self.user)
+
+        self.user.first_name = "Stats"
+        self.user.save()
+        self.assertTrue(UserStats.objects.filter(user=self.user).exists())
+
+        self.user.timezone = "Pacific/Auckland"
+        self.user.save()
+        self.assertFalse(UserStats.objects.filter(user=self.user).exists())
+
+
 class ActionRecordModelTestCase(BaseTestCase):
     """Test ActionRecord model."""
 
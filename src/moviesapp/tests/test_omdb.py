@@ -91,9 +91,10 @@ class OmdbTestCase(TestCase):
         self.assertIsNone(processed_data["country"])
         self.assertIsNone(processed_data["imdb_rating"])
 
-    @patch("moviesapp.omdb.omdb.requests.get")
-    def test_get_omdb_movie_data_success(self, mock_get):
+    @patch("moviesapp.omdb.omdb.get_session")
+    def test_get_omdb_movie_data_success(self, mock_get_session):
         """Test get_omdb_movie_data successful request."""
+        mock_get = mock_get_session.return_value.get
         # Set up mock response
         mock_response = MagicMock()
         mock_response.json.return_value = self.sample_omdb_response
@@ -111,9 +112,10 @@ class OmdbTestCase(TestCase):
         self.assertEqual(result["writer"], "John Writer")
         self.assertEqual(result["director"], "Jane Director")
 
-    @patch("moviesapp.omdb.omdb.requests.get")
-    def test_get_omdb_movie_data_not_found(self, mock_get):
+    @patch("moviesapp.omdb.omdb.get_session")
+    def test_get_omdb_movie_data_not_found(self, mock_get_session):
         """Test get_omdb_movie_data when movie not found."""
+        mock_get = mock_get_session.return_value.get
         # Set up mock response for movie not found
         mock_response = MagicMock()
         mock_response.json.return_value = {"Response": "False", "Error": "Movie not found!"}
@@ -125,9 +127,10 @@ class OmdbTestCase(TestCase):
 
         self.assertIn("Movie not found!", str(context.exception))
 
-    @patch("moviesapp.omdb.omdb.requests.get")
-    def test_get_omdb_movie_data_limit_reached(self, mock_get):
+    @patch("moviesapp.omdb.omdb.get_session")
+    def test_get_omdb_movie_data_limit_reached(self, mock_get_session):
         """Test get_omdb_movie_data when request limit reached."""
+        mock_get = mock_get_session.return_value.get
         # Set up mock response for limit reached
         mock_response = MagicMock()
         mock_response.json.return_value = {"Response": "False", "Error": "Request limit reached!"}
@@ -137,10 +140,11 @@ class OmdbTestCase(TestCase):
         with self.assertRaises(OmdbLimitReachedError):
             get_omdb_movie_data("tt1234567")
 
-    @patch("moviesapp.omdb.omdb.requests.get")
+    @patch("moviesapp.omdb.omdb.get_session")
     @override_settings(DEBUG=True)
-    def test_get_omdb_movie_data_request_exception_debug(self, mock_get):
+    def test_get_omdb_movie_data_request_exception_debug(self, mock_get_session):
         """Test get_omdb_movie_data when RequestException occurs in DEBUG mode."""
+        mock_get = mock_get_session.return_value.get
         # Set up mock to raise RequestException
         mock_get.side_effect = RequestException("Network error")
 
@@ -149,10 +153,11 @@ class OmdbTestCase(TestCase):
             get_omdb_movie_data("tt1234567")
 
     @patch("moviesapp.omdb.omdb.capture_exception")
-    @patch("moviesapp.omdb.omdb.requests.get")
+    @patch("moviesapp.omdb.omdb.get_session")
     @override_settings(DEBUG=False)
-    def test_get_omdb_movie_data_request_exception_production(self, mock_get, mock_capture):
+    def test_get_omdb_movie_data_request_exception_production(self, mock_get_session, mock_capture):
         """Test get_omdb_movie_data when RequestException occurs in production."""
+        mock_get = mock_get_session.return_value.get
         # Set up mock to raise RequestException
         exception = RequestException("Network error")
         mock_get.side_effect = exception
@@ -164,9 +169,10 @@ class OmdbTestCase(TestCase):
         # Should capture the exception
         mock_capture.assert_called_once_with(exception)
 
-    @patch("moviesapp.omdb.omdb.requests.get")
-    def test_get_omdb_movie_data_invalid_response_format(self, mock_get):
+    @patch("moviesapp.omdb.omdb.get_session")
+    def test_get_omdb_movie_data_invalid_response_format(self, mock_get_session):
         """Test get_omdb_movie_data with invalid JSON response."""
+        mock_get = mock_get_session.return_value.get
         # Set up mock response with invalid JSON
         mock_response = MagicMock()
         mock_response.json.side_effect = ValueError("Invalid JSON")
@@ -176,9 +182,10 @@ class OmdbTestCase(TestCase):
         with self.assertRaises(ValueError):
             get_omdb_movie_data("tt1234567")
 
-    @patch("moviesapp.omdb.omdb.requests.get")
-    def test_get_omdb_movie_data_custom_error(self, mock_get):
+    @patch("moviesapp.omdb.omdb.get_session")
+    def test_get_omdb_movie_data_custom_error(self, mock_get_session):
         """Test get_omdb_movie_data with custom error message."""
+        mock_get = mock_get_session.return_value.get
         # Set up mock response with custom error
         mock_response = MagicMock()
         mock_response.json.return_value = {"Response": "False", "Error": "Custom error message"}
@@ -1,12 +1,26 @@
 """Test tasks."""
 
+from datetime import timedelta
 from unittest.mock import patch
 
+from django.conf import settings
 from django.test import override_settings
+from django.utils.timezone import now
 
+from movies import celery_app
 from moviesapp.exceptions import ProviderNotFoundError
-from moviesapp.models import Movie
-from moviesapp.tasks import load_and_save_watch_data_task
+from moviesapp.models import JobState, Movie
+from moviesapp.omdb.exceptions import OmdbRequestError
+from moviesapp.tasks import (
+    fail_distributed_refresh_task,
+    finish_distributed_refresh_task,
+    load_and_save_watch_data_task,
+    load_movie_extra_data_task,
+    refresh_movies_task,
+    refresh_tmdb_catalog_task,
+    refresh_tmdb_catalogs_task,
+    rolling_refresh_task,
+)
 
 from .base import BaseTestCase
 
@@ -18,7 +32,11 @@ class TasksTestCase(BaseTestCase):
         """Set up test environment."""
         super().setUp()
         self.movie = Movie.objects.create(
-            tmdb_id=123, title="Test Movie", title_original="Test Movie Original", release_date="2020-01-01"
+            tmdb_id=123,
+            imdb_id="tt0000123",
+            title="Test Movie",
+            title_original="Test Movie Original",
+            release_date="2020-01-01",
         )
 
     @patch("moviesapp.tasks.get_watch_data")
@@ -81,3 +99,242 @@ class TasksTestCase(BaseTestCase):
 
         # get_watch_data should not be called if movie doesn't exist
         mock_get_watch_data.assert_not_called()
+
+    @patch("moviesapp.tasks.refresh_catalog")
+    def test_refresh_tmdb_catalog_task(self, mock_refresh_catalog):
+        """Test refresh_tmdb_catalog_task."""
+        refresh_tmdb_catalog_task("trending")
+
+        mock_refresh_catalog.assert_called_once_with("trending")
+
+    @patch("moviesapp.tasks.refresh_catalog")
+    def test_refresh_tmdb_catalogs_task(self, mock_refresh_catalog):
+        """Test refresh_tmdb_catalogs_task."""
+        refresh_tmdb_catalogs_task()
+
+        mock_refresh_catalog.assert_called_once_with("trending")
+
+    @patch("moviesapp.tasks.UserStats.invalidate_for_movie")
+    @patch("moviesapp.tasks.get_omdb_movie_data")
+    def test_load_movie_extra_data_task(self, mock_get_omdb_movie_data, mock_invalidate):
+        """Test load_movie_extra_data_task."""
+        self.movie.data_status = Movie.DATA_LOADING
+        self.movie.save()
+        mock_get_omdb_movie_data.return_value = {
+            "writer": "Writer",
+            "director": "Director",
+            "actors": "Actor",
+            "genre": "Drama",
+            "country": "USA",
+            "imdb_rating": "7.5",
+        }
+
+        load_movie_extra_data_task(self.movie.pk)
+
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.data_status, Movie.DATA_LOADED)
+        self.assertEqual(self.movie.director, "Director")
+        self.assertEqual(str(self.movie.imdb_rating), "7.5")
+        mock_get_omdb_movie_data.assert_called_once_with("tt0000123")
+        mock_invalidate.assert_called_once_with(self.movie.pk)
+
+    @patch("moviesapp.tasks.get_omdb_movie_data")
+    @patch("moviesapp.tasks.capture_exception")
+    @override_settings(DEBUG=False)
+    def test_load_movie_extra_data_task_error(self, mock_capture_exception, mock_get_omdb_movie_data):
+        """Test load_movie_extra_data_task when OMDb request fails."""
+        self.movie.data_status = Movie.DATA_LOADING
+        self.movie.save()
+        exception = OmdbRequestError()
+        mock_get_omdb_movie_data.side_effect = exception
+
+        load_movie_extra_data_task(self.movie.pk)
+
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.data_status, Movie.DATA_FAILED)
+        mock_capture_exception.assert_called_once_with(exception)
+
+    @patch("moviesapp.tasks.UserStats.invalidate_for_movie")
+    @patch("moviesapp.tasks.get_omdb_movie_data")
+    def test_load_movie_extra_data_task_keeps_other_fields(self, mock_get_omdb_movie_data, mock_invalidate):
+        """Test that fields saved after the task was enqueued are not overwritten."""
+        stale_movie = Movie.objects.get(pk=self.movie.pk)
+        watch_data_update_date = now()
+        Movie.objects.filter(pk=self.movie.pk).update(watch_data_update_date=watch_data_update_date)
+        mock_get_omdb_movie_data.return_value = {
+            "writer": "Writer",
+            "director": "Director",
+            "actors": "Actor",
+            "genre": "Drama",
+            "country": "USA",
+            "imdb_rating": "7.5",
+        }
+
+        with patch("moviesapp.tasks.Movie.objects.get", return_value=stale_movie):
+            load_movie_extra_data_task(self.movie.pk)
+
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.data_status, Movie.DATA_LOADED)
+        self.assertEqual(self.movie.watch_data_update_date, watch_data_update_date)
+        mock_invalidate.assert_called_once_with(self.movie.pk)
+
+    @patch("moviesapp.tasks.get_omdb_movie_data")
+    @patch("moviesapp.tasks.capture_exception")
+    @override_settings(DEBUG=False)
+    def test_load_movie_extra_data_task_unexpected_error(self, mock_capture_exception, mock_get_omdb_movie_data):
+        """Test that the movie is marked as failed if the OMDb data can't be saved."""
+        self.movie.data_status = Movie.DATA_LOADING
+        self.movie.save()
+        mock_get_omdb_movie_data.return_value = {
+            "writer": "Writer",
+            "director": "Director",
+            "actors": "Actor",
+            "genre": "Drama",
+            "country": "USA",
+            "imdb_rating": "N/A",
+        }
+
+        load_movie_extra_data_task(self.movie.pk)
+
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.data_status, Movie.DATA_FAILED)
+        self.assertIsNone(self.movie.director)
+        mock_capture_exception.assert_called_once()
+
+    @patch("moviesapp.tasks.capture_exception")
+    @override_settings(DEBUG=False)
+    def test_load_movie_extra_data_task_movie_not_found(self, mock_capture_exception):
+        """Test load_movie_extra_data_task when the movie doesn't exist."""
+        load_movie_extra_data_task(self.movie.pk + 1)
+
+        mock_capture_exception.assert_called_once()
+        self.assertIsInstance(mock_capture_exception.call_args.args[0], Movie.DoesNotExist)
+
+    @patch("moviesapp.management.commands.update_movie_data.load_movie_data")
+    def test_refresh_movies_task(self, mock_load_movie_data):
+        """Test that a chunk of movies is refreshed without tracking the run."""
+        Movie.objects.create(tmdb_id=124, imdb_id="tt0000124", title="Other Movie", title_original="Other Movie")
+        mock_load_movie_data.return_value = {"title": "Updated Movie", "imdb_rating": "7.5"}
+
+        result = refresh_movies_task("update_movie_data", [self.movie.pk], {})
+
+        self.assertEqual(result, {"processed": 1, "updated": 1, "errors": 0})
+        mock_load_movie_data.assert_called_once_with(self.movie.tmdb_id)
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.title, "Updated Movie")
+        self.assertFalse(JobState.objects.exists())
+
+    def test_finish_distributed_refresh_task(self):
+        """Test that results of the chunks are saved to the job state and the watermark is set."""
+        job_state = JobState.start_run(JobState.UPDATE_MOVIE_DATA)
+        results = [{"processed": 2, "updated": 1, "errors": 0}, {"processed": 1, "updated": 0, "errors": 1}]
+
+        result = finish_distributed_refresh_task(
+            results, JobState.UPDATE_MOVIE_DATA, str(job_state.run_id), JobState.UPDATE_MOVIE_DATA
+        )
+
+        self.assertEqual(result, {"processed": 3, "updated": 1, "errors": 1})
+        job_state.refresh_from_db()
+        self.assertFalse(job_state.is_run_unfinished)
+        self.assertEqual(job_state.processed, 3)
+        self.assertEqual(job_state.watermark, job_state.run_start_time)
+
+    def test_finish_distributed_refresh_task_newer_run(self):
+        """Test that the job state is not changed if a newer run was started."""
+        job_state = JobState.start_run(JobState.UPDATE_IMDB_RATINGS)
+        run_id = str(job_state.run_id)
+        JobState.start_run(JobState.UPDATE_IMDB_RATINGS)
+
+        finish_distributed_refresh_task(
+            [{"processed": 1, "updated": 1, "errors": 0}], JobState.UPDATE_IMDB_RATINGS, run_id, None
+        )
+
+        job_state.refresh_from_db()
+        self.assertTrue(job_state.is_run_unfinished)
+        self.assertEqual(job_state.processed, 0)
+
+    def _create_movies(self, number):
+        """Create movies with IMDb IDs."""
+        return [
+            Movie.objects.create(
+                tmdb_id=200 + i,
+                imdb_id=f"tt0000{200 + i}",
+                title=f"Movie {i}",
+                title_original=f"Movie {i}",
+                release_date="2020-01-01",
+            )
+            for i in range(number)
+        ]
+
+    @override_settings(ROLLING_REFRESH={"update_imdb_ratings": {"interval": 60, "shards": 2, "max_movies": 10}})
+    @patch("moviesapp.tasks.refresh_movies_task")
+    def test_rolling_refresh_task(self, mock_refresh_movies_task):
+        """Test that only movies of the next shard are refreshed and shards are processed in turn."""
+        movies = [self.movie, *self._create_movies(4)]
+        movies[1].imdb_id = ""
+        movies[1].save()
+        mock_refresh_movies_task.return_value = {"processed": 2, "updated": 1, "errors": 0}
+
+        result = rolling_refresh_task("update_imdb_ratings")
+        rolling_refresh_task("update_imdb_ratings")
+        rolling_refresh_task("update_imdb_ratings")
+
+        self.assertEqual(result, {"processed": 2, "updated": 1, "errors": 0})
+        shard_ids = [[movie.pk for movie in movies if movie.pk % 2 == shard and movie.imdb_id] for shard in (0, 1)]
+        self.assertEqual(
+            [c.args for c in mock_refresh_movies_task.call_args_list],
+            [("update_imdb_ratings", ids, {}) for ids in (shard_ids[0], shard_ids[1], shard_ids[0])],
+        )
+        self.assertEqual(JobState.objects.get(name="rolling_update_imdb_ratings").last_shard, 0)
+
+    @override_settings(ROLLING_REFRESH={"update_movie_data": {"interval": 60, "shards": 1, "max_movies": 2}})
+    @patch("moviesapp.tasks.refresh_movies_task")
+    def test_rolling_refresh_task_capped(self, mock_refresh_movies_task):
+        """Test that a tick is capped at max_movies."""
+        movies = [self.movie, *self._create_movies(2)]
+        mock_refresh_movies_task.return_value = {"processed": 2, "updated": 0, "errors": 0}
+
+        with self.assertLogs("moviesapp.tasks", "WARNING"):
+            rolling_refresh_task("update_movie_data")
+
+        mock_refresh_movies_task.assert_called_once_with("update_movie_data", [movies[0].pk, movies[1].pk], {})
+
+    @override_settings(ROLLING_REFRESH={"update_watch_data": {"interval": 60, "shards": 1, "max_movies": 10}})
+    @patch("moviesapp.tasks.refresh_movies_task")
+    def test_rolling_refresh_task_watch_data(self, mock_refresh_movies_task):
+        """Test that unreleased movies and movies updated recently are skipped by the watch data refresh."""
+        updated_recently, unreleased, outdated = self._create_movies(3)
+        updated_recently.watch_data_update_date = now()
+        updated_recently.save()
+        unreleased.release_date = None
+        unreleased.save()
+        outdated.watch_data_update_date = now() - timedelta(days=30)
+        outdated.save()
+
+        rolling_refresh_task("update_watch_data")
+
+        mock_refresh_movies_task.assert_called_once_with("update_watch_data", [self.movie.pk, outdated.pk], {})
+
+    @override_settings(ROLLING_REFRESH={"update_movie_data": {"interval": 60, "shards": 1, "max_movies": 10}})
+    @patch("moviesapp.tasks.refresh_movies_task")
+    def test_rolling_refresh_task_empty_shard(self, mock_refresh_movies_task):
+        """Test that nothing is refreshed if the shard is empty."""
+        Movie.objects.all().delete()
+
+        result = rolling_refresh_task("update_movie_data")
+
+        self.assertEqual(result, {"processed": 0, "updated": 0, "errors": 0})
+        mock_refresh_movies_task.assert_not_called()
+
+    def test_refresh_tasks_routing(self):
+        """Test that refresh tasks are routed to separate queues and user-facing tasks are not."""
+        router = celery_app.amqp.router
+        for task in (
+            refresh_movies_task,
+            finish_distributed_refresh_task,
+            fail_distributed_refresh_task,
+        ):
+            self.assertEqual(router.route({}, task.name)["queue"].name, "refresh")
+        self.assertEqual(router.route({}, rolling_refresh_task.name)["queue"].name, "rolling_refresh")
+        self.assertEqual(router.route({}, load_movie_extra_data_task.name)["queue"].name, "celery")
+        self.assertEqual(rolling_refresh_task.soft_time_limit, settings.REFRESH_TASK_SOFT_TIME_LIMIT)
@@ -1,22 +1,34 @@
+from datetime import date
 from unittest.mock import patch
 
 import pytest
 import requests_mock
 import tmdbsimple as tmdb
 from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
 
 from moviesapp.exceptions import TrailerSiteNotFoundError
 from moviesapp.tmdb import (
     TmdbInvalidSearchTypeError,
     TmdbNoImdbIdError,
+    get_changed_movie_ids,
     get_poster_url,
     get_tmdb_movie_data,
+    get_tmdb_movie_data_with_watch_data,
     get_tmdb_providers,
     get_tmdb_url,
     get_trending,
     get_watch_data,
+    refresh_catalog,
     search_movies,
 )
+from moviesapp.tmdb.cache import (
+    acquire_catalog_refresh_lock,
+    get_cached_catalog,
+    get_search_cache_key,
+    normalize_query,
+)
 
 from .fixtures.tmdb import (
     search_movies_actor_duchovny_result,
@@ -67,6 +79,30 @@ def test_get_poster_url_no_poster(size, url):
     assert result == url
 
 
+@requests_mock.Mocker(kw="req_mock")
+@patch.object(tmdb, "API_KEY", "key")
+def test_get_changed_movie_ids(**kwargs):
+    url = settings.TMDB_API_BASE_URL + "movie/changes"
+    kwargs["req_mock"].get(
+        url,
+        [
+            {"json": {"results": [{"id": 1}, {"id": 2}], "page": 1, "total_pages": 2, "total_results": 3}},
+            {"json": {"results": [{"id": 3}], "page": 2, "total_pages": 2, "total_results": 3}},
+            {"json": {"results": [{"id": 2}, {"id": 4}], "page": 1, "total_pages": 1, "total_results": 2}},
+        ],
+    )
+
+    result = get_changed_movie_ids(date(2024, 1, 1), date(2024, 1, 20))
+
+    assert result == {1, 2, 3, 4}
+    queries = [request.qs for request in kwargs["req_mock"].request_history]
+    assert [(query["start_date"], query["end_date"], query["page"]) for query in queries] == [
+        (["2024-01-01"], ["2024-01-14"], ["1"]),
+        (["2024-01-01"], ["2024-01-14"], ["2"]),
+        (["2024-01-15"], ["2024-01-20"], ["1"]),
+    ]
+
+
 @requests_mock.Mocker(kw="req_mock")
 def test_get_tmdb_providers(**kwargs):
     url = settings.TMDB_API_BASE_URL + "watch/providers/movie"
@@ -183,6 +219,76 @@ def test_search_movies_actor_not_found(person_mock):
     assert not result
 
 
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@pytest.fixture
+def locmem_cache():
+    with override_settings(CACHES=LOCMEM_CACHES):
+        cache.clear()
+        yield
+        cache.clear()
+
+
+@pytest.mark.usefixtures("locmem_cache")
+@patch.object(tmdb.Search, "movie")
+def test_search_movies_movie_cached(movie_mock):
+    movie_mock.return_value = tmdb_movie_search_results_matrix
+
+    search_movies("matrix", "movie", "en")
+    result = search_movies("  matrix ", "movie", "en")
+    result_other_case = search_movies("MATRIX", "movie", "en")
+
+    assert movie_mock.call_count == 1
+    assert result == search_movies_movie_matrix_result
+    assert result_other_case == search_movies_movie_matrix_result
+
+
+@pytest.mark.usefixtures("locmem_cache")
+@patch.object(tmdb.Search, "movie")
+def test_search_movies_cache_key(movie_mock):
+    movie_mock.return_value = tmdb_movie_search_results_matrix
+
+    search_movies("matrix", "movie", "en")
+    search_movies("matrix", "movie", "ru")
+    with override_settings(INCLUDE_ADULT=True):
+        search_movies("matrix", "movie", "en")
+
+    assert movie_mock.call_count == 3
+
+
+@pytest.mark.usefixtures("locmem_cache")
+@patch.object(tmdb.People, "combined_credits")
+@patch.object(tmdb.Search, "person")
+def test_search_movies_actor_cached(person_mock, combined_credits_mock):
+    person_mock.return_value = tmdb_persons_results_duchovny
+    combined_credits_mock.return_value = tmdb_combined_credits_results_duchovny
+
+    search_movies("Duchovny", "actor", "en")
+    result = search_movies("duchovny", "actor", "en")
+
+    assert person_mock.call_count == 1
+    assert combined_credits_mock.call_count == 1
+    assert result == search_movies_actor_duchovny_result
+
+
+@pytest.mark.usefixtures("locmem_cache")
+@patch("moviesapp.tmdb.cache.cache.set")
+@patch.object(tmdb.Search, "person")
+def test_search_movies_cache_timeout(person_mock, cache_set_mock):
+    person_mock.return_value = {"results": []}
+
+    search_movies("Somebody", "actor", "en")
+
+    cache_set_mock.assert_called_once_with(
+        get_search_cache_key("somebody", "actor", "en"), [], settings.TMDB_PERSON_CREDITS_CACHE_TIMEOUT
+    )
+
+
+def test_normalize_query():
+    assert normalize_query("  The   Matrix\t") == "the matrix"
+
+
 def test_search_movies_invalid_search_type():
     with pytest.raises(TmdbInvalidSearchTypeError) as excinfo:
         search_movies("matrix", "blah", "en")
@@ -190,9 +296,8 @@ def test_search_movies_invalid_search_type():
     assert excinfo.match("blah")
 
 
-@patch.object(tmdb.Movies, "videos")
 @patch.object(tmdb.Movies, "info")
-def test_get_tmdb_movie_data_with_trailers(info_mock, videos_mock):
+def test_get_tmdb_movie_data_with_trailers(info_mock):
     """Test getting movie data with trailers."""
     info_mock.return_value = {
         "imdb_id": "tt0133093",
@@ -204,7 +309,7 @@ def test_get_tmdb_movie_data_with_trailers(info_mock, videos_mock):
         "poster_path": "/f89U3ADr1oiB1s9GkdPOEpXUk5H.jpg",
         "homepage": "http://www.warnerbros.com/matrix",
     }
-    videos_mock.return_value = {
+    info_mock.return_value["videos"] = {
         "results": [{"type": "Trailer", "site": "YouTube", "key": "vKQi3bBA1y8", "name": "Official Trailer"}]
     }
 
@@ -215,11 +320,10 @@ def test_get_tmdb_movie_data_with_trailers(info_mock, videos_mock):
     assert result["trailers"][0]["site"] == "YouTube"
 
 
-@patch.object(tmdb.Movies, "videos")
 @patch.object(tmdb.Movies, "info")
 @patch("moviesapp.tmdb.tmdb.settings")
 @patch("moviesapp.tmdb.tmdb.capture_exception")
-def test_get_tmdb_movie_data_invalid_trailer_site_production(capture_mock, settings_mock, info_mock, videos_mock):
+def test_get_tmdb_movie_data_invalid_trailer_site_production(capture_mock, settings_mock, info_mock):
     """Test handling invalid trailer site in production mode."""
     settings_mock.DEBUG = False
     settings_mock.LANGUAGE_EN = "en"
@@ -235,7 +339,7 @@ def test_get_tmdb_movie_data_invalid_trailer_site_production(capture_mock, setti
         "poster_path": "/f89U3ADr1oiB1s9GkdPOEpXUk5H.jpg",
         "homepage": "http://www.warnerbros.com/matrix",
     }
-    videos_mock.return_value = {
+    info_mock.return_value["videos"] = {
         "results": [{"type": "Trailer", "site": "InvalidSite", "key": "vKQi3bBA1y8", "name": "Official Trailer"}]
     }
 
@@ -246,10 +350,9 @@ def test_get_tmdb_movie_data_invalid_trailer_site_production(capture_mock, setti
     assert len(result["trailers"]) == 0
 
 
-@patch.object(tmdb.Movies, "videos")
 @patch.object(tmdb.Movies, "info")
 @patch("moviesapp.tmdb.tmdb.settings")
-def test_get_tmdb_movie_data_invalid_trailer_site_debug(settings_mock, info_mock, videos_mock):
+def test_get_tmdb_movie_data_invalid_trailer_site_debug(settings_mock, info_mock):
     """Test handling invalid trailer site in debug mode."""
 
     settings_mock.DEBUG = True
@@ -266,7 +369,7 @@ def test_get_tmdb_movie_data_invalid_trailer_site_debug(settings_mock, info_mock
         "poster_path": "/f89U3ADr1oiB1s9GkdPOEpXUk5H.jpg",
         "homepage": "http://www.warnerbros.com/matrix",
     }
-    videos_mock.return_value = {
+    info_mock.return_value["videos"] = {
         "results": [{"type": "Trailer", "site": "InvalidSite", "key": "vKQi3bBA1y8", "name": "Official Trailer"}]
     }
 
@@ -274,9 +377,8 @@ def test_get_tmdb_movie_data_invalid_trailer_site_debug(settings_mock, info_mock
         get_tmdb_movie_data(603)
 
 
-@patch.object(tmdb.Movies, "videos")
 @patch.object(tmdb.Movies, "info")
-def test_get_tmdb_movie_data_with_runtime(info_mock, videos_mock):
+def test_get_tmdb_movie_data_with_runtime(info_mock):
     """Test getting movie data with runtime conversion."""
     info_mock.return_value = {
         "imdb_id": "tt0133093",
@@ -288,7 +390,7 @@ def test_get_tmdb_movie_data_with_runtime(info_mock, videos_mock):
         "poster_path": "/f89U3ADr1oiB1s9GkdPOEpXUk5H.jpg",
         "homepage": "http://www.warnerbros.com/matrix",
     }
-    videos_mock.return_value = {"results": []}
+    info_mock.return_value["videos"] = {"results": []}
 
     result = get_tmdb_movie_data(603)
 
@@ -298,9 +400,8 @@ def test_get_tmdb_movie_data_with_runtime(info_mock, videos_mock):
     assert result["runtime"].minute == 16
 
 
-@patch.object(tmdb.Movies, "videos")
 @patch.object(tmdb.Movies, "info")
-def test_get_tmdb_movie_data_no_runtime(info_mock, videos_mock):
+def test_get_tmdb_movie_data_no_runtime(info_mock):
     """Test getting movie data without runtime."""
     info_mock.return_value = {
         "imdb_id": "tt0133093",
@@ -312,16 +413,15 @@ def test_get_tmdb_movie_data_no_runtime(info_mock, videos_mock):
         "poster_path": "/f89U3ADr1oiB1s9GkdPOEpXUk5H.jpg",
         "homepage": "http://www.warnerbros.com/matrix",
     }
-    videos_mock.return_value = {"results": []}
+    info_mock.return_value["videos"] = {"results": []}
 
     result = get_tmdb_movie_data(603)
 
     assert result["runtime"] is None
 
 
-@patch.object(tmdb.Movies, "videos")
 @patch.object(tmdb.Movies, "info")
-def test_get_tmdb_movie_data_no_release_date(info_mock, videos_mock):
+def test_get_tmdb_movie_data_no_release_date(info_mock):
     """Test getting movie data without release date."""
     info_mock.return_value = {
         "imdb_id": "tt0133093",
@@ -333,7 +433,7 @@ def test_get_tmdb_movie_data_no_release_date(info_mock, videos_mock):
         "poster_path": "/f89U3ADr1oiB1s9GkdPOEpXUk5H.jpg",
         "homepage": "http://www.warnerbros.com/matrix",
     }
-    videos_mock.return_value = {"results": []}
+    info_mock.return_value["videos"] = {"results": []}
 
     result = get_tmdb_movie_data(603)
 
@@ -362,3 +462,46 @@ def test_get_trending(trending_mock):
     assert len(result) == 1
     assert result[0]["id"] == 603
     assert result[0]["title"] == "The Matrix"
+
+
+@pytest.mark.usefixtures("locmem_cache")
+@patch("moviesapp.tmdb.tmdb.get_upcoming")
+@patch("moviesapp.tmdb.tmdb.get_trending")
+def test_refresh_catalog(get_trending_mock, get_upcoming_mock):
+    get_trending_mock.return_value = search_movies_movie_matrix_result
+    get_upcoming_mock.return_value = []
+    assert acquire_catalog_refresh_lock("trending")
+    assert not acquire_catalog_refresh_lock("trending")
+
+    refresh_catalog("trending")
+    refresh_catalog("upcoming")
+
+    assert get_cached_catalog("trending")["movies"] == search_movies_movie_matrix_result
+    assert get_cached_catalog("upcoming")["movies"] == []
+    # The refresh lock is released
+    assert acquire_catalog_refresh_lock("trending")
+
+
+@patch.object(tmdb.Movies, "watch_providers")
+@patch.object(tmdb.Movies, "videos")
+@patch.object(tmdb.Movies, "info")
+def test_get_tmdb_movie_data_with_watch_data(info_mock, videos_mock, watch_providers_mock):
+    info_mock.return_value = {
+        "original_title": "Aliens",
+        "title": "Aliens",
+        "release_date": "1986-07-18",
+        "runtime": 137,
+        "poster_path": "/r1x5JGpyqZU8PYhbs4UcrO1Xb6x.jpg",
+        "videos": {"results": [{"type": "Trailer", "site": "YouTube", "key": "oSeQQlaCZgU", "name": "Trailer"}]},
+        "watch/providers": tmdb_watch_data,
+        "external_ids": {"imdb_id": "tt0090605"},
+    }
+
+    movie_data, watch_data = get_tmdb_movie_data_with_watch_data(679)
+
+    info_mock.assert_called_once_with(language="en", append_to_response="videos,watch/providers,external_ids")
+    videos_mock.assert_not_called()
+    watch_providers_mock.assert_not_called()
+    assert movie_data["imdb_id"] == "tt0090605"
+    assert movie_data["trailers"] == [{"name": "Trailer", "key": "oSeQQlaCZgU", "site": "YouTube"}]
+    assert watch_data == [{"country": "CA", "provider_id": 337}]
@@ -5,7 +5,7 @@ from unittest.mock import patch
 
 from django.test import TestCase
 
-from moviesapp.utils import is_movie_released, load_movie_data, merge_movie_data
+from moviesapp.utils import get_movie_data_hash, is_movie_released, load_movie_data, merge_movie_data
 
 
 class UtilsTestCase(TestCase):
@@ -97,3 +97,14 @@ class UtilsTestCase(TestCase):
     def test_is_movie_released_with_none(self):
         """Test is_movie_released with None."""
         self.assertFalse(is_movie_released(None))
+
+    def test_get_movie_data_hash(self):
+        """Test that the movie data hash depends on values but not on the order of keys."""
+        movie_data_hash = get_movie_data_hash({"title": "The Matrix", "release_date": date(1999, 3, 30)})
+
+        self.assertEqual(
+            get_movie_data_hash({"release_date": date(1999, 3, 30), "title": "The Matrix"}), movie_data_hash
+        )
+        self.assertNotEqual(
+            get_movie_data_hash({"title": "The Matrix", "release_date": date(1999, 3, 31)}), movie_data_hash
+        )
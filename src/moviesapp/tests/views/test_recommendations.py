@@ -4,12 +4,18 @@ from datetime import date
 from http import HTTPStatus
 from unittest.mock import Mock, patch
 
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 
 from moviesapp.models import List, Movie, Record, User
 from moviesapp.openai.exceptions import OpenAIError
 from moviesapp.openai.types import RecommendationRequest
-from moviesapp.views.recommendations import RecommendationsView, _get_tmdb_movie_from_imdb_id
+from moviesapp.tmdb.cache import cache_movies_by_imdb_ids, get_cached_movies_by_imdb_ids
+from moviesapp.views.recommendations import (
+    RecommendationsView,
+    _get_tmdb_movie_from_imdb_id,
+    _get_tmdb_movies_from_imdb_ids,
+)
 
 from ..base import BaseTestCase
 
@@ -137,6 +143,91 @@ class GetTmdbMovieFromImdbIdTestCase(TestCase):
         self.assertIsNone(result)
 
 
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class GetTmdbMoviesFromImdbIdsTestCase(TestCase):
+    """Test cases for _get_tmdb_movies_from_imdb_ids function."""
+
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    @staticmethod
+    def _get_tmdb_movie(tmdb_id):
+        return {
+            "id": tmdb_id,
+            "title": f"Movie {tmdb_id}",
+            "title_original": f"Movie {tmdb_id}",
+            "poster_path": None,
+            "release_date": None,
+            "popularity": 1.0,
+        }
+
+    @patch("moviesapp.views.recommendations._get_tmdb_movie_from_imdb_id")
+    def test_get_tmdb_movies_from_imdb_ids_database(self, mock_get_tmdb):
+        """Test that movies from the database are not requested from TMDB."""
+        Movie.objects.create(
+            tmdb_id=603,
+            imdb_id="tt0133093",
+            title="The Matrix",
+            title_original="The Matrix",
+            poster="poster.jpg",
+            release_date=date(1999, 3, 30),
+        )
+
+        result = _get_tmdb_movies_from_imdb_ids(["tt0133093"])
+
+        self.assertEqual(result["tt0133093"]["id"], 603)
+        self.assertEqual(result["tt0133093"]["poster_path"], "poster.jpg")
+        self.assertEqual(result["tt0133093"]["release_date"], date(1999, 3, 30))
+        mock_get_tmdb.assert_not_called()
+
+    @patch("moviesapp.views.recommendations._get_tmdb_movie_from_imdb_id")
+    def test_get_tmdb_movies_from_imdb_ids_cache(self, mock_get_tmdb):
+        """Test that movies found in TMDB and IMDb IDs which are not found are cached."""
+        mock_get_tmdb.side_effect = lambda imdb_id: (
+            self._get_tmdb_movie(int(imdb_id[2:])) if imdb_id != "tt3" else None
+        )
+
+        result = _get_tmdb_movies_from_imdb_ids(["tt1", "tt2", "tt3"])
+        result_cached = _get_tmdb_movies_from_imdb_ids(["tt1", "tt2", "tt3"])
+
+        self.assertEqual(result, result_cached)
+        self.assertEqual(set(result), {"tt1", "tt2"})
+        cached_movies = get_cached_movies_by_imdb_ids(["tt1", "tt2", "tt3"])
+        self.assertEqual(cached_movies["tt1"], self._get_tmdb_movie(1))
+        self.assertIsNone(cached_movies["tt3"])
+        self.assertEqual(mock_get_tmdb.call_count, 3)
+
+    @patch("moviesapp.views.recommendations.capture_exception")
+    @patch("moviesapp.views.recommendations._get_tmdb_movie_from_imdb_id")
+    def test_get_tmdb_movies_from_imdb_ids_failed_lookup_cached(self, mock_get_tmdb, mock_capture_exception):
+        """Test that failed lookups are cached and not repeated by the next request."""
+        mock_get_tmdb.side_effect = KeyError("id")
+
+        _get_tmdb_movies_from_imdb_ids(["tt1"])
+        result = _get_tmdb_movies_from_imdb_ids(["tt1"])
+
+        self.assertEqual(result, {})
+        mock_get_tmdb.assert_called_once_with("tt1")
+        mock_capture_exception.assert_called_once()
+
+    @patch("moviesapp.views.recommendations.get_movie_list_result")
+    @patch("moviesapp.views.recommendations._get_tmdb_movie_from_imdb_id")
+    def test_convert_recommendations_to_movies_order(self, mock_get_tmdb, mock_get_result):
+        """Test that the order of recommendations is preserved."""
+        Movie.objects.create(tmdb_id=2, imdb_id="tt2", title="Movie 2", title_original="Movie 2")
+        cache_movies_by_imdb_ids({"tt4": self._get_tmdb_movie(4)})
+        mock_get_tmdb.side_effect = lambda imdb_id: self._get_tmdb_movie(int(imdb_id[2:]))
+        mock_get_result.side_effect = lambda tmdb_movie, lang: tmdb_movie
+        recommendations = [{"imdb_id": f"tt{i}", "reason": "Reason"} for i in (5, 4, 3, 2, 1)]
+
+        result = RecommendationsView._convert_recommendations_to_movies(recommendations, "en")
+
+        self.assertEqual([movie["id"] for movie in result], [5, 4, 3, 2, 1])
+        self.assertEqual(sorted(c.args[0] for c in mock_get_tmdb.call_args_list), ["tt1", "tt3", "tt5"])
+
+
 class RecommendationsViewTestCase(BaseTestCase):
     """Test cases for RecommendationsView."""
 
@@ -240,33 +240,76 @@ class AddToListFromDbViewTestCase(TestCase):
         self.user = User.objects.create_user(username="testuser", email="test@example.com", password="password")
         self.client.force_login(self.user)
 
-    @patch("moviesapp.views.search.load_movie_data")
-    @patch("moviesapp.views.search.load_and_save_watch_data_task")
-    def test_add_new_movie_to_list_success(self, mock_task, mock_load_movie_data):
-        mock_load_movie_data.return_value = {
-            "tmdb_id": 603,
-            "title": "The Matrix",
-            "title_original": "The Matrix",
-            "release_date": date(1999, 3, 30),
-        }
+    @patch("moviesapp.views.search.get_tmdb_movie_data_with_watch_data")
+    @patch("moviesapp.views.search.load_movie_extra_data_task")
+    @patch.object(Movie, "save_watch_data")
+    def test_add_new_movie_to_list_success(self, mock_save_watch_data, mock_extra_data_task, mock_get_tmdb_movie_data):
+        watch_data = [{"country": "US", "provider_id": 8}]
+        mock_get_tmdb_movie_data.return_value = (
+            {
+                "tmdb_id": 603,
+                "imdb_id": "tt0133093",
+                "title": "The Matrix",
+                "title_original": "The Matrix",
+                "release_date": date(1999, 3, 30),
+            },
+            watch_data,
+        )
 
         data = {
             "movieId": 603,
             "listId": List.WATCHED,
         }
-        response = self.client.post(self.url, data, content_type="application/json")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, data, content_type="application/json")
 
         self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json(), {"dataStatus": Movie.DATA_LOADING})
+        mock_get_tmdb_movie_data.assert_called_once_with(603)
 
         # Check that movie was created
         movie = Movie.objects.get(tmdb_id=603)
         self.assertEqual(movie.title, "The Matrix")
+        self.assertEqual(movie.data_status, Movie.DATA_LOADING)
+
+        # Check that extra data is loaded in the background and watch data is saved for released movie
+        mock_extra_data_task.delay.assert_called_once_with(movie.pk)
+        mock_save_watch_data.assert_called_once_with(watch_data)
+
+    @patch("moviesapp.views.search.get_tmdb_movie_data_with_watch_data")
+    @patch("moviesapp.views.search.load_movie_extra_data_task")
+    @patch.object(Movie, "save_watch_data")
+    def test_add_new_movie_to_list_concurrently_added(
+        self, mock_save_watch_data, mock_extra_data_task, mock_get_tmdb_movie_data
+    ):
+        """Test that a movie created by a concurrent request is not created and loaded again."""
+        movie = Movie.objects.create(
+            tmdb_id=603,
+            title="The Matrix",
+            title_original="The Matrix",
+            imdb_id="tt0133093",
+            data_status=Movie.DATA_LOADING,
+        )
+        mock_get_tmdb_movie_data.return_value = (
+            {
+                "tmdb_id": 603,
+                "imdb_id": "tt0133093",
+                "title": "The Matrix",
+                "title_original": "The Matrix",
+                "release_date": date(1999, 3, 30),
+            },
+            [],
+        )
+
+        movie_id = AddToListFromDbView.add_movie_to_db(603)
 
-        # Check that task was triggered for released movie
-        mock_task.delay.assert_called_once_with(movie.pk)
+        self.assertEqual(movie_id, movie.pk)
+        self.assertEqual(Movie.objects.filter(tmdb_id=603).count(), 1)
+        mock_extra_data_task.delay.assert_not_called()
+        mock_save_watch_data.assert_not_called()
 
-    @patch("moviesapp.views.search.load_movie_data")
-    def test_add_existing_movie_to_list(self, mock_load_movie_data):
+    @patch("moviesapp.views.search.get_tmdb_movie_data_with_watch_data")
+    def test_add_existing_movie_to_list(self, mock_get_tmdb_movie_data):
         # Create a movie first
         movie = Movie.objects.create(
             tmdb_id=603,
@@ -284,8 +327,9 @@ class AddToListFromDbViewTestCase(TestCase):
 
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
-        # load_movie_data should not be called since movie exists
-        mock_load_movie_data.assert_not_called()
+        self.assertEqual(response.json(), {"dataStatus": Movie.DATA_LOADED})
+        # get_tmdb_movie_data should not be called since movie exists
+        mock_get_tmdb_movie_data.assert_not_called()
 
         # Check that record was created
         record = self.user.get_records().filter(movie=movie).first()
@@ -330,9 +374,9 @@ class AddToListFromDbViewTestCase(TestCase):
         response = self.client.post(self.url, data, content_type="application/json")
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
 
-    @patch("moviesapp.views.search.load_movie_data")
-    def test_add_to_list_tmdb_no_imdb_id_error(self, mock_load_movie_data):
-        mock_load_movie_data.side_effect = TmdbNoImdbIdError()
+    @patch("moviesapp.views.search.get_tmdb_movie_data_with_watch_data")
+    def test_add_to_list_tmdb_no_imdb_id_error(self, mock_get_tmdb_movie_data):
+        mock_get_tmdb_movie_data.side_effect = TmdbNoImdbIdError()
 
         data = {
             "movieId": 603,
@@ -357,22 +401,32 @@ class AddToListFromDbViewTestCase(TestCase):
         view = AddToListFromDbView()
 
         with (
-            patch("moviesapp.views.search.load_movie_data") as mock_load_movie_data,
-            patch("moviesapp.views.search.load_and_save_watch_data_task") as mock_task,
+            patch("moviesapp.views.search.get_tmdb_movie_data_with_watch_data") as mock_get_tmdb_movie_data,
+            patch("moviesapp.views.search.load_movie_extra_data_task") as mock_extra_data_task,
+            patch.object(Movie, "save_watch_data") as mock_save_watch_data,
         ):
-            mock_load_movie_data.return_value = {
-                "tmdb_id": 603,
-                "title": "The Matrix",
-                "title_original": "The Matrix",
-                "release_date": date(1999, 3, 30),
-            }
+            mock_get_tmdb_movie_data.return_value = (
+                {
+                    "tmdb_id": 603,
+                    "imdb_id": "tt0133093",
+                    "title": "The Matrix",
+                    "title_original": "The Matrix",
+                    "release_date": date(1999, 3, 30),
+                },
+                [],
+            )
+
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                movie_id = view.add_movie_to_db(603)
 
-            movie_id = view.add_movie_to_db(603)
+            # The task is enqueued only after the movie is committed
+            self.assertEqual(len(callbacks), 1)
 
             movie = Movie.objects.get(pk=movie_id)
             self.assertEqual(movie.tmdb_id, 603)
             self.assertEqual(movie.title, "The Matrix")
-            mock_task.delay.assert_called_once_with(movie.pk)
+            mock_extra_data_task.delay.assert_called_once_with(movie.pk)
+            mock_save_watch_data.assert_called_once_with([])
 
     def test_get_movie_id_static_method(self):
         # Test with non-existent movie
@@ -383,3 +437,27 @@ class AddToListFromDbViewTestCase(TestCase):
         movie = Movie.objects.create(tmdb_id=603, title="The Matrix", imdb_id="tt0133093")
         movie_id = AddToListFromDbView._get_movie_id(603)  # pylint: disable=protected-access
         self.assertEqual(movie_id, movie.pk)
+
+
+class MovieDataStatusViewTestCase(BaseTestCase):
+    def test_movie_data_status(self):
+        self.login()
+        Movie.objects.create(
+            tmdb_id=603,
+            title="The Matrix",
+            title_original="The Matrix",
+            imdb_id="tt0133093",
+            data_status=Movie.DATA_LOADING,
+        )
+
+        response = self.client.get("/movie/603/data-status/")
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json(), {"status": Movie.DATA_LOADING})
+
+    def test_movie_data_status_not_found(self):
+        self.login()
+
+        response = self.client.get("/movie/603/data-status/")
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
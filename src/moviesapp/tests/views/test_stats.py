@@ -0,0 +1,157 @@
+"""Test stats view."""
+
+from datetime import date, datetime, time, timezone
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from moviesapp.models import List, Movie, Record, User
+
+
+class StatsViewTestCase(TestCase):
+    """Test stats view."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="user", password="testpass123")
+        List.objects.create(id=List.WATCHED, name="Watched", key_name="watched")
+        List.objects.create(id=List.TO_WATCH, name="To Watch", key_name="to_watch")
+
+        self._create_record(
+            "The Matrix",
+            List.WATCHED,
+            datetime(2023, 5, 10, 12, tzinfo=timezone.utc),
+            rating=5,
+            runtime=time(2, 16),
+            release_date=date(1999, 3, 30),
+            genre="Action, Sci-Fi",
+            director="Lana Wachowski, Lilly Wachowski",
+            watched_in_hd=True,
+        )
+        self._create_record(
+            "Dogma",
+            List.WATCHED,
+            datetime(2023, 7, 1, 12, tzinfo=timezone.utc),
+            rating=3,
+            runtime=time(2, 10),
+            release_date=date(1999, 11, 12),
+            genre="Comedy",
+            director="Kevin Smith",
+        )
+        self._create_record(
+            "Pulp Fiction",
+            List.WATCHED,
+            datetime(2022, 2, 3, 12, tzinfo=timezone.utc),
+            release_date=date(1994, 10, 14),
+            genre="Crime, Drama",
+        )
+        self._create_record("Dune", List.TO_WATCH, datetime(2023, 1, 1, 12, tzinfo=timezone.utc))
+        self.client.force_authenticate(user=self.user)
+
+    def _create_record(  # pylint: disable=too-many-arguments
+        self, title, list_id, date_, rating=0, runtime=None, release_date=None, genre=None, director=None, **options
+    ):
+        """Create a record with a movie."""
+        movie = Movie.objects.create(
+            title=title,
+            title_original=title,
+            imdb_id=f"tt{Movie.objects.count()}",
+            tmdb_id=Movie.objects.count() + 1,
+            runtime=runtime,
+            release_date=release_date,
+            genre=genre,
+            director=director,
+        )
+        record = Record.objects.create(user=self.user, movie=movie, list_id=list_id, rating=rating, **options)
+        # "date" is set automatically on creation
+        Record.objects.filter(pk=record.pk).update(date=date_)
+
+    def test_stats(self):
+        """Test overall stats."""
+        response = self.client.get(reverse("stats"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data
+        self.assertEqual(data["totalMoviesWatched"], 3)
+        self.assertEqual(data["totalMoviesToWatch"], 1)
+        self.assertEqual(data["totalHoursWatched"], 4.4)
+        self.assertEqual(data["averageRating"], 4.0)
+        self.assertEqual(data["totalRatedMovies"], 2)
+        self.assertEqual(data["ratingDistribution"], {"3": 1, "5": 1})
+        self.assertEqual(data["qualityPreferences"]["hd"], 1)
+        self.assertEqual(data["qualityPreferences"]["theatre"], 0)
+        self.assertEqual(data["topGenres"][:2], [{"name": "Action", "count": 1}, {"name": "Comedy", "count": 1}])
+        self.assertEqual(data["decadeDistribution"], {"1990s": 3})
+        self.assertEqual(data["oldestMovie"]["title"], "Pulp Fiction")
+        self.assertEqual(data["newestMovie"]["title"], "Dogma")
+        self.assertEqual(data["availableYears"], [2023, 2022])
+
+    def test_yearly_stats(self):
+        """Test stats for a selected year."""
+        response = self.client.get(reverse("stats"), {"year": 2023})
+
+        data = response.data
+        self.assertEqual(data["totalMoviesWatched"], 2)
+        self.assertEqual(data["totalMoviesToWatch"], 1)
+        overview = data["yearlyOverview"]
+        self.assertEqual(overview["yearOverYearChange"], 1)
+        self.assertEqual(overview["yearOverYearChangePercent"], 100.0)
+        self.assertEqual(overview["peakMonth"], 5)
+        milestones = data["yearlyMilestones"]
+        self.assertEqual(milestones["firstMovie"], {"title": "The Matrix", "date": "2023-05-10"})
+        self.assertEqual(milestones["lastMovie"], {"title": "Dogma", "date": "2023-07-01"})
+        self.assertEqual(milestones["highestRatedMovie"]["title"], "The Matrix")
+        self.assertEqual(milestones["longestMovie"], {"title": "The Matrix", "runtime": "02:16"})
+        self.assertEqual(milestones["topDirector"], {"name": "Lana Wachowski", "count": 1})
+        self.assertEqual(data["selectedYear"], 2023)
+
+    def test_yearly_stats_in_user_time_zone(self):
+        """Test that all sections count records by dates in the time zone of the user."""
+        self.user.timezone = "Pacific/Auckland"
+        self.user.save()
+        # 2023-01-01 08:00 in Auckland
+        self._create_record("Heat", List.WATCHED, datetime(2022, 12, 31, 19, tzinfo=timezone.utc))
+
+        response = self.client.get(reverse("stats"), {"year": 2023})
+
+        data = response.data
+        self.assertEqual(data["totalMoviesWatched"], 3)
+        self.assertEqual(data["yearlyOverview"]["monthlyDistribution"][0], {"month": 1, "count": 1})
+        self.assertEqual(data["yearlyMilestones"]["firstMovie"], {"title": "Heat", "date": "2023-01-01"})
+
+    def test_yearly_stats_no_records(self):
+        """Test stats for a year without records."""
+        response = self.client.get(reverse("stats"), {"year": 2010})
+
+        data = response.data
+        self.assertEqual(data["totalMoviesWatched"], 0)
+        self.assertEqual(data["yearlyMilestones"], {})
+        self.assertIsNone(data["oldestMovie"])
+
+    def test_invalid_year(self):
+        """Test that an invalid year falls back to overall stats."""
+        response = self.client.get(reverse("stats"), {"year": "invalid"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["totalMoviesWatched"], 3)
+        self.assertEqual(response.data["availableYears"], [2023, 2022])
+
+    def test_stats_query_count(self):
+        """Test that the number of queries does not depend on the number of records."""
+        # Build user stats snapshots
+        self.client.get(reverse("stats"))
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse("stats"), {"year": 2023})
+        queries_number = len(context.captured_queries)
+
+        for i in range(10):
+            self._create_record(f"Movie {i}", List.WATCHED, datetime(2023, 3, 1, 12, tzinfo=timezone.utc))
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse("stats"), {"year": 2023})
+
+        self.assertEqual(len(context.captured_queries), queries_number)
@@ -17,9 +17,9 @@ class TrendingViewTestCase(BaseTestCase):
         super().setUp()
         self.url = "/trending/"
 
-    @patch("moviesapp.views.trending.get_trending")
-    def test_trending_view_anonymous_user(self, mock_get_trending):
-        mock_get_trending.return_value = [
+    @patch("moviesapp.views.trending.get_catalog_movies")
+    def test_trending_view_anonymous_user(self, mock_get_catalog_movies):
+        mock_get_catalog_movies.return_value = [
             {
                 "id": 603,
                 "title": "The Matrix",
@@ -52,8 +52,8 @@ class TrendingViewTestCase(BaseTestCase):
         self.assertIn("poster", data[0])
         self.assertIn("isReleased", data[0])
 
-    @patch("moviesapp.views.trending.get_trending")
-    def test_trending_view_authenticated_user_filters_existing_movies(self, mock_get_trending):
+    @patch("moviesapp.views.trending.get_catalog_movies")
+    def test_trending_view_authenticated_user_filters_existing_movies(self, mock_get_catalog_movies):
         self.login()
 
         # Create List objects
@@ -75,7 +75,7 @@ class TrendingViewTestCase(BaseTestCase):
             user=self.user,
         )
 
-        mock_get_trending.return_value = [
+        mock_get_catalog_movies.return_value = [
             {
                 "id": 603,  # This movie should be filtered out
                 "title": "The Matrix",
@@ -103,9 +103,9 @@ class TrendingViewTestCase(BaseTestCase):
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]["id"], 604)
 
-    @patch("moviesapp.views.trending.get_trending")
-    def test_trending_view_empty_results(self, mock_get_trending):
-        mock_get_trending.return_value = []
+    @patch("moviesapp.views.trending.get_catalog_movies")
+    def test_trending_view_empty_results(self, mock_get_catalog_movies):
+        mock_get_catalog_movies.return_value = []
 
         response = self.client.get(self.url)
 
@@ -113,9 +113,9 @@ class TrendingViewTestCase(BaseTestCase):
         data = response.json()
         self.assertEqual(data, [])
 
-    @patch("moviesapp.views.trending.get_trending")
-    def test_trending_view_uses_request_language_code(self, mock_get_trending):
-        mock_get_trending.return_value = [
+    @patch("moviesapp.views.trending.get_catalog_movies")
+    def test_trending_view_uses_request_language_code(self, mock_get_catalog_movies):
+        mock_get_catalog_movies.return_value = [
             {
                 "id": 603,
                 "title": "The Matrix",
@@ -140,9 +140,9 @@ class TrendingViewTestCase(BaseTestCase):
         view = TrendingView()
         self.assertEqual(view.permission_classes, [])
 
-    @patch("moviesapp.views.trending.get_trending")
-    def test_trending_view_with_movies_having_null_poster(self, mock_get_trending):
-        mock_get_trending.return_value = [
+    @patch("moviesapp.views.trending.get_catalog_movies")
+    def test_trending_view_with_movies_having_null_poster(self, mock_get_catalog_movies):
+        mock_get_catalog_movies.return_value = [
             {
                 "id": 603,
                 "title": "The Matrix",
@@ -162,9 +162,9 @@ class TrendingViewTestCase(BaseTestCase):
         # Should handle None poster gracefully
         self.assertIn("poster", data[0])
 
-    @patch("moviesapp.views.trending.get_trending")
-    def test_trending_view_with_movies_having_null_release_date(self, mock_get_trending):
-        mock_get_trending.return_value = [
+    @patch("moviesapp.views.trending.get_catalog_movies")
+    def test_trending_view_with_movies_having_null_release_date(self, mock_get_catalog_movies):
+        mock_get_catalog_movies.return_value = [
             {
                 "id": 603,
                 "title": "The Matrix",
@@ -197,8 +197,8 @@ class TrendingViewAuthenticatedTestCase(TestCase):
         self.user = User.objects.create_user(username="testuser", email="test@example.com", password="password")
         self.client.force_login(self.user)
 
-    @patch("moviesapp.views.trending.get_trending")
-    def test_trending_view_authenticated_user_with_existing_records(self, mock_get_trending):
+    @patch("moviesapp.views.trending.get_catalog_movies")
+    def test_trending_view_authenticated_user_with_existing_records(self, mock_get_catalog_movies):
         # Create some movies that the user has in their records
         movie1 = Movie.objects.create(
             tmdb_id=603,
@@ -219,7 +219,7 @@ class TrendingViewAuthenticatedTestCase(TestCase):
         self.user.get_records().create(movie=movie1, list_id=List.WATCHED, user=self.user)
         self.user.get_records().create(movie=movie2, list_id=List.TO_WATCH, user=self.user)
 
-        mock_get_trending.return_value = [
+        mock_get_catalog_movies.return_value = [
             {
                 "id": 603,  # User already has this
                 "title": "The Matrix",
@@ -1,14 +1,20 @@
 from datetime import date
+from time import time
+from unittest.mock import patch
 
+from django.core.cache import cache
 from django.http import Http404
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from requests.exceptions import RequestException
 
 from moviesapp.models import Action, ActionRecord, List, Movie, Record, User
+from moviesapp.tmdb.cache import acquire_catalog_refresh_lock, cache_catalog
 from moviesapp.views.utils import (
     _format_date,
     add_movie_to_list,
     filter_out_movies_user_already_has_in_lists,
     get_anothers_account,
+    get_catalog_movies,
     get_movie_list_result,
 )
 
@@ -280,3 +286,74 @@ class FilterOutMoviesUserAlreadyHasInListsTestCase(TestCase):
 
         # All movies should be filtered out
         self.assertEqual(len(movies), 0)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+@patch("moviesapp.views.utils.refresh_tmdb_catalog_task.delay")
+class GetCatalogMoviesTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.movies = [
+            {
+                "id": 603,
+                "title": "The Matrix",
+                "title_original": "The Matrix",
+                "poster_path": None,
+                "release_date": date(1999, 3, 30),
+                "popularity": 41.769,
+            }
+        ]
+
+    def test_get_catalog_movies_fresh(self, mock_delay):
+        cache_catalog("trending", self.movies)
+
+        result = get_catalog_movies("trending")
+
+        self.assertEqual(result, self.movies)
+        mock_delay.assert_not_called()
+
+    def test_get_catalog_movies_stale(self, mock_delay):
+        cache_catalog("trending", self.movies)
+
+        with patch("moviesapp.tmdb.cache.time", return_value=time() + 60 * 60 * 24):
+            result = get_catalog_movies("trending")
+            get_catalog_movies("trending")
+
+        # The stale catalog is served and only one refresh is scheduled
+        self.assertEqual(result, self.movies)
+        mock_delay.assert_called_once_with("trending")
+
+    @patch("moviesapp.tmdb.tmdb.get_upcoming")
+    def test_get_catalog_movies_missing(self, mock_get_upcoming, mock_delay):
+        mock_get_upcoming.return_value = self.movies
+
+        result = get_catalog_movies("upcoming")
+        cached_result = get_catalog_movies("upcoming")
+
+        # A missing catalog is loaded once synchronously and cached
+        self.assertEqual(result, self.movies)
+        self.assertEqual(cached_result, self.movies)
+        mock_get_upcoming.assert_called_once_with()
+        mock_delay.assert_not_called()
+
+    @patch("moviesapp.views.utils.refresh_catalog")
+    def test_get_catalog_movies_missing_locked(self, mock_refresh_catalog, mock_delay):
+        acquire_catalog_refresh_lock("upcoming")
+
+        result = get_catalog_movies("upcoming")
+
+        self.assertEqual(result, [])
+        mock_refresh_catalog.assert_not_called()
+        mock_delay.assert_not_called()
+
+    @patch("moviesapp.views.utils.refresh_catalog")
+    def test_get_catalog_movies_missing_error(self, mock_refresh_catalog, mock_delay):
+        mock_refresh_catalog.side_effect = RequestException
+
+        with self.assertRaises(RequestException):
+            get_catalog_movies("upcoming")
+
+        # The lock is released so that the next request retries
+        self.assertTrue(acquire_catalog_refresh_lock("upcoming"))
+        mock_delay.assert_not_called()
@@ -1,14 +1,18 @@
 """TMDB."""
 
+from .cache import acquire_catalog_refresh_lock, get_cached_catalog, is_catalog_stale, release_catalog_refresh_lock
 from .exceptions import TmdbInvalidSearchTypeError, TmdbNoImdbIdError
 from .tmdb import (
+    get_changed_movie_ids,
     get_poster_url,
     get_tmdb_movie_data,
+    get_tmdb_movie_data_with_watch_data,
     get_tmdb_providers,
     get_tmdb_url,
     get_trending,
     get_upcoming,
     get_watch_data,
+    refresh_catalog,
     search_movies,
 )
 
@@ -20,7 +24,14 @@ __all__ = [
     "search_movies",
     "get_watch_data",
     "get_tmdb_movie_data",
+    "get_changed_movie_ids",
+    "get_tmdb_movie_data_with_watch_data",
     "get_tmdb_providers",
     "get_trending",
     "get_upcoming",
+    "refresh_catalog",
+    "get_cached_catalog",
+    "is_catalog_stale",
+    "acquire_catalog_refresh_lock",
+    "release_catalog_refresh_lock",
 ]
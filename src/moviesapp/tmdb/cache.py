@@ -0,0 +1,133 @@
+"""TMDB response cache."""
+
+from hashlib import sha256
+from time import time
+from typing import Dict, Optional, Union
+
+from django.conf import settings
+from django.core.cache import cache
+
+from ..types import SearchType, TmdbCatalog, TmdbCatalogCacheEntry, TmdbMovieListResultProcessed
+
+SEARCH_CACHE_KEY_PREFIX = "tmdb-search"
+CATALOG_CACHE_KEY_PREFIX = "tmdb-catalog"
+IMDB_ID_CACHE_KEY_PREFIX = "tmdb-imdb-id"
+# Cached instead of a movie for an IMDb ID which is not found on TMDB (movies are cached as dicts)
+IMDB_ID_NOT_FOUND = "not-found"
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query so that equivalent queries share a cache entry."""
+    return " ".join(query.split()).casefold()
+
+
+def get_search_cache_key(query: str, search_type: SearchType, lang: str) -> str:
+    """Get a search cache key."""
+    query_hash = sha256(normalize_query(query).encode("utf-8")).hexdigest()
+    include_adult = int(settings.INCLUDE_ADULT)
+    return f"{SEARCH_CACHE_KEY_PREFIX}:{search_type}:{lang}:{include_adult}:{query_hash}"
+
+
+def _get_search_cache_timeout(search_type: SearchType) -> int:
+    """
+    Get a search cache timeout.
+
+    Person credits change much less often than title search results.
+    """
+    if search_type == "movie":
+        return settings.TMDB_SEARCH_CACHE_TIMEOUT
+    return settings.TMDB_PERSON_CREDITS_CACHE_TIMEOUT
+
+
+def get_cached_search_results(
+    query: str, search_type: SearchType, lang: str
+) -> Optional[list[TmdbMovieListResultProcessed]]:
+    """Get cached search results or None if they are not cached."""
+    results: Optional[list[TmdbMovieListResultProcessed]] = cache.get(get_search_cache_key(query, search_type, lang))
+    return results
+
+
+def cache_search_results(
+    query: str, search_type: SearchType, lang: str, results: list[TmdbMovieListResultProcessed]
+) -> None:
+    """Cache search results."""
+    cache.set(get_search_cache_key(query, search_type, lang), results, _get_search_cache_timeout(search_type))
+
+
+def _get_catalog_cache_key(catalog: TmdbCatalog) -> str:
+    """Get a catalog cache key."""
+    return f"{CATALOG_CACHE_KEY_PREFIX}:{catalog}"
+
+
+def _get_catalog_refresh_lock_key(catalog: TmdbCatalog) -> str:
+    """Get a catalog refresh lock key."""
+    return f"{CATALOG_CACHE_KEY_PREFIX}-refresh:{catalog}"
+
+
+def get_cached_catalog(catalog: TmdbCatalog) -> Optional[TmdbCatalogCacheEntry]:
+    """Get a cached catalog or None if it is not cached."""
+    entry: Optional[TmdbCatalogCacheEntry] = cache.get(_get_catalog_cache_key(catalog))
+    return entry
+
+
+def is_catalog_stale(entry: TmdbCatalogCacheEntry) -> bool:
+    """Return True if a cached catalog needs a refresh."""
+    return time() - entry["update_time"] > settings.TMDB_CATALOG_REFRESH_INTERVAL
+
+
+def cache_catalog(catalog: TmdbCatalog, movies: list[TmdbMovieListResultProcessed]) -> None:
+    """
+    Cache a catalog.
+
+    The catalog never expires so that a stale copy can be served while it is being refreshed.
+    """
+    entry: TmdbCatalogCacheEntry = {"movies": movies, "update_time": time()}
+    cache.set(_get_catalog_cache_key(catalog), entry, None)
+    release_catalog_refresh_lock(catalog)
+
+
+def acquire_catalog_refresh_lock(catalog: TmdbCatalog) -> bool:
+    """
+    Acquire a catalog refresh lock.
+
+    Return True if the lock is acquired, so that only one refresh is scheduled at a time.
+    """
+    added: bool = cache.add(_get_catalog_refresh_lock_key(catalog), True, settings.TMDB_CATALOG_REFRESH_LOCK_TIMEOUT)
+    return added
+
+
+def release_catalog_refresh_lock(catalog: TmdbCatalog) -> None:
+    """Release a catalog refresh lock."""
+    cache.delete(_get_catalog_refresh_lock_key(catalog))
+
+
+def _get_imdb_id_cache_key(imdb_id: str) -> str:
+    """Get an IMDb ID cache key."""
+    return f"{IMDB_ID_CACHE_KEY_PREFIX}:{imdb_id}"
+
+
+def get_cached_movies_by_imdb_ids(imdb_ids: list[str]) -> Dict[str, Optional[TmdbMovieListResultProcessed]]:
+    """
+    Get cached TMDB movies by IMDb IDs.
+
+    Movies that are not cached are omitted. None is returned for IMDb IDs which were recently not found on TMDB.
+    """
+    keys = {_get_imdb_id_cache_key(imdb_id): imdb_id for imdb_id in imdb_ids}
+    cached_movies: Dict[str, Union[TmdbMovieListResultProcessed, str]] = cache.get_many(list(keys))
+    return {keys[key]: None if isinstance(movie, str) else movie for key, movie in cached_movies.items()}
+
+
+def cache_movies_by_imdb_ids(movies: Dict[str, TmdbMovieListResultProcessed]) -> None:
+    """Cache TMDB movies by IMDb IDs."""
+    cache.set_many(
+        {_get_imdb_id_cache_key(imdb_id): movie for imdb_id, movie in movies.items()},
+        settings.TMDB_IMDB_ID_CACHE_TIMEOUT,
+    )
+
+
+def cache_imdb_ids_not_found(imdb_ids: list[str]) -> None:
+    """Cache IMDb IDs which are not found on TMDB, so that they are not requested again for a while."""
+    cache.set_many(
+        {_get_imdb_id_cache_key(imdb_id): IMDB_ID_NOT_FOUND for imdb_id in imdb_ids},
+        settings.TMDB_IMDB_ID_NOT_FOUND_CACHE_TIMEOUT,
+    )
@@ -5,28 +5,44 @@ from datetime import date, datetime, time, timedelta
 from typing import Optional, cast
 from urllib.parse import urljoin
 
-import requests
 import tmdbsimple as tmdb
 from django.conf import settings
 from sentry_sdk import capture_exception
 
 from ..exceptions import TrailerSiteNotFoundError
-from ..types import SearchType, TmdbMovieListResultProcessed, TmdbMovieProcessed, TmdbTrailer, WatchDataRecord
+from ..http_client import get_session
+from ..types import (
+    SearchType,
+    TmdbCatalog,
+    TmdbMovieListResultProcessed,
+    TmdbMovieProcessed,
+    TmdbTrailer,
+    TrailerSite,
+    WatchDataRecord,
+)
 from ..validation import validate_language
+from .cache import cache_catalog, cache_search_results, get_cached_search_results
 from .exceptions import TmdbInvalidSearchTypeError, TmdbNoImdbIdError
 from .types import (
     TmdbCast,
+    TmdbChanges,
     TmdbCombinedCredits,
     TmdbCrew,
-    TmdbMovie,
+    TmdbMovieFull,
     TmdbMovieListResult,
     TmdbPerson,
     TmdbProvider,
+    TmdbVideos,
     TmdbWatchData,
     TmdbWatchDataCountry,
 )
 
 tmdb.API_KEY = settings.TMDB_KEY
+tmdb.REQUESTS_SESSION = get_session()
+tmdb.REQUESTS_TIMEOUT = settings.REQUESTS_TIMEOUT
+
+MOVIE_APPEND_TO_RESPONSE = "videos,watch/providers,external_ids"
+TMDB_CHANGES_MAX_DAYS = 14
 
 
 def get_tmdb_url(tmdb_id: int) -> str:
@@ -86,19 +102,8 @@ def _get_processed_movie_data(
     return movies
 
 
-def search_movies(query_str: str, search_type: SearchType, lang: str) -> list[TmdbMovieListResultProcessed]:
-    """
-    Search Movies.
-
-    Searches for movies based on the query string.
-    For actor, director search - the first person found is used.
-    """
-    SEARCH_TYPES = ["movie", "actor", "director"]
-    if search_type not in SEARCH_TYPES:
-        raise TmdbInvalidSearchTypeError(search_type)
-
-    validate_language(lang)
-
+def _search_movies(query_str: str, search_type: SearchType, lang: str) -> list[TmdbMovieListResultProcessed]:
+    """Search movies in TMDB."""
     query = query_str.encode("utf-8")
     params = {"query": query, "language": lang, "include_adult": settings.INCLUDE_ADULT}
     search = tmdb.Search()
@@ -125,15 +130,36 @@ def search_movies(query_str: str, search_type: SearchType, lang: str) -> list[Tm
     return movies_processed
 
 
+def search_movies(query_str: str, search_type: SearchType, lang: str) -> list[TmdbMovieListResultProcessed]:
+    """
+    Search Movies.
+
+    Searches for movies based on the query string.
+    For actor, director search - the first person found is used.
+    Results are cached.
+    """
+    SEARCH_TYPES = ["movie", "actor", "director"]
+    if search_type not in SEARCH_TYPES:
+        raise TmdbInvalidSearchTypeError(search_type)
+
+    validate_language(lang)
+
+    query_str = " ".join(query_str.split())
+    movies = get_cached_search_results(query_str, search_type, lang)
+    if movies is None:
+        movies = _search_movies(query_str, search_type, lang)
+        cache_search_results(query_str, search_type, lang, movies)
+    return movies
+
+
 def _is_valid_trailer_site(site: str) -> bool:
     """Return True if trailer site is valid."""
     return site in settings.TRAILER_SITES.keys()
 
 
-def _get_trailers(tmdb_movie: tmdb.Movies, lang: str) -> list[TmdbTrailer]:
+def _get_trailers(videos: TmdbVideos) -> list[TmdbTrailer]:
     """Get trailers."""
     trailers = []
-    videos = tmdb_movie.videos(language=lang)
     for video in videos["results"]:
         if video.get("type") == "Trailer":
             site = video["site"]
@@ -145,15 +171,18 @@ def _get_trailers(tmdb_movie: tmdb.Movies, lang: str) -> list[TmdbTrailer]:
                     raise
                 capture_exception(e)
                 continue
-            trailer: TmdbTrailer = {"name": video.get("name", "Trailer"), "key": video["key"], "site": site}
+            trailer: TmdbTrailer = {
+                "name": video.get("name", "Trailer"),
+                "key": video["key"],
+                "site": cast(TrailerSite, site),
+            }
             trailers.append(trailer)
     return trailers
 
 
-def get_watch_data(tmdb_id: int) -> list[WatchDataRecord]:
-    """Get watch data."""
+def _get_watch_data(results: TmdbWatchData) -> list[WatchDataRecord]:
+    """Get watch data from TMDB watch providers results."""
     watch_data: list[WatchDataRecord] = []
-    results: TmdbWatchData = tmdb.Movies(tmdb_id).watch_providers()["results"]
     items: abc.ItemsView[str, TmdbWatchDataCountry] = cast(abc.ItemsView[str, TmdbWatchDataCountry], results.items())
     for country, data in items:
         if country in settings.PROVIDERS_SUPPORTED_COUNTRIES and "flatrate" in data:
@@ -163,9 +192,18 @@ def get_watch_data(tmdb_id: int) -> list[WatchDataRecord]:
     return watch_data
 
 
-def _get_movie_data(tmdb_movie: tmdb.Movies, lang: str) -> TmdbMovie:
-    """Get movie data."""
-    movie: TmdbMovie = tmdb_movie.info(language=lang)
+def get_watch_data(tmdb_id: int) -> list[WatchDataRecord]:
+    """Get watch data."""
+    return _get_watch_data(tmdb.Movies(tmdb_id).watch_providers()["results"])
+
+
+def _get_movie_data(tmdb_movie: tmdb.Movies, lang: str) -> TmdbMovieFull:
+    """
+    Get movie data.
+
+    Videos, watch providers and external IDs are appended to the response so that a single request is made.
+    """
+    movie: TmdbMovieFull = tmdb_movie.info(language=lang, append_to_response=MOVIE_APPEND_TO_RESPONSE)
     return movie
 
 
@@ -175,28 +213,58 @@ def _get_time_from_min(minutes: Optional[int]) -> Optional[time]:
     return None
 
 
-def get_tmdb_movie_data(tmdb_id: int) -> TmdbMovieProcessed:
-    """Get TMDB movie data."""
-    tmdb_movie = tmdb.Movies(tmdb_id)
-    movie_info_en = _get_movie_data(tmdb_movie, lang=settings.LANGUAGE_EN)
-    imdb_id = movie_info_en.get("imdb_id")
+def get_tmdb_movie_data_with_watch_data(tmdb_id: int) -> tuple[TmdbMovieProcessed, list[WatchDataRecord]]:
+    """Get TMDB movie data and watch data with a single request."""
+    movie_info_en = _get_movie_data(tmdb.Movies(tmdb_id), lang=settings.LANGUAGE_EN)
+    imdb_id = movie_info_en.get("imdb_id") or movie_info_en.get("external_ids", {}).get("imdb_id")
     # Fail early if the IMDb ID is not found.
     if not imdb_id:
         raise TmdbNoImdbIdError(tmdb_id)
     release_date = _get_date(movie_info_en.get("release_date"))
-    # movie_info_ru = _get_movie_data(tmdb_movie, lang=settings.LANGUAGE_RU)
-    return {
+    movie_data: TmdbMovieProcessed = {
         "tmdb_id": tmdb_id,
         "imdb_id": imdb_id,
         "release_date": release_date,
         "title_original": movie_info_en["original_title"],
         "poster": _remove_trailing_slash_from_tmdb_poster(movie_info_en.get("poster_path")),
         "homepage": movie_info_en.get("homepage"),
-        "trailers": _get_trailers(tmdb_movie, lang=settings.LANGUAGE_EN),
+        "trailers": _get_trailers(movie_info_en.get("videos", {"results": []})),
         "title": movie_info_en["title"],
         "overview": movie_info_en.get("overview"),
         "runtime": _get_time_from_min(movie_info_en.get("runtime")),
     }
+    watch_data = _get_watch_data(movie_info_en.get("watch/providers", {"results": {}})["results"])
+    return movie_data, watch_data
+
+
+def get_tmdb_movie_data(tmdb_id: int) -> TmdbMovieProcessed:
+    """Get TMDB movie data."""
+    movie_data, _ = get_tmdb_movie_data_with_watch_data(tmdb_id)
+    return movie_data
+
+
+def get_changed_movie_ids(start_date: date, end_date: date) -> set[int]:
+    """
+    Get IDs of movies changed on TMDB between the dates (inclusive).
+
+    TMDB returns changes for up to 14 days per request so the date range is split.
+    """
+    tmdb_changes = tmdb.Changes()
+    movie_ids: set[int] = set()
+    window_start_date = start_date
+    while window_start_date <= end_date:
+        window_end_date = min(window_start_date + timedelta(days=TMDB_CHANGES_MAX_DAYS - 1), end_date)
+        page = 1
+        total_pages = 1
+        while page <= total_pages:
+            changes: TmdbChanges = tmdb_changes.movie(
+                start_date=window_start_date.isoformat(), end_date=window_end_date.isoformat(), page=page
+            )
+            movie_ids.update(change["id"] for change in changes["results"])
+            total_pages = changes["total_pages"]
+            page += 1
+        window_start_date = window_end_date + timedelta(days=1)
+    return movie_ids
 
 
 def get_tmdb_providers() -> list[TmdbProvider]:
@@ -206,7 +274,7 @@ def get_tmdb_providers() -> list[TmdbProvider]:
     The functionality is not supported by tmdbsimple so we have to use the API directly.
     """
     params = {"api_key": settings.TMDB_KEY}
-    response = requests.get(
+    response = get_session().get(
         urljoin(settings.TMDB_API_BASE_URL, "watch/providers/movie"), params=params, timeout=settings.REQUESTS_TIMEOUT
     )
     providers: list[TmdbProvider] = response.json()["results"]
@@ -223,3 +291,13 @@ def get_upcoming() -> list[TmdbMovieListResultProcessed]:
     """Get upcoming movies."""
     tmdb_upcoming = tmdb.Movies().upcoming()
     return _get_processed_movie_data(tmdb_upcoming["results"])
+
+
+def refresh_catalog(catalog: TmdbCatalog) -> list[TmdbMovieListResultProcessed]:
+    """Load a catalog from TMDB, cache it and return its movies."""
+    if catalog == "trending":
+        movies = get_trending()
+    else:  # catalog == "upcoming"
+        movies = get_upcoming()
+    cache_catalog(catalog, movies)
+    return movies
@@ -172,3 +172,68 @@ class TmdbWatchData(TypedDict, total=False):
     US: TmdbWatchDataCountry
     VE: TmdbWatchDataCountry
     ZA: TmdbWatchDataCountry
+
+
+class TmdbVideo(TypedDict, total=False):
+    """TMDB video."""
+
+    id: str
+    iso_639_1: str
+    iso_3166_1: str
+    key: str
+    name: str
+    official: bool
+    published_at: str
+    site: str
+    size: int
+    type: str
+
+
+class TmdbVideos(TypedDict):
+    """TMDB videos."""
+
+    results: list[TmdbVideo]
+
+
+class TmdbWatchProviders(TypedDict):
+    """TMDB watch providers."""
+
+    results: TmdbWatchData
+
+
+class TmdbExternalIds(TypedDict, total=False):
+    """TMDB external IDs."""
+
+    imdb_id: Optional[str]
+    wikidata_id: Optional[str]
+    facebook_id: Optional[str]
+    instagram_id: Optional[str]
+    twitter_id: Optional[str]
+
+
+# "watch/providers" is not a valid identifier so the functional syntax is used
+TmdbMovieAppendedResponses = TypedDict(
+    "TmdbMovieAppendedResponses",
+    {"videos": TmdbVideos, "watch/providers": TmdbWatchProviders, "external_ids": TmdbExternalIds},
+    total=False,
+)
+
+
+class TmdbMovieFull(TmdbMovie, TmdbMovieAppendedResponses, total=False):
+    """TMDB movie with videos, watch providers and external IDs appended to the response."""
+
+
+class TmdbChange(TypedDict, total=False):
+    """TMDB change."""
+
+    id: int
+    adult: Optional[bool]
+
+
+class TmdbChanges(TypedDict):
+    """TMDB changes."""
+
+    results: list[TmdbChange]
+    page: int
+    total_pages: int
+    total_results: int
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from datetime import date, time
+from datetime import date, datetime, time
 from typing import Any, Literal, Optional, TypeAlias  # pylint: disable=unused-import
 
 from django.urls import URLPattern, URLResolver
@@ -34,12 +34,6 @@ class WatchDataRecord(TypedDict):
     country: str
 
 
-class ProviderRecordType(WatchDataRecord, total=False):
-    """Provider record."""
-
-    id: int
-
-
 class Trailer(TypedDict):
     """Trailer."""
 
@@ -103,8 +97,99 @@ class MovieTmdbOmdb(TmdbMovieProcessed, OmdbMovieProcessed):
     """Movie TMDb and OMDb merged together."""
 
 
+class RecordStatsData(TypedDict):
+    """Record data used for stats."""
+
+    list_id: int
+    date: datetime
+    rating: int
+    watched_in_theatre: bool
+    watched_in_hd: bool
+    watched_in_full_hd: bool
+    watched_in_4k: bool
+    watched_extended: bool
+    watched_original: bool
+    runtime: Optional[time]
+    release_date: Optional[date]
+    genre: Optional[str]
+    director: Optional[str]
+    actors: Optional[str]
+
+
+class UserStatsCounters(TypedDict):
+    """User stats counters."""
+
+    movies_watched: int
+    movies_to_watch: int
+    # Runtime in seconds
+    runtime: int
+    ratings: dict[str, int]
+    months: dict[str, int]
+    release_years: dict[str, int]
+    quality: dict[str, int]
+    genres: dict[str, int]
+    directors: dict[str, int]
+    actors: dict[str, int]
+
+
+class TmdbCatalogCacheEntry(TypedDict):
+    """Cached TMDB catalog (trending or upcoming movies)."""
+
+    movies: list[TmdbMovieListResultProcessed]
+    # Unix timestamp
+    update_time: float
+
+
+class HttpPoolStats(TypedDict):
+    """HTTP connection pool stats of a host."""
+
+    host: str
+    connections: int
+    requests: int
+    # Number of requests that were sent over an already open connection
+    reused: int
+
+
+class RefreshResult(TypedDict):
+    """Result of a refresh command run or of a chunk of a distributed run."""
+
+    processed: int
+    updated: int
+    errors: int
+
+
+class RollingRefreshSettings(TypedDict):
+    """Rolling refresh settings of a refresh command."""
+
+    interval: int
+    shards: int
+    max_movies: int
+
+
+class ProviderLogoSpriteItem(TypedDict):
+    """Position of a provider logo in the sprite image."""
+
+    x: int
+    y: int
+    width: int
+    height: int
+
+
 TrailerSite = Literal["YouTube", "Vimeo"]
 SearchType = Literal["movie", "actor", "director"]
+TmdbCatalog = Literal["trending", "upcoming"]
+QualityField = Literal[
+    "watched_in_theatre",
+    "watched_in_hd",
+    "watched_in_full_hd",
+    "watched_in_4k",
+    "watched_extended",
+    "watched_original",
+]
+CommaSeparatedField = Literal["genre", "director", "actors"]
+MovieStatsField = Literal["runtime", "release_date", "genre", "director", "actors"]
+UserStatsTotalField = Literal["movies_watched", "movies_to_watch", "runtime"]
+UserStatsCounterField = Literal["ratings", "months", "release_years", "quality", "genres", "directors", "actors"]
 
 # UntypedObject means it is a loaded JSON object
 UntypedObject: TypeAlias = dict[str, Any]
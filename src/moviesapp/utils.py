@@ -1,7 +1,10 @@
 """Utils."""
 
+import hashlib
+import json
+from collections.abc import Mapping
 from datetime import date
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Optional
 from urllib.parse import quote
 
 from .omdb import get_omdb_movie_data
@@ -42,6 +45,13 @@ def load_movie_data(tmdb_id: int) -> MovieTmdbOmdb:
     return merge_movie_data(movie_data_tmdb, movie_data_omdb)
 
 
+def get_movie_data_hash(movie_data: Mapping[str, Any]) -> str:
+    """Get a hash of movie data. It does not depend on the order of keys."""
+    # Dates and times are serialized in ISO format
+    data = json.dumps(movie_data, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
 def is_movie_released(release_date: Optional[date]) -> bool:
     """Return True if the movie is released."""
     return release_date is not None and release_date <= date.today()
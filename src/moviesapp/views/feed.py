@@ -1,29 +1,92 @@
 """Feed views."""
 
-from typing import TYPE_CHECKING, Any, Union
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Optional, Sequence, TypeVar, Union, cast
 
-from django.db.models import Q, QuerySet
+from django.db.models import Model, Q, QuerySet
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework.views import APIView
 
-from ..models import ActionRecord, Follow
+from ..models import ActionRecord, Follow, TimelineEntry, User
+from .utils import decode_cursor, encode_cursor
 
 if TYPE_CHECKING:
     from rest_framework.permissions import BasePermission
 
 
+FeedItem = TypeVar("FeedItem", bound=Model)
+
+
 class FeedPagination(PageNumberPagination):
-    """Feed pagination."""
+    """
+    Feed pagination.
+
+    If the `cursor` query parameter is provided, keyset pagination on `(date, id)` is used instead of page numbers.
+    Action records are not counted and a page costs the same no matter how deep it is.
+    An empty cursor means the first page.
+    """
 
     page_size = 20
     page_size_query_param = "page_size"
     max_page_size = 100
+    cursor_query_param = "cursor"
+    next_cursor: Optional[str] = None
+    is_cursor_mode = False
+
+    def paginate_queryset(  # type: ignore[override]
+        self, queryset: QuerySet[FeedItem], request: Request, view: Optional[APIView] = None, id_field: str = "pk"
+    ) -> Optional[Sequence[FeedItem]]:
+        """
+        Paginate a queryset.
+
+        In cursor mode items are ordered by `date` and `id_field` in descending order.
+        """
+        cursor: Optional[str] = request.query_params.get(self.cursor_query_param)
+        if cursor is None:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.is_cursor_mode = True
+        queryset = queryset.order_by("-date", f"-{id_field}")
+        # Empty cursor means the first page
+        if cursor:
+            date, id_ = decode_cursor(cursor, (datetime, int))
+            queryset = queryset.filter(Q(date__lt=date) | Q(date=date, **{f"{id_field}__lt": id_}))
+        page_size = self.get_page_size(request) or self.page_size
+        # Fetch one extra item to know if there is a next page without running COUNT
+        page = list(queryset[: page_size + 1])
+        if len(page) > page_size:
+            page = page[:page_size]
+            last_item = page[-1]
+            self.next_cursor = encode_cursor([last_item.date.isoformat(), getattr(last_item, id_field)])  # type: ignore
+        return page
+
+    def get_paginated_response(self, data: Any) -> Response:
+        """Get paginated response."""
+        if not self.is_cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({"next": self.get_next_link(), "previous": None, "results": data})
+
+    def get_next_link(self) -> Optional[str]:
+        """Get next link."""
+        if not self.is_cursor_mode:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(cast(Request, self.request).build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
 
 
 class FeedView(APIView):
-    """Feed view."""
+    """
+    Feed view.
+
+    The feed of a user who follows other users is read from their timeline (see `TimelineEntry`).
+    If the timeline is not built yet, the feed is loaded from the action log.
+    """
 
     permission_classes: list[type["BasePermission"]] = []
     pagination_class = FeedPagination
@@ -38,14 +101,14 @@ class FeedView(APIView):
             base_query = (
                 ActionRecord.objects.select_related("user", "action", "movie", "list")
                 .exclude(Q(user__hidden=True) | (Q(user__only_for_friends=True) & ~Q(user=user)))
-                .order_by("-date")
+                .order_by("-date", "-pk")
             )
         else:
             # Anonymous user - exclude hidden users and all only_for_friends users
             base_query = (
                 ActionRecord.objects.select_related("user", "action", "movie", "list")
                 .exclude(Q(user__hidden=True) | Q(user__only_for_friends=True))
-                .order_by("-date")
+                .order_by("-date", "-pk")
             )
 
         # Determine which users' activity to show
@@ -55,6 +118,8 @@ class FeedView(APIView):
 
             if following_users.exists():
                 # Show only activity from followed users
+                if user.timeline_built:
+                    return self._get_timeline_response(user, request)
                 queryset = base_query.filter(user_id__in=following_users)
             else:
                 # User is not following anyone, show all activity
@@ -74,9 +139,29 @@ class FeedView(APIView):
         data = self._serialize_actions(queryset)
         return Response(data)
 
+    def _get_timeline_response(self, user: User, request: Request) -> Response:
+        """
+        Return activity feed from the timeline of the user.
+
+        Only a page of action record IDs is read from the timeline and then the action records are loaded by ID.
+        """
+        entries = (
+            TimelineEntry.objects.filter(owner=user)
+            .order_by("-date", "-action_record_id")
+            .only("action_record_id", "date")
+        )
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(entries, request, id_field="action_record_id") or []
+        action_record_ids = [entry.action_record_id for entry in page]
+        actions = ActionRecord.objects.select_related("user", "action", "movie", "list").in_bulk(action_record_ids)
+        data = self._serialize_actions(
+            [actions[action_record_id] for action_record_id in action_record_ids if action_record_id in actions]
+        )
+        return paginator.get_paginated_response(data)
+
     # pylint: disable=no-self-use
     def _serialize_actions(
-        self, actions: Union[QuerySet[ActionRecord, ActionRecord], list[ActionRecord]]
+        self, actions: Union[QuerySet[ActionRecord, ActionRecord], Sequence[ActionRecord]]
     ) -> list[dict[str, Any]]:
         """Serialize action records for the feed."""
         feed_data = []
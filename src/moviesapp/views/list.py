@@ -2,11 +2,13 @@
 
 import csv
 import logging
+from datetime import datetime
 from http import HTTPStatus
 from typing import TYPE_CHECKING, Any, Optional, Union, cast
 
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
-from django.db.models import QuerySet, prefetch_related_objects
+from django.db.models import Q, QuerySet, prefetch_related_objects
 from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework.request import Request
@@ -15,8 +17,16 @@ from rest_framework.views import APIView
 
 from ..models import Action, ActionRecord, List, Movie, ProviderRecord, Record, User, UserAnonymous
 from ..utils import generate_x_share_url
-from .types import MovieObject, OptionsObject, ProviderObject, ProviderRecordObject, RecordObject
-from .utils import add_movie_to_list, get_anothers_account
+from .types import (
+    CursorPosition,
+    MovieObject,
+    OptionsObject,
+    ProviderObject,
+    ProviderRecordObject,
+    RecordObject,
+    RecordsPage,
+)
+from .utils import add_movie_to_list, decode_cursor, encode_cursor, get_anothers_account
 
 if TYPE_CHECKING:
     from rest_framework.permissions import BasePermission
@@ -156,7 +166,44 @@ class RecordsView(APIView):
         """Sort records."""
         # Sort by custom order first (ascending), then by date (descending) as fallback
         # This ensures that records with order=0 (default) fall back to date sorting
-        return records.order_by("order", "-date")
+        # The primary key is the tie-breaker which makes the ordering total and keyset pagination stable
+        return records.order_by("order", "-date", "-pk")
+
+    @staticmethod
+    def _get_cursor_position(record: Record) -> CursorPosition:
+        """Get keyset pagination position of a record."""
+        return [record.order, record.date.isoformat(), record.pk]
+
+    @staticmethod
+    def _filter_records_after_cursor(records: QuerySet[Record], cursor: str) -> QuerySet[Record]:
+        """
+        Filter records that go after the cursor position in the sort order.
+
+        Raise ValidationError if the cursor is invalid.
+        """
+        order, date, pk = decode_cursor(cursor, (int, datetime, int))
+        return records.filter(
+            Q(order__gt=order) | Q(order=order, date__lt=date) | Q(order=order, date=date, pk__lt=pk)
+        )
+
+    def _get_records_page(self, records: QuerySet[Record], cursor: str) -> tuple[list[Record], Optional[str]]:
+        """
+        Get a page of records using keyset pagination.
+
+        Returns a tuple of the records on the page and the cursor of the next page (None if it is the last page).
+        Raise ValidationError if the cursor is invalid.
+        """
+        # Empty cursor means the first page
+        if cursor:
+            records = self._filter_records_after_cursor(records, cursor)
+        page_size = settings.RECORDS_ON_PAGE
+        # Fetch one extra record to know if there is a next page without running COUNT
+        page = list(records[: page_size + 1])
+        next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            next_cursor = encode_cursor(self._get_cursor_position(page[-1]))
+        return page, next_cursor
 
     @staticmethod
     def _get_record_movie_data(
@@ -263,7 +310,7 @@ class RecordsView(APIView):
             "ignoreRewatch": record.ignore_rewatch,
         }
 
-    def _get_record_objects(self, records: QuerySet[Record]) -> list[RecordObject]:
+    def _get_record_objects(self, records: list[Record]) -> list[RecordObject]:
         """Get record objects."""
         record_objects: list[RecordObject] = []
         for record in records:
@@ -277,7 +324,7 @@ class RecordsView(APIView):
                 "providerRecords": self._get_provider_record_objects(provider_records),
                 "movie": self._get_movie_object(record.movie),
                 "options": self._get_options_object(record),
-                "listId": record.list.pk,
+                "listId": record.list_id,
                 "additionDate": record.date.timestamp(),
             }
             record_objects.append(record_object)
@@ -312,7 +359,12 @@ class RecordsView(APIView):
                 raise PermissionDenied
 
     def get(self, request: Request, **kwargs: Any) -> Response:
-        """Get data for the list view."""
+        """
+        Get data for the list view.
+
+        If the `cursor` query parameter is provided, a page of `RECORDS_ON_PAGE` records is returned along with the
+        cursor of the next page. An empty cursor means the first page. Otherwise all records are returned.
+        """
         username: Optional[str] = kwargs.get("username")
         self.check_if_allowed(request, username)
         anothers_account = self.anothers_account
@@ -320,16 +372,25 @@ class RecordsView(APIView):
         records = self._get_records(user)
         records = self._sort_records(records)
 
+        cursor: Optional[str] = request.query_params.get("cursor")
+        next_cursor = None
+        if cursor is None:
+            record_list = list(records)
+        else:
+            record_list, next_cursor = self._get_records_page(records, cursor)
+
         actual_user: User = cast(User, request.user)
         if actual_user.is_authenticated and actual_user.is_country_supported:
-            record_list = list(records)
             prefetch_related_objects(record_list, "movie__provider_records__provider")
 
         # if anothers_account:
         #     self._inject_list_ids(records, record_objects)
-        record_objects = self._get_record_objects(records)
+        record_objects = self._get_record_objects(record_list)
 
-        return Response(record_objects)
+        if cursor is None:
+            return Response(record_objects)
+        records_page: RecordsPage = {"results": record_objects, "next": next_cursor}
+        return Response(records_page)
 
 
 class SaveRecordsOrderView(APIView):
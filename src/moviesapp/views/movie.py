@@ -15,7 +15,7 @@ from sentry_sdk import capture_exception
 
 from ..models import Movie, ProviderRecord, Record, User
 from ..omdb import get_omdb_movie_data
-from ..tmdb import get_poster_url, get_tmdb_movie_data, get_tmdb_url, get_watch_data
+from ..tmdb import get_poster_url, get_tmdb_movie_data, get_tmdb_url
 from ..utils import is_movie_released
 from .types import MovieObject, ProviderObject, ProviderRecordObject, RecordObject
 
@@ -225,18 +225,6 @@ class MovieDetailView(APIView):
 
         return trailers
 
-    @staticmethod
-    def _get_tmdb_provider_records(tmdb_id: int) -> list[ProviderRecord]:
-        """Get provider records from TMDB for a movie not in database."""
-        try:
-            # Note: This returns empty list since we don't have Provider objects in DB
-            # for movies not in our database. We could enhance this later.
-            _ = get_watch_data(tmdb_id)  # Keep the call but mark as intentionally unused
-            return []
-        except Exception as e:  # pylint: disable=broad-exception-caught
-            capture_exception(e)
-            return []
-
     def get(self, request: Request, tmdb_id: int) -> Response:  # pylint: disable=unused-argument
         """Get movie details by TMDB ID."""
         try:
@@ -257,7 +245,8 @@ class MovieDetailView(APIView):
         except Movie.DoesNotExist:
             # Movie not in database - fetch from TMDB
             movie_object = self._create_movie_object_from_tmdb(tmdb_id)
-            provider_records = self._get_tmdb_provider_records(tmdb_id)
+            # Provider records are not stored for movies which are not in the database
+            provider_records = []
 
             response_data = {
                 "movie": movie_object,
@@ -1,5 +1,6 @@
 """AI Recommendations view."""
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from http import HTTPStatus
 from typing import TYPE_CHECKING, Dict, Optional, cast
@@ -12,10 +13,11 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from sentry_sdk import capture_exception
 
-from ..models import List, User
+from ..models import List, Movie, User
 from ..openai.client import OpenAIClient
 from ..openai.exceptions import OpenAIError
 from ..openai.types import RecommendationRequest, RecommendationResponse
+from ..tmdb.cache import cache_imdb_ids_not_found, cache_movies_by_imdb_ids, get_cached_movies_by_imdb_ids
 from ..types import TmdbMovieListResultProcessed
 from .types import MovieListResult
 from .utils import filter_out_movies_user_already_has_in_lists, get_movie_list_result
@@ -61,6 +63,60 @@ def _get_tmdb_movie_from_imdb_id(imdb_id: str) -> Optional[TmdbMovieListResultPr
         return None
 
 
+def _get_db_movies_by_imdb_ids(imdb_ids: list[str]) -> Dict[str, TmdbMovieListResultProcessed]:
+    """Get movies that are already in the database by IMDb IDs."""
+    movies: Dict[str, TmdbMovieListResultProcessed] = {}
+    for movie in Movie.objects.filter(imdb_id__in=imdb_ids).only(
+        "imdb_id", "tmdb_id", "title", "title_original", "poster", "release_date"
+    ):
+        movies[movie.imdb_id] = TmdbMovieListResultProcessed(
+            id=movie.tmdb_id,
+            title=movie.title,
+            title_original=movie.title_original,
+            poster_path=movie.poster,
+            release_date=movie.release_date,
+            popularity=0,
+        )
+    return movies
+
+
+def _get_tmdb_movies_from_imdb_ids(imdb_ids: list[str]) -> Dict[str, TmdbMovieListResultProcessed]:
+    """
+    Get TMDB movie data from IMDb IDs.
+
+    Movies are looked up in the database first, then in the cache, and only the remaining IDs are requested from
+    TMDB concurrently. IDs which are not found are omitted. They are cached for a short time too,
+    so that failed lookups are not repeated by every request.
+    """
+    movies = _get_db_movies_by_imdb_ids(imdb_ids)
+    missing_imdb_ids = [imdb_id for imdb_id in imdb_ids if imdb_id not in movies]
+    cached_movies = get_cached_movies_by_imdb_ids(missing_imdb_ids)
+    movies.update({imdb_id: movie for imdb_id, movie in cached_movies.items() if movie is not None})
+    missing_imdb_ids = [imdb_id for imdb_id in missing_imdb_ids if imdb_id not in cached_movies]
+    if not missing_imdb_ids:
+        return movies
+
+    tmdb_movies: Dict[str, TmdbMovieListResultProcessed] = {}
+    not_found_imdb_ids: list[str] = []
+    with ThreadPoolExecutor(max_workers=settings.AI_TMDB_LOOKUP_WORKERS) as executor:
+        futures = [(imdb_id, executor.submit(_get_tmdb_movie_from_imdb_id, imdb_id)) for imdb_id in missing_imdb_ids]
+        for imdb_id, future in futures:
+            try:
+                tmdb_movie = future.result()
+            except (KeyError, ValueError, TypeError) as exc:
+                # Log but don't fail the entire request if one movie fails
+                capture_exception(exc)
+                tmdb_movie = None
+            if tmdb_movie:
+                tmdb_movies[imdb_id] = tmdb_movie
+            else:
+                not_found_imdb_ids.append(imdb_id)
+    cache_movies_by_imdb_ids(tmdb_movies)
+    cache_imdb_ids_not_found(not_found_imdb_ids)
+    movies.update(tmdb_movies)
+    return movies
+
+
 class RecommendationsView(APIView):
     """AI Recommendations view."""
 
@@ -144,18 +200,26 @@ class RecommendationsView(APIView):
     def _convert_recommendations_to_movies(
         recommendations: RecommendationResponse, lang: str
     ) -> list[MovieListResult]:
-        """Convert IMDB recommendations to movie list results."""
-        movies = []
+        """
+        Convert IMDB recommendations to movie list results.
+
+        The order of recommendations is preserved.
+        """
+        imdb_ids = []
         for recommendation in recommendations:
             try:
-                tmdb_movie = _get_tmdb_movie_from_imdb_id(recommendation["imdb_id"])
-                if tmdb_movie:
-                    movie_result = get_movie_list_result(tmdb_movie, lang)
-                    movies.append(movie_result)
-            except (KeyError, ValueError, TypeError) as exc:
-                # Log but don't fail the entire request if one movie fails
+                imdb_ids.append(recommendation["imdb_id"])
+            except KeyError as exc:
                 capture_exception(exc)
-                continue
+        tmdb_movies = _get_tmdb_movies_from_imdb_ids(list(dict.fromkeys(imdb_ids)))
+        movies = []
+        for imdb_id in imdb_ids:
+            tmdb_movie = tmdb_movies.get(imdb_id)
+            if tmdb_movie:
+                try:
+                    movies.append(get_movie_list_result(tmdb_movie, lang))
+                except (KeyError, ValueError, TypeError) as exc:
+                    capture_exception(exc)
         return movies
 
     def get(self, request: Request) -> Response:
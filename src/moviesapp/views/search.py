@@ -6,17 +6,19 @@ from operator import itemgetter
 from typing import TYPE_CHECKING, Optional, cast
 
 from django.conf import settings
+from django.db import transaction
 from django.http import Http404
+from django.shortcuts import get_object_or_404
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from sentry_sdk import capture_exception
 
+from ..exceptions import ProviderNotFoundError
 from ..models import List, Movie, User
-from ..tasks import load_and_save_watch_data_task
-from ..tmdb import TmdbInvalidSearchTypeError, TmdbNoImdbIdError, search_movies
+from ..tasks import load_movie_extra_data_task
+from ..tmdb import TmdbInvalidSearchTypeError, TmdbNoImdbIdError, get_tmdb_movie_data_with_watch_data, search_movies
 from ..types import SearchType, TmdbMovieListResultProcessed
-from ..utils import load_movie_data
 from .types import MovieListResult, SearchOptions
 from .utils import add_movie_to_list, filter_out_movies_user_already_has_in_lists, get_movie_list_result
 
@@ -98,13 +100,25 @@ class AddToListFromDbView(APIView):
         """
         Add a movie to the database.
 
+        TMDB data, trailers and watch data are loaded with a single TMDB request, OMDb data is loaded in the
+        background.
+        If the same movie is added concurrently it is created and loaded only once.
         Return movie ID.
         """
-        movie_data = load_movie_data(tmdb_id)
-        movie = Movie(**movie_data)
-        movie.save()
-        if movie.is_released:
-            load_and_save_watch_data_task.delay(movie.pk)
+        movie_data, watch_data = get_tmdb_movie_data_with_watch_data(tmdb_id)
+        movie, created = Movie.objects.get_or_create(
+            tmdb_id=tmdb_id, defaults={**movie_data, "data_status": Movie.DATA_LOADING}
+        )
+        if created:
+            # The task must not see the movie before it is committed
+            transaction.on_commit(lambda: load_movie_extra_data_task.delay(movie.pk))
+            if movie.is_released:
+                try:
+                    movie.save_watch_data(watch_data)
+                except ProviderNotFoundError as e:
+                    if settings.DEBUG:
+                        raise
+                    capture_exception(e)
         return movie.pk
 
     @staticmethod
@@ -175,4 +189,18 @@ class AddToListFromDbView(APIView):
                     # Movie not found in database
                     pass
             return Response({"status": "not_found"})
-        return Response()
+        movie = Movie.objects.only("data_status").get(tmdb_id=tmdb_id)
+        return Response({"dataStatus": movie.data_status})
+
+
+class MovieDataStatusView(APIView):
+    """Movie data status view."""
+
+    def get(self, request: Request, tmdb_id: int) -> Response:  # pylint: disable=unused-argument,no-self-use
+        """
+        Return the movie data status.
+
+        It is polled by the client after a movie is added until its data is loaded.
+        """
+        movie = get_object_or_404(Movie.objects.only("data_status"), tmdb_id=tmdb_id)
+        return Response({"status": movie.data_status})
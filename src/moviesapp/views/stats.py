@@ -1,65 +1,78 @@
 """Stats views."""
 
-from datetime import datetime, timedelta
-from typing import Any, Dict, List as ListType, cast
+from datetime import time, timedelta
+from typing import Any, Dict, List as ListType, Optional, cast
 
-from django.db.models import Avg, Count
-from django.db.models.query import QuerySet
+from django.db.models import F, QuerySet
+from django.utils.timezone import localtime, make_aware, override
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from ..models import List, Record, User
+from ..models import List, Record, User, UserStats
+from ..stats import QUALITY_FIELDS, get_empty_counters, get_runtime_seconds, get_top_items, split_comma_separated_value
+from ..types import CommaSeparatedField, UserStatsCounters
+from .types import WatchedRecordData
 
 TOP_ITEMS_LIMIT = 50
+TOP_RELEASE_YEARS_LIMIT = 5
 
 
 class StatsView(APIView):
-    """Stats view."""
+    """
+    Stats view.
 
-    def get(self, request: Request) -> Response:  # pylint: disable=no-self-use
+    Most of the stats are read from user stats snapshots (see `UserStats`).
+    Only the sections which need individual records query them and these queries are bounded
+    (recent records, a single year or a single record).
+    """
+
+    def get(self, request: Request) -> Response:
         """Get user statistics."""
         user: User = cast(User, request.user)
+        # Records are grouped by dates in the time zone of the user the same way as in the snapshots.
+        # The time zone is not activated by the middleware for API requests authenticated with JWT.
+        with override(user.timezone):
+            return Response(self._get_stats(user, request.query_params.get("year")))
 
-        # Get year parameter from query string
-        year = request.query_params.get("year")
-
-        # Get all user records
-        user_records = user.get_records()
-        watched_records = user_records.filter(list_id=List.WATCHED)
-        to_watch_records = user_records.filter(list_id=List.TO_WATCH)
+    def _get_stats(self, user: User, year: Optional[str]) -> Dict[str, Any]:
+        """Get user statistics in the current time zone."""
+        snapshots = UserStats.get_for_user(user)
 
         # Filter by year if specified
+        year_int: Optional[int] = None
         if year:
             try:
                 year_int = int(year)
-                watched_records = watched_records.filter(date__year=year_int)
-                to_watch_records = to_watch_records.filter(date__year=year_int)
             except ValueError:
                 pass  # Invalid year, use all records
+        counters = self._get_counters(snapshots, UserStats.ALL_TIME if year_int is None else year_int)
 
         # Calculate basic stats
-        basic_stats = self._get_basic_stats(watched_records, to_watch_records)
+        basic_stats = {
+            "totalMoviesWatched": counters["movies_watched"],
+            "totalMoviesToWatch": counters["movies_to_watch"],
+        }
 
         # Calculate time and rating stats
-        time_rating_stats = self._get_time_and_rating_stats(watched_records)
+        time_rating_stats = self._get_time_and_rating_stats(counters)
 
         # Get preference stats
-        preference_stats = self._get_preference_stats(watched_records)
+        preference_stats = self._get_preference_stats(counters)
 
         # Get trend stats
-        trend_stats = self._get_trend_stats(watched_records)
+        trend_stats = self._get_trend_stats(user, counters, year_int)
 
         # Get release date stats
-        release_date_stats = self._get_release_date_stats(watched_records)
+        release_date_stats = self._get_release_date_stats(user, counters, year_int)
 
         # Always get available years for the selector
-        available_years = self._get_available_years(user)
+        available_years = self._get_available_years(snapshots)
 
         # Get yearly stats if year is specified
         yearly_stats = {}
-        if year:
-            yearly_stats = self._get_yearly_stats(user, year_int)
+        if year_int is not None:
+            yearly_stats = self._get_yearly_stats(user, snapshots, year_int)
         else:
             # Include available years even when no year is selected
             yearly_stats = {"availableYears": available_years}
@@ -74,58 +87,85 @@ class StatsView(APIView):
             **yearly_stats,
         }
 
-        return Response(stats)
+        return stats
 
     @staticmethod
-    def _get_basic_stats(watched_records: "QuerySet[Record]", to_watch_records: "QuerySet[Record]") -> Dict[str, int]:
-        """Get basic count statistics."""
-        return {
-            "totalMoviesWatched": watched_records.count(),
-            "totalMoviesToWatch": to_watch_records.count(),
-        }
+    def _get_counters(snapshots: Dict[int, UserStats], year: int) -> UserStatsCounters:
+        """Get counters of a snapshot."""
+        if year in snapshots:
+            return snapshots[year].counters
+        return get_empty_counters()
 
     @staticmethod
-    def _get_time_and_rating_stats(watched_records: "QuerySet[Record]") -> Dict[str, Any]:
+    def _get_watched_records(user: User, year: Optional[int] = None) -> QuerySet[Record]:
+        """Get watched records, optionally filtered by the year they were watched in."""
+        records = user.get_records().filter(list_id=List.WATCHED)
+        if year is not None:
+            records = records.filter(date__year=year)
+        return records
+
+    def _get_watched_records_data(self, user: User, year: int) -> ListType[WatchedRecordData]:
+        """
+        Get watched records data for a year.
+
+        Only the fields that are needed for the stats are loaded, in a single query.
+        Records are ordered by ID to make the results deterministic.
+        """
+        records = (
+            self._get_watched_records(user, year)
+            .order_by("pk")
+            .values(
+                "list_id",
+                "date",
+                "rating",
+                *QUALITY_FIELDS.values(),
+                title=F("movie__title"),
+                runtime=F("movie__runtime"),
+                release_date=F("movie__release_date"),
+                genre=F("movie__genre"),
+                director=F("movie__director"),
+                actors=F("movie__actors"),
+            )
+        )
+        watched_records: ListType[WatchedRecordData] = []
+        for record in records:
+            record_data = cast(WatchedRecordData, record)
+            # Dates are used in the current time zone the same way the database does it for `date__year`
+            record_data["date"] = localtime(record_data["date"])
+            watched_records.append(record_data)
+        return watched_records
+
+    @staticmethod
+    def _get_time_and_rating_stats(counters: UserStatsCounters) -> Dict[str, Any]:
         """Get time watched and rating statistics."""
         # Calculate total hours watched
-        total_hours = 0.0
-        for record in watched_records.select_related("movie"):
-            if record.movie.runtime:
-                runtime_seconds = (
-                    record.movie.runtime.hour * 3600 + record.movie.runtime.minute * 60 + record.movie.runtime.second
-                )
-                total_hours += runtime_seconds / 3600
+        total_hours = counters["runtime"] / 3600
 
         # Rating statistics
-        rated_movies = watched_records.filter(rating__gt=0)
-        rating_stats = rated_movies.aggregate(average_rating=Avg("rating"), total_rated=Count("rating"))
+        ratings = counters["ratings"]
+        total_rated_movies = sum(ratings.values())
+        average_rating = (
+            sum(int(rating) * count for rating, count in ratings.items()) / total_rated_movies
+            if total_rated_movies
+            else None
+        )
 
         return {
             "totalHoursWatched": round(total_hours, 1),
-            "averageRating": round(rating_stats["average_rating"], 1) if rating_stats["average_rating"] else None,
-            "totalRatedMovies": rating_stats["total_rated"],
+            "averageRating": round(average_rating, 1) if average_rating else None,
+            "totalRatedMovies": total_rated_movies,
         }
 
-    def _get_preference_stats(self, watched_records: "QuerySet[Record]") -> Dict[str, Any]:
+    @staticmethod
+    def _get_preference_stats(counters: UserStatsCounters) -> Dict[str, Any]:
         """Get quality preferences and top genres/directors."""
         # Quality preferences
-        quality_stats = {
-            "theatre": watched_records.filter(watched_in_theatre=True).count(),
-            "hd": watched_records.filter(watched_in_hd=True).count(),
-            "fullHd": watched_records.filter(watched_in_full_hd=True).count(),
-            "fourK": watched_records.filter(watched_in_4k=True).count(),
-            "extended": watched_records.filter(watched_extended=True).count(),
-            "original": watched_records.filter(watched_original=True).count(),
-        }
+        quality_stats = {name: counters["quality"].get(name, 0) for name in QUALITY_FIELDS}
 
         # Top genres, directors, and actors
-        genre_counts = self._count_comma_separated_field(watched_records, "genre")
-        director_counts = self._count_comma_separated_field(watched_records, "director")
-        actor_counts = self._count_comma_separated_field(watched_records, "actors")
-
-        top_genres = sorted(genre_counts.items(), key=lambda x: x[1], reverse=True)[:TOP_ITEMS_LIMIT]
-        top_directors = sorted(director_counts.items(), key=lambda x: x[1], reverse=True)[:TOP_ITEMS_LIMIT]
-        top_actors = sorted(actor_counts.items(), key=lambda x: x[1], reverse=True)[:TOP_ITEMS_LIMIT]
+        top_genres = get_top_items(counters["genres"], TOP_ITEMS_LIMIT)
+        top_directors = get_top_items(counters["directors"], TOP_ITEMS_LIMIT)
+        top_actors = get_top_items(counters["actors"], TOP_ITEMS_LIMIT)
 
         return {
             "qualityPreferences": quality_stats,
@@ -134,23 +174,28 @@ class StatsView(APIView):
             "topActors": [{"name": name, "count": count} for name, count in top_actors],
         }
 
-    @staticmethod
-    def _get_trend_stats(watched_records: "QuerySet[Record]") -> Dict[str, Any]:
+    def _get_trend_stats(self, user: User, counters: UserStatsCounters, year: Optional[int]) -> Dict[str, Any]:
         """Get monthly trends and rating distribution."""
         # Monthly watching trends (last 12 months)
-        monthly_stats: ListType[Dict[str, Any]] = []
-        current_date = datetime.now()
+        current_date = localtime().replace(tzinfo=None)
+        months = []
         for i in range(12):
             month_start = current_date.replace(day=1) - timedelta(days=30 * i)
             month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-            month_count = watched_records.filter(date__gte=month_start, date__lte=month_end).count()
+            # Naive datetimes are interpreted in the current time zone the same way the database does it.
+            months.append((month_start, make_aware(month_start), make_aware(month_end)))
+        start = min(month_start_aware for _, month_start_aware, _ in months)
+        dates = list(self._get_watched_records(user, year).filter(date__gte=start).values_list("date", flat=True))
+        monthly_stats: ListType[Dict[str, Any]] = []
+        for month_start, month_start_aware, month_end_aware in months:
+            month_count = sum(1 for date in dates if month_start_aware <= date <= month_end_aware)
             monthly_stats.append({"month": month_start.strftime("%Y-%m"), "count": month_count})
         monthly_stats.reverse()
 
         # Rating distribution
         rating_distribution: Dict[str, int] = {}
         for i in range(1, 11):
-            count = watched_records.filter(rating=i).count()
+            count = counters["ratings"].get(str(i), 0)
             if count > 0:
                 rating_distribution[str(i)] = count
 
@@ -160,39 +205,33 @@ class StatsView(APIView):
         }
 
     @staticmethod
-    def _count_comma_separated_field(records: "QuerySet[Record]", field_name: str) -> Dict[str, int]:
+    def _count_comma_separated_field(
+        records: ListType[WatchedRecordData], field_name: CommaSeparatedField
+    ) -> Dict[str, int]:
         """Count occurrences in comma-separated field."""
         counts: Dict[str, int] = {}
-        for record in records.select_related("movie"):
-            field_value = getattr(record.movie, field_name, None)
-            if field_value:
-                items = [item.strip() for item in field_value.split(",")]
-                for item in items:
-                    if item:
-                        counts[item] = counts.get(item, 0) + 1
+        for record in records:
+            for item in split_comma_separated_value(record[field_name]):
+                counts[item] = counts.get(item, 0) + 1
         return counts
 
-    def _get_yearly_stats(self, user: User, year: int) -> Dict[str, Any]:
+    def _get_yearly_stats(self, user: User, snapshots: Dict[int, UserStats], year: int) -> Dict[str, Any]:
         """Get yearly statistics and year-in-review data."""
         if not year:
             return {}
 
-        current_year = datetime.now().year
-
-        # Get records for the specified year
-        yearly_records = user.get_records().filter(list_id=List.WATCHED, date__year=year)
-
-        # Get records for previous year for comparison
-        previous_year_records = user.get_records().filter(list_id=List.WATCHED, date__year=year - 1)
+        current_year = localtime().year
 
         # Basic yearly overview
-        yearly_overview = self._get_yearly_overview(yearly_records, previous_year_records)
+        yearly_overview = self._get_yearly_overview(
+            self._get_counters(snapshots, year), self._get_counters(snapshots, year - 1)
+        )
 
         # Yearly milestones
-        yearly_milestones = self._get_yearly_milestones(yearly_records)
+        yearly_milestones = self._get_yearly_milestones(self._get_watched_records_data(user, year))
 
         # Available years for selector
-        available_years = self._get_available_years(user)
+        available_years = self._get_available_years(snapshots)
 
         return {
             "yearlyOverview": yearly_overview,
@@ -204,30 +243,22 @@ class StatsView(APIView):
 
     @staticmethod
     def _get_yearly_overview(
-        yearly_records: "QuerySet[Record]", previous_year_records: "QuerySet[Record]"
+        yearly_counters: UserStatsCounters, previous_year_counters: UserStatsCounters
     ) -> Dict[str, Any]:
         """Get yearly overview with comparisons."""
-        current_count = yearly_records.count()
-        previous_count = previous_year_records.count()
+        current_count = yearly_counters["movies_watched"]
+        previous_count = previous_year_counters["movies_watched"]
 
         # Calculate year-over-year change
         year_change = current_count - previous_count
         year_change_percent = (year_change / previous_count * 100) if previous_count > 0 else 0
 
         # Calculate total hours for the year
-        total_hours = 0.0
-        for record in yearly_records.select_related("movie"):
-            if record.movie.runtime:
-                runtime_seconds = (
-                    record.movie.runtime.hour * 3600 + record.movie.runtime.minute * 60 + record.movie.runtime.second
-                )
-                total_hours += runtime_seconds / 3600
+        total_hours = yearly_counters["runtime"] / 3600
 
         # Monthly distribution for the year
-        monthly_distribution = []
-        for month in range(1, 13):
-            month_count = yearly_records.filter(date__month=month).count()
-            monthly_distribution.append({"month": month, "count": month_count})
+        month_counts = yearly_counters["months"]
+        monthly_distribution = [{"month": month, "count": month_counts.get(str(month), 0)} for month in range(1, 13)]
 
         # Find peak month
         peak_month = (
@@ -244,29 +275,27 @@ class StatsView(APIView):
             "monthlyDistribution": monthly_distribution,
         }
 
-    def _get_yearly_milestones(self, yearly_records: "QuerySet[Record]") -> Dict[str, Any]:
+    def _get_yearly_milestones(self, yearly_records: ListType[WatchedRecordData]) -> Dict[str, Any]:
         """Get yearly milestones and achievements."""
-        if not yearly_records.exists():
+        if not yearly_records:
             return {}
 
         # First and last movie of the year
-        first_movie = yearly_records.order_by("date").first()
-        last_movie = yearly_records.order_by("-date").first()
+        first_movie = min(yearly_records, key=lambda x: x["date"])
+        last_movie = max(yearly_records, key=lambda x: x["date"])
 
         # Highest rated movie
-        highest_rated = yearly_records.filter(rating__gt=0).order_by("-rating", "-date").first()
+        rated_records = [record for record in yearly_records if record["rating"] > 0]
+        highest_rated = max(rated_records, key=lambda x: (x["rating"], x["date"])) if rated_records else None
 
         # Longest movie watched
         longest_movie = None
         max_runtime = 0
-        for record in yearly_records.select_related("movie"):
-            if record.movie.runtime:
-                runtime_seconds = (
-                    record.movie.runtime.hour * 3600 + record.movie.runtime.minute * 60 + record.movie.runtime.second
-                )
-                if runtime_seconds > max_runtime:
-                    max_runtime = runtime_seconds
-                    longest_movie = record
+        for record in yearly_records:
+            runtime_seconds = get_runtime_seconds(record["runtime"])
+            if runtime_seconds > max_runtime:
+                max_runtime = runtime_seconds
+                longest_movie = record
 
         # Get top items using helper methods
         top_genre_data = self._get_top_item_from_field(yearly_records, "genre")
@@ -274,35 +303,27 @@ class StatsView(APIView):
         top_actor_data = self._get_top_item_from_field(yearly_records, "actors")
 
         milestones = {
-            "firstMovie": (
-                {
-                    "title": first_movie.movie.title,
-                    "date": first_movie.date.strftime("%Y-%m-%d"),
-                }
-                if first_movie
-                else None
-            ),
-            "lastMovie": (
-                {
-                    "title": last_movie.movie.title,
-                    "date": last_movie.date.strftime("%Y-%m-%d"),
-                }
-                if last_movie
-                else None
-            ),
+            "firstMovie": {
+                "title": first_movie["title"],
+                "date": first_movie["date"].strftime("%Y-%m-%d"),
+            },
+            "lastMovie": {
+                "title": last_movie["title"],
+                "date": last_movie["date"].strftime("%Y-%m-%d"),
+            },
             "highestRatedMovie": (
                 {
-                    "title": highest_rated.movie.title,
-                    "rating": highest_rated.rating,
-                    "date": highest_rated.date.strftime("%Y-%m-%d"),
+                    "title": highest_rated["title"],
+                    "rating": highest_rated["rating"],
+                    "date": highest_rated["date"].strftime("%Y-%m-%d"),
                 }
                 if highest_rated
                 else None
             ),
             "longestMovie": (
                 {
-                    "title": longest_movie.movie.title,
-                    "runtime": longest_movie.movie.runtime_formatted,
+                    "title": longest_movie["title"],
+                    "runtime": cast(time, longest_movie["runtime"]).strftime("%H:%M"),
                 }
                 if longest_movie
                 else None
@@ -314,17 +335,11 @@ class StatsView(APIView):
 
         return milestones
 
-    @staticmethod
-    def _get_top_item_from_field(records: "QuerySet[Record]", field_name: str) -> Dict[str, Any] | None:
+    def _get_top_item_from_field(
+        self, records: ListType[WatchedRecordData], field_name: CommaSeparatedField
+    ) -> Dict[str, Any] | None:
         """Get the most frequent item from a comma-separated field."""
-        counts: Dict[str, int] = {}
-        for record in records.select_related("movie"):
-            field_value = getattr(record.movie, field_name, None)
-            if field_value:
-                items = [item.strip() for item in field_value.split(",")]
-                for item in items:
-                    if item:
-                        counts[item] = counts.get(item, 0) + 1
+        counts = self._count_comma_separated_field(records, field_name)
 
         if not counts:
             return None
@@ -336,19 +351,24 @@ class StatsView(APIView):
         }
 
     @staticmethod
-    def _get_available_years(user: User) -> ListType[int]:
+    def _get_available_years(snapshots: Dict[int, UserStats]) -> ListType[int]:
         """Get list of years with watch activity."""
-        years = user.get_records().filter(list_id=List.WATCHED).dates("date", "year")
-        year_list = sorted({date.year for date in years}, reverse=True)
+        year_list = sorted(
+            (
+                year
+                for year, snapshot in snapshots.items()
+                if year != UserStats.ALL_TIME and snapshot.movies_watched > 0
+            ),
+            reverse=True,
+        )
         return year_list
 
-    @staticmethod
-    def _get_release_date_stats(watched_records: "QuerySet[Record]") -> Dict[str, Any]:
+    def _get_release_date_stats(self, user: User, counters: UserStatsCounters, year: Optional[int]) -> Dict[str, Any]:
         """Get release date statistics."""
-        # Get records with release dates
-        records_with_dates = watched_records.select_related("movie").filter(movie__release_date__isnull=False)
+        # Release year counts of records with release dates
+        year_counts = {int(release_year): count for release_year, count in counters["release_years"].items()}
 
-        if not records_with_dates.exists():
+        if not year_counts:
             return {
                 "decadeDistribution": {},
                 "averageReleaseYear": None,
@@ -363,77 +383,39 @@ class StatsView(APIView):
                 },
             }
 
-        # Collect release years
-        release_years = []
-        oldest_record = None
-        newest_record = None
-
-        for record in records_with_dates:
-            if record.movie.release_date:
-                release_year = record.movie.release_date.year
-                release_years.append(release_year)
-
-                # Track oldest and newest movies
-                if (
-                    oldest_record is None
-                    or oldest_record.movie.release_date is None
-                    or record.movie.release_date < oldest_record.movie.release_date
-                ):
-                    oldest_record = record
-                if (
-                    newest_record is None
-                    or newest_record.movie.release_date is None
-                    or record.movie.release_date > newest_record.movie.release_date
-                ):
-                    newest_record = record
-
         # Calculate decade distribution
         decade_counts: Dict[str, int] = {}
-        year_counts: Dict[int, int] = {}
-
-        for year in release_years:
+        for release_year, count in sorted(year_counts.items()):
             # Decade calculation (e.g., 1985 -> 1980s)
-            decade = (year // 10) * 10
+            decade = (release_year // 10) * 10
             decade_label = f"{decade}s"
-            decade_counts[decade_label] = decade_counts.get(decade_label, 0) + 1
-
-            # Year counts for top years
-            year_counts[year] = year_counts.get(year, 0) + 1
+            decade_counts[decade_label] = decade_counts.get(decade_label, 0) + count
 
         # Calculate vintage preferences
-        classic_count = sum(1 for year in release_years if year < 1980)
-        retro_count = sum(1 for year in release_years if 1980 <= year < 2000)
-        modern_count = sum(1 for year in release_years if 2000 <= year < 2010)
-        recent_count = sum(1 for year in release_years if year >= 2010)
+        classic_count = sum(count for release_year, count in year_counts.items() if release_year < 1980)
+        retro_count = sum(count for release_year, count in year_counts.items() if 1980 <= release_year < 2000)
+        modern_count = sum(count for release_year, count in year_counts.items() if 2000 <= release_year < 2010)
+        recent_count = sum(count for release_year, count in year_counts.items() if release_year >= 2010)
 
-        # Get top release years (limit to 5)
-        top_years = sorted(year_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+        # Get top release years
+        top_years = sorted(year_counts.items(), key=lambda x: (-x[1], x[0]))[:TOP_RELEASE_YEARS_LIMIT]
 
         # Calculate average release year
-        average_year = sum(release_years) / len(release_years) if release_years else None
+        average_year = sum(release_year * count for release_year, count in year_counts.items()) / sum(
+            year_counts.values()
+        )
+
+        # Track oldest and newest movies
+        records = self._get_watched_records(user, year).filter(movie__release_date__isnull=False)
+        oldest_movie = self._get_release_date_movie(records.order_by("movie__release_date", "pk"))
+        newest_movie = self._get_release_date_movie(records.order_by("-movie__release_date", "pk"))
 
         return {
             "decadeDistribution": decade_counts,
-            "averageReleaseYear": round(average_year, 1) if average_year else None,
-            "oldestMovie": (
-                {
-                    "title": oldest_record.movie.title,
-                    "releaseDate": oldest_record.movie.release_date.strftime("%Y-%m-%d"),
-                    "releaseYear": oldest_record.movie.release_date.year,
-                }
-                if oldest_record and oldest_record.movie.release_date
-                else None
-            ),
-            "newestMovie": (
-                {
-                    "title": newest_record.movie.title,
-                    "releaseDate": newest_record.movie.release_date.strftime("%Y-%m-%d"),
-                    "releaseYear": newest_record.movie.release_date.year,
-                }
-                if newest_record and newest_record.movie.release_date
-                else None
-            ),
-            "topReleaseYears": [{"year": year, "count": count} for year, count in top_years],
+            "averageReleaseYear": round(average_year, 1),
+            "oldestMovie": oldest_movie,
+            "newestMovie": newest_movie,
+            "topReleaseYears": [{"year": release_year, "count": count} for release_year, count in top_years],
             "vintagePreferences": {
                 "classic": classic_count,
                 "retro": retro_count,
@@ -441,3 +423,15 @@ class StatsView(APIView):
                 "recent": recent_count,
             },
         }
+
+    @staticmethod
+    def _get_release_date_movie(records: QuerySet[Record]) -> Optional[Dict[str, Any]]:
+        """Get the movie of the first record."""
+        record = records.values(title=F("movie__title"), release_date=F("movie__release_date")).first()
+        if record is None:
+            return None
+        return {
+            "title": record["title"],
+            "releaseDate": record["release_date"].strftime("%Y-%m-%d"),
+            "releaseYear": record["release_date"].year,
+        }
@@ -7,8 +7,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from ..models import User
-from ..tmdb import get_trending
-from .utils import filter_out_movies_user_already_has_in_lists, get_movie_list_result
+from .utils import filter_out_movies_user_already_has_in_lists, get_catalog_movies, get_movie_list_result
 
 if TYPE_CHECKING:
     from rest_framework.permissions import BasePermission
@@ -21,7 +20,7 @@ class TrendingView(APIView):
 
     def get(self, request: Request) -> Response:  # pylint: disable=no-self-use
         """Return a list of trending movies."""
-        tmdb_movies = get_trending()
+        tmdb_movies = get_catalog_movies("trending")
         movies = [get_movie_list_result(tmdb_movie, request.LANGUAGE_CODE) for tmdb_movie in tmdb_movies]
         if request.user.is_authenticated:
             user: User = request.user
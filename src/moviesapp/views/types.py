@@ -2,11 +2,12 @@
 
 from __future__ import annotations
 
-from typing import Optional
+from datetime import datetime
+from typing import Optional, TypeAlias, Union
 
 from typing_extensions import NotRequired, TypedDict
 
-from ..types import Trailer
+from ..types import RecordStatsData, Trailer
 
 
 class MovieObject(TypedDict):
@@ -77,6 +78,19 @@ class RecordObject(TypedDict):
     additionDate: float
 
 
+class RecordsPage(TypedDict):
+    """Records page."""
+
+    results: list[RecordObject]
+    next: Optional[str]
+
+
+class WatchedRecordData(RecordStatsData):
+    """Watched record data used for stats."""
+
+    title: str
+
+
 class SearchOptions(TypedDict):
     """Search options."""
 
@@ -95,3 +109,9 @@ class MovieListResult(TypedDict):
     poster: Optional[str]
     poster2x: Optional[str]
     isReleased: bool
+
+
+# Keyset pagination position - the values of the ordering fields of the last item on a page
+CursorPosition: TypeAlias = list[Union[int, str]]
+# Decoded keyset pagination position, dates are parsed
+DecodedCursorPosition: TypeAlias = list[Union[int, datetime]]
@@ -1,16 +1,28 @@
 """Utils for views."""
 
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from datetime import date, datetime
 from typing import Optional
 
 from babel.dates import format_date
 from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import ValidationError
 
 from ..models import Action, ActionRecord, Record, User
-from ..tmdb import get_poster_url, get_tmdb_url
-from ..types import TmdbMovieListResultProcessed
+from ..tasks import refresh_tmdb_catalog_task
+from ..tmdb import (
+    acquire_catalog_refresh_lock,
+    get_cached_catalog,
+    get_poster_url,
+    get_tmdb_url,
+    is_catalog_stale,
+    refresh_catalog,
+    release_catalog_refresh_lock,
+)
+from ..types import TmdbCatalog, TmdbMovieListResultProcessed
 from ..utils import is_movie_released
-from .types import MovieListResult
+from .types import CursorPosition, DecodedCursorPosition, MovieListResult
 
 
 def add_movie_to_list(movie_id: int, list_id: int, user: User) -> None:
@@ -66,3 +78,60 @@ def filter_out_movies_user_already_has_in_lists(movies: list[MovieListResult], u
     for movie in list(movies):
         if movie["id"] in user_movies_tmdb_ids:
             movies.remove(movie)
+
+
+def get_catalog_movies(catalog: TmdbCatalog) -> list[TmdbMovieListResultProcessed]:
+    """
+    Get catalog movies from the cache.
+
+    A stale catalog is served while it is refreshed in the background.
+    A missing catalog (e.g. after a deploy or a cache flush) is loaded once synchronously under the refresh lock;
+    concurrent requests get an empty list meanwhile.
+    """
+    entry = get_cached_catalog(catalog)
+    if entry is None:
+        if not acquire_catalog_refresh_lock(catalog):
+            return []
+        try:
+            return refresh_catalog(catalog)
+        except Exception:
+            release_catalog_refresh_lock(catalog)
+            raise
+    if is_catalog_stale(entry) and acquire_catalog_refresh_lock(catalog):
+        refresh_tmdb_catalog_task.delay(catalog)
+    return entry["movies"]
+
+
+def encode_cursor(position: CursorPosition) -> str:
+    """Encode a keyset pagination position into an opaque cursor."""
+    return urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor: str, schema: tuple[type, ...]) -> DecodedCursorPosition:
+    """
+    Decode an opaque cursor into a keyset pagination position.
+
+    `schema` contains the types of the position values (`int` or `datetime`). Dates are parsed from ISO strings.
+    Raise ValidationError if the cursor is malformed.
+    """
+    error = ValidationError({"cursor": "Invalid cursor"})
+    try:
+        values = json.loads(urlsafe_b64decode(cursor.encode()))
+    # Base64, Unicode and JSON decoding errors are all subclasses of ValueError.
+    except ValueError as e:
+        raise error from e
+    if not isinstance(values, list) or len(values) != len(schema):
+        raise error
+    position: DecodedCursorPosition = []
+    for value, type_ in zip(values, schema):
+        # Booleans are integers in Python but not valid positions
+        if type_ is int and type(value) is int:  # pylint: disable=unidiomatic-typecheck
+            position.append(value)
+        elif type_ is datetime and isinstance(value, str):
+            try:
+                position.append(datetime.fromisoformat(value))
+            except ValueError as e:
+                raise error from e
+        else:
+            raise error
+    return position